@@ -0,0 +1,236 @@
+import asyncio
+from typing import Optional
+
+import aiosqlite
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from config import settings
+from observability.log import get_logger
+
+logger = get_logger(__name__)
+
+
+# -------------------------------------------------------
+# Backend selection
+# -------------------------------------------------------
+# LANGGRAPH_CHECKPOINTER_URL may be either
+#   - sqlite:///./langgraph_state.db          (local dev, single aiosqlite connection)
+#   - postgresql[+driver]://user:pw@host/db   (pooled AsyncPostgresSaver)
+# Using the same value as DATABASE_URL stores checkpoints next to the CRM tables.
+# Every worker process opens its own saver on the same store. With several
+# workers (WEB_CONCURRENCY > 1) use Postgres: SQLite serializes their writes
+# on one file lock.
+
+# pg_advisory_lock key held around setup(), whose migrations are not safe to run concurrently
+SETUP_LOCK_ID = 0x41495643
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_pool = None  # psycopg AsyncConnectionPool when running on Postgres
+_sqlite_conn: Optional[aiosqlite.Connection] = None
+_compaction_task: Optional[asyncio.Task] = None
+
+
+def _is_postgres(url: str) -> bool:
+    return url.startswith("postgres")
+
+
+def _postgres_conninfo(url: str) -> str:
+    """Strips the SQLAlchemy driver suffix (e.g. +asyncpg) so psycopg accepts the URL."""
+    scheme, rest = url.split("://", 1)
+    return f"{scheme.split('+', 1)[0]}://{rest}"
+
+
+def _sqlite_path(url: str) -> str:
+    return url.split(":///", 1)[1] if ":///" in url else url
+
+
+async def open_checkpointer() -> BaseCheckpointSaver:
+    """Creates the async checkpointer and starts background compaction."""
+    global _checkpointer, _pool, _sqlite_conn, _compaction_task
+
+    if _checkpointer is not None:
+        return _checkpointer
+
+    url = settings.LANGGRAPH_CHECKPOINTER_URL
+
+    if _is_postgres(url):
+        # Optional dependency: only needed when checkpoints live in Postgres
+        from psycopg.rows import dict_row
+        from psycopg_pool import AsyncConnectionPool
+        from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+        _pool = AsyncConnectionPool(
+            conninfo=_postgres_conninfo(url),
+            min_size=settings.CHECKPOINTER_POOL_MIN_SIZE,
+            max_size=settings.CHECKPOINTER_POOL_MAX_SIZE,
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+            open=False,
+        )
+        await _pool.open()
+        _checkpointer = AsyncPostgresSaver(_pool)
+        await _setup_locked(_checkpointer, _postgres_conninfo(url))
+    else:
+        if settings.WEB_CONCURRENCY > 1:
+            logger.warning("SQLite checkpointer shared by %d workers; use Postgres for multi-worker serving", settings.WEB_CONCURRENCY)
+        _sqlite_conn = await aiosqlite.connect(_sqlite_path(url))
+        _checkpointer = AsyncSqliteSaver(_sqlite_conn)
+        await _checkpointer.setup()
+
+    if settings.CHECKPOINT_RETENTION_PER_THREAD > 0:
+        _compaction_task = asyncio.create_task(_compaction_loop())
+
+    return _checkpointer
+
+
+async def _setup_locked(checkpointer: BaseCheckpointSaver, conninfo: str):
+    """
+    Runs setup() while holding SETUP_LOCK_ID on a connection of its own (not from
+    the saver's pool, which setup() itself draws from), so workers starting
+    together apply the saver's migrations one at a time. Waiters poll instead of
+    blocking in pg_advisory_lock: a blocked statement holds a snapshot, and the
+    saver's CREATE INDEX CONCURRENTLY would wait for it forever.
+    """
+    from psycopg import AsyncConnection
+
+    async with await AsyncConnection.connect(conninfo, autocommit=True) as conn:
+        while True:
+            cur = await conn.execute("SELECT pg_try_advisory_lock(%s)", (SETUP_LOCK_ID,))
+            if (await cur.fetchone())[0]:
+                break
+            await asyncio.sleep(0.1)
+        try:
+            await checkpointer.setup()
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock(%s)", (SETUP_LOCK_ID,))
+
+
+async def close_checkpointer():
+    global _checkpointer, _pool, _sqlite_conn, _compaction_task
+
+    if _compaction_task is not None:
+        _compaction_task.cancel()
+        try:
+            await _compaction_task
+        except asyncio.CancelledError:
+            pass
+        _compaction_task = None
+
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+    if _sqlite_conn is not None:
+        await _sqlite_conn.close()
+        _sqlite_conn = None
+
+    _checkpointer = None
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    if _checkpointer is None:
+        raise RuntimeError("Checkpointer is not open. Call open_checkpointer() during startup.")
+    return _checkpointer
+
+
+# -------------------------------------------------------
+# Retention / Compaction
+# -------------------------------------------------------
+# Threads that received new checkpoints are queued here and pruned by the
+# background loop, so each pass only touches recently active threads (via the
+# thread_id index) instead of scanning the whole checkpoint table.
+# Checkpoint ids are uuid6 strings, so ordering by checkpoint_id DESC is newest first.
+
+_dirty_threads: set[str] = set()
+
+_SQLITE_PRUNE = [
+    """
+    DELETE FROM checkpoints WHERE rowid IN (
+        SELECT rowid FROM (
+            SELECT rowid, ROW_NUMBER() OVER (
+                PARTITION BY checkpoint_ns ORDER BY checkpoint_id DESC
+            ) AS rn
+            FROM checkpoints WHERE thread_id = :thread_id
+        ) WHERE rn > :keep
+    )
+    """,
+    """
+    DELETE FROM writes WHERE thread_id = :thread_id AND NOT EXISTS (
+        SELECT 1 FROM checkpoints c
+        WHERE c.thread_id = writes.thread_id
+          AND c.checkpoint_ns = writes.checkpoint_ns
+          AND c.checkpoint_id = writes.checkpoint_id
+    )
+    """,
+]
+
+_POSTGRES_PRUNE = [
+    """
+    DELETE FROM checkpoints c USING (
+        SELECT checkpoint_ns, checkpoint_id, ROW_NUMBER() OVER (
+            PARTITION BY checkpoint_ns ORDER BY checkpoint_id DESC
+        ) AS rn
+        FROM checkpoints WHERE thread_id = %(thread_id)s
+    ) ranked
+    WHERE c.thread_id = %(thread_id)s
+      AND ranked.rn > %(keep)s
+      AND c.checkpoint_ns = ranked.checkpoint_ns
+      AND c.checkpoint_id = ranked.checkpoint_id
+    """,
+    """
+    DELETE FROM checkpoint_writes w WHERE w.thread_id = %(thread_id)s AND NOT EXISTS (
+        SELECT 1 FROM checkpoints c
+        WHERE c.thread_id = w.thread_id
+          AND c.checkpoint_ns = w.checkpoint_ns
+          AND c.checkpoint_id = w.checkpoint_id
+    )
+    """,
+    # Channel values are stored once per version; drop versions no retained checkpoint references
+    """
+    DELETE FROM checkpoint_blobs b WHERE b.thread_id = %(thread_id)s AND NOT EXISTS (
+        SELECT 1 FROM checkpoints c
+        WHERE c.thread_id = b.thread_id
+          AND c.checkpoint_ns = b.checkpoint_ns
+          AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+    )
+    """,
+]
+
+
+def mark_thread_for_compaction(thread_id: str):
+    """Queues a thread for the next compaction pass (cheap, called once per chat turn)."""
+    if settings.CHECKPOINT_RETENTION_PER_THREAD > 0:
+        _dirty_threads.add(thread_id)
+
+
+async def compact_thread(thread_id: str, keep_last: int) -> None:
+    """Keeps only the newest `keep_last` checkpoints of a thread and drops orphaned writes/blobs."""
+    params = {"thread_id": thread_id, "keep": keep_last}
+    if _pool is not None:
+        async with _pool.connection() as conn:
+            async with conn.transaction():
+                for sql in _POSTGRES_PRUNE:
+                    await conn.execute(sql, params)
+    elif _sqlite_conn is not None:
+        # Share the saver's lock so compaction never interleaves with a checkpoint write
+        async with _checkpointer.lock:
+            for sql in _SQLITE_PRUNE:
+                await _sqlite_conn.execute(sql, params)
+            await _sqlite_conn.commit()
+
+
+async def compact_pending_threads() -> int:
+    """Compacts every thread queued since the last pass. Returns the number of threads pruned."""
+    threads = list(_dirty_threads)
+    _dirty_threads.clear()
+    for thread_id in threads:
+        await compact_thread(thread_id, settings.CHECKPOINT_RETENTION_PER_THREAD)
+    return len(threads)
+
+
+async def _compaction_loop():
+    while True:
+        await asyncio.sleep(settings.CHECKPOINT_COMPACTION_INTERVAL_SECONDS)
+        try:
+            await compact_pending_threads()
+        except Exception as e:
+            logger.warning("Checkpoint compaction failed: %s", e)
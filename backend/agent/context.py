@@ -0,0 +1,59 @@
+from typing import Sequence
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from config import settings
+
+
+SUMMARY_PROMPT = SystemMessage(content="""\
+        You maintain a running summary of a CRM assistant conversation with a pharma sales rep.
+        Merge the EXISTING SUMMARY with the NEW MESSAGES into one concise summary.
+        - Keep HCP names, dates, products, materials, samples, sentiment and outcomes.
+        - Keep whether an interaction was already logged and its returned ID.
+        - Do NOT invent facts. Return only the summary text.
+        """)
+
+
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+    # Approximate (chars / 4) count; cheap enough to run before every LLM call
+    return count_tokens_approximately(messages)
+
+
+def find_fold_index(messages: Sequence[BaseMessage], recent_budget: int) -> int:
+    """
+    Returns how many leading messages should be folded into the summary so that
+    the remaining tail fits `recent_budget` tokens.
+
+    The last message is always kept, and the cut never lands on a ToolMessage,
+    so a tool result always stays together with the AI message that requested it.
+    """
+    used = 0
+    cut = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        used += count_tokens([messages[i]])
+        if used > recent_budget and i < len(messages) - 1:
+            break
+        cut = i
+
+    while cut > 0 and isinstance(messages[cut], ToolMessage):
+        cut -= 1
+
+    return cut
+
+
+def needs_compaction(messages: Sequence[BaseMessage], summary: str) -> bool:
+    summary_tokens = count_tokens([SystemMessage(content=summary)]) if summary else 0
+    return count_tokens(messages) + summary_tokens > settings.AGENT_CONTEXT_TOKEN_BUDGET
+
+
+def build_summary_request(summary: str, folded: Sequence[BaseMessage]) -> list[BaseMessage]:
+    """Incremental update: only the newly folded messages are sent, never the full history."""
+    transcript = "\n".join(f"{m.type}: {m.content}" for m in folded if m.content)
+    return [
+        SUMMARY_PROMPT,
+        HumanMessage(content=f"EXISTING SUMMARY:\n{summary or '(none)'}\n\nNEW MESSAGES:\n{transcript}"),
+    ]
+
+
+def summary_message(summary: str) -> SystemMessage:
+    return SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")
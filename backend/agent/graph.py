@@ -1,10 +1,19 @@
-import operator
 from typing import TypedDict, Sequence, Annotated
 from langgraph.graph import StateGraph, END
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, BaseMessage, SystemMessage
+from langgraph.graph.message import add_messages
+from langchain_core.runnables import RunnableConfig
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, BaseMessage, SystemMessage, RemoveMessage
 from .tools import ALL_TOOLS # Import the tools defined in tools.py
+from .tool_registry import ToolRegistry
+from .llm_cache import get_llm_cache
+from .llm_gateway import llm_gateway, INTERACTIVE
+from .context import needs_compaction, find_fold_index, build_summary_request, summary_message
 from config import settings # Assuming GROQ_API_KEY and other settings are here
+from observability.log import get_logger
+from observability.metrics import instrument_node
+from observability.llm import llm_metrics_callback
+
+logger = get_logger(__name__)
 
 
 FORCE_JSON = SystemMessage(content="""\
@@ -18,106 +27,125 @@ FORCE_JSON = SystemMessage(content="""\
 
 # --- Configuration ---
 MODEL_NAME = "llama-3.1-8b-instant"
-# NOTE: Initialize the LLM outside the node function for performance
-llm = ChatGroq(
-    api_key=settings.GROQ_API_KEY,
-    model=MODEL_NAME,
-    temperature=0.7,
-    max_tokens=256,
+TEMPERATURE = 0.7
+MAX_TOKENS = 256
+# Built on first use (not at import) and then shared by all requests; tests and
+# benchmarks may assign these module attributes directly to swap in a fake model
+llm = None
+llm_with_tools = None
+
+
+def get_llm():
+    global llm
+    if llm is None:
+        from langchain_groq import ChatGroq  # deferred: pulls in the Groq SDK
+
+        llm = ChatGroq(
+            api_key=settings.GROQ_API_KEY,
+            model=MODEL_NAME,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            max_retries=0, # Retries (and retry-after) are handled by the LLM gateway
+            cache=get_llm_cache(TEMPERATURE), # False (no caching) unless opted in for temperature > 0
+            callbacks=[llm_metrics_callback], # Latency and token usage metrics
+        )
+    return llm
+
+
+def get_llm_with_tools():
+    global llm_with_tools
+    if llm_with_tools is None:
+        llm_with_tools = get_llm().bind_tools(ALL_TOOLS)
+    return llm_with_tools
+
+
+# Name-indexed tools with per-tool concurrency limits and timeouts, built once at import
+TOOL_REGISTRY = ToolRegistry(
+    ALL_TOOLS,
+    max_concurrency=settings.TOOL_MAX_CONCURRENCY,
+    timeout=settings.TOOL_TIMEOUT_SECONDS,
 )
-llm_with_tools = llm.bind_tools(ALL_TOOLS)
 
 
 # -------------------------------------------------------
 # State Definition
 # -------------------------------------------------------
 class AgentState(TypedDict):
-    messages: Annotated[Sequence[BaseMessage], operator.add]
+    # add_messages appends like operator.add but also honours RemoveMessage,
+    # which context_node uses to drop history once it is folded into `summary`
+    messages: Annotated[Sequence[BaseMessage], add_messages]
     terminate: bool # Flag to signal a forced stop
+    summary: str # Running summary of folded history, persisted in the checkpoint
 
 # -------------------------------------------------------
 # Nodes
 # -------------------------------------------------------
 
-def llm_node(state: AgentState):
+def llm_priority(config: RunnableConfig) -> int:
+    # Batch callers of the graph pass {"configurable": {"llm_priority": BATCH}}
+    return config.get("configurable", {}).get("llm_priority", INTERACTIVE)
+
+
+@instrument_node("context")
+async def context_node(state: AgentState, config: RunnableConfig):
+    """
+    Keeps the prompt within AGENT_CONTEXT_TOKEN_BUDGET. When the thread grows past
+    the budget, the oldest messages are folded into the running summary and removed
+    from state, leaving roughly AGENT_CONTEXT_RECENT_TOKENS of recent turns verbatim.
+    """
+    messages = list(state["messages"])
+    summary = state.get("summary", "")
+
+    if not needs_compaction(messages, summary):
+        return {}
+
+    cut = find_fold_index(messages, settings.AGENT_CONTEXT_RECENT_TOKENS)
+    if cut == 0:
+        return {}
+
+    folded = messages[:cut]
+    result = await llm_gateway.ainvoke(
+        get_llm(), build_summary_request(summary, folded), priority=llm_priority(config), max_tokens=MAX_TOKENS
+    )
+
+    return {
+        "summary": result.content,
+        "messages": [RemoveMessage(id=m.id) for m in folded],
+    }
+
+
+@instrument_node("llm_node")
+async def llm_node(state: AgentState, config: RunnableConfig):
     # print("🔥 llm_node EXECUTED with state:", state)
-    messages = [FORCE_JSON] + list(state["messages"])
+    messages = [FORCE_JSON]
+    if state.get("summary"):
+        messages.append(summary_message(state["summary"]))
+    messages += list(state["messages"])
 
-    result = llm_with_tools.invoke(messages)
+    # Through the gateway: rate budgets, 429 retries and coalescing of identical prompts
+    result = await llm_gateway.ainvoke(
+        get_llm_with_tools(), messages, priority=llm_priority(config), max_tokens=MAX_TOKENS
+    )
 
     if not getattr(result, "tool_calls", None):
         return {"messages": [result], "end": True}
     
-    print(f"9090900000000000000000000000000000:{result}")
+    logger.debug("llm_node requested tools: %s", [call["name"] for call in result.tool_calls])
     return {"messages": [result]}
 
 
 
-def tool_node(state: AgentState):
+@instrument_node("tools")
+async def tool_node(state: AgentState, config: RunnableConfig):
     messages = state["messages"]
     last_message = messages[-1]
 
-    tool_results = []
-
     # Safety check: If no tool calls, return empty
     if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
-        return {"messages": tool_results}
-
-    for tool_call in last_message.tool_calls:
-        tool_name = tool_call.get("name")
-        raw_args = tool_call.get("args")
-        tool_id = tool_call.get("id")   # <-- ALWAYS defined here
-
-        # ---------------------------
-        # Validate & parse JSON args
-        # ---------------------------
-        try:
-            import json
-            if isinstance(raw_args, str):
-                tool_args = json.loads(raw_args)
-            else:
-                tool_args = raw_args
-        except Exception:
-            tool_results.append(
-                ToolMessage(
-                    content="Error: Invalid JSON passed to tool. Please return ONLY valid JSON.",
-                    tool_call_id=tool_id
-                )
-            )
-            continue
-
-        # ---------------------------
-        # Find the tool
-        # ---------------------------
-        tool = next((t for t in ALL_TOOLS if t.name == tool_name), None)
-
-        if not tool:
-            tool_results.append(
-                ToolMessage(
-                    content=f"Error: Tool '{tool_name}' not found.",
-                    tool_call_id=tool_id
-                )
-            )
-            continue
-
-        # ---------------------------
-        # Execute tool
-        # ---------------------------
-        try:
-            result = tool.invoke(tool_args)
-            tool_results.append(
-                ToolMessage(
-                    content=str(result),
-                    tool_call_id=tool_id
-                )
-            )
-        except Exception as e:
-            tool_results.append(
-                ToolMessage(
-                    content=f"Error running tool: {str(e)}",
-                    tool_call_id=tool_id
-                )
-            )
+        return {"messages": []}
+
+    # Independent calls run concurrently; results come back in tool_call order
+    tool_results = await TOOL_REGISTRY.run_calls(last_message.tool_calls, config)
 
     return {"messages": tool_results}
 
@@ -160,10 +188,12 @@ def should_continue(state: AgentState):
 # -------------------------------------------------------
 graph = StateGraph(AgentState)
 
+graph.add_node("context", context_node)
 graph.add_node("llm_node", llm_node)
 graph.add_node("tools", tool_node)
 
-graph.set_entry_point("llm_node")
+graph.set_entry_point("context")
+graph.add_edge("context", "llm_node")
 
 graph.add_conditional_edges(
     "llm_node",
@@ -178,10 +208,7 @@ graph.add_conditional_edges(
     "tools",
     should_continue,
     {
-        "llm_node": "llm_node", 
+        "llm_node": "context", # Tool results pass through the context budget before the next LLM call
         "end": END,
     }
 )
-
-# Export the compiled graph
-LANGGRAPH_APP = graph.compile()
\ No newline at end of file
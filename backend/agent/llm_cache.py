@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Union
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from config import settings
+
+
+# -------------------------------------------------------
+# Cache key
+# -------------------------------------------------------
+# LangChain hands the cache two strings: the serialized prompt (message ids already
+# stripped) and an llm_string with model name, parameters and bound tool schemas.
+# Per-call metadata of earlier messages (token usage, timings, generated tool-call
+# ids) is dropped and whitespace in message content is collapsed, so retries of
+# the same conversation map to the same key.
+
+_VOLATILE_KEYS = {"response_metadata", "usage_metadata", "tool_call_id"}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _is_volatile(key: str, value: Any) -> bool:
+    # String ids are per-call; list ids are LangChain class paths and must stay
+    return key in _VOLATILE_KEYS or (key == "id" and isinstance(value, str))
+
+
+def _normalize(node: Any) -> Any:
+    if isinstance(node, dict):
+        return {
+            k: (_WHITESPACE.sub(" ", v).strip() if k == "content" and isinstance(v, str) else _normalize(v))
+            for k, v in node.items()
+            if not _is_volatile(k, v)
+        }
+    if isinstance(node, list):
+        return [_normalize(v) for v in node]
+    return node
+
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    try:
+        normalized = json.dumps(_normalize(json.loads(prompt)), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        normalized = prompt
+    return hashlib.sha256(f"{normalized}\x00{llm_string}".encode()).hexdigest()
+
+
+def _encode(generations: RETURN_VAL_TYPE) -> str:
+    return json.dumps([
+        {"message": message_to_dict(g.message)} if isinstance(g, ChatGeneration) else {"text": g.text}
+        for g in generations
+    ])
+
+
+def _decode(payload: str) -> RETURN_VAL_TYPE:
+    generations = []
+    for item in json.loads(payload):
+        if "message" in item:
+            generations.append(ChatGeneration(message=messages_from_dict([item["message"]])[0]))
+        else:
+            generations.append(Generation(text=item["text"]))
+    return generations
+
+
+# -------------------------------------------------------
+# Backends
+# -------------------------------------------------------
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+class MemoryLRUCache(BaseCache):
+    """In-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, tuple[float, RETURN_VAL_TYPE]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, value: RETURN_VAL_TYPE):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.get(make_cache_key(prompt, llm_string))
+        self.stats.record(value is not None)
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.put(make_cache_key(prompt, llm_string), return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self._entries.clear()
+
+
+class SQLiteCache(BaseCache):
+    """Persistent local tier; survives restarts and is shared by workers on the same host."""
+
+    _PURGE_EVERY = 256  # writes between expired-row sweeps
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return _decode(row[0]) if row else None
+
+    def put(self, key: str, value: RETURN_VAL_TYPE):
+        payload = _encode(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + self.ttl_seconds, payload),
+            )
+            self._writes += 1
+            if self._writes % self._PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.get(make_cache_key(prompt, llm_string))
+        self.stats.record(value is not None)
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.put(make_cache_key(prompt, llm_string), return_val)
+
+    # sqlite3 is blocking; keep it off the event loop
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return await asyncio.to_thread(self.lookup, prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+class TieredCache(BaseCache):
+    """Memory LRU in front of the SQLite tier; disk hits are promoted into memory."""
+
+    def __init__(self, memory: MemoryLRUCache, disk: SQLiteCache):
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = make_cache_key(prompt, llm_string)
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        self.stats.record(value is not None)
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = make_cache_key(prompt, llm_string)
+        self.memory.put(key, return_val)
+        self.disk.put(key, return_val)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = make_cache_key(prompt, llm_string)
+        value = self.memory.get(key)
+        if value is None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.put(key, value)
+        self.stats.record(value is not None)
+        return value
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = make_cache_key(prompt, llm_string)
+        self.memory.put(key, return_val)
+        await asyncio.to_thread(self.disk.put, key, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+
+# -------------------------------------------------------
+# Factory
+# -------------------------------------------------------
+
+_shared_cache: Optional[BaseCache] = None
+
+
+def _build_cache() -> Optional[BaseCache]:
+    backend = settings.LLM_CACHE_BACKEND
+    if backend == "none":
+        return None
+    memory = MemoryLRUCache(settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_TTL_SECONDS)
+    if backend == "memory":
+        return memory
+    disk = SQLiteCache(settings.LLM_CACHE_SQLITE_PATH, settings.LLM_CACHE_TTL_SECONDS)
+    if backend == "sqlite":
+        return disk
+    return TieredCache(memory, disk)
+
+
+def get_llm_cache(temperature: float) -> Union[BaseCache, bool]:
+    """
+    Returns the shared cache for a model with the given temperature, or False
+    (LangChain's "do not cache") when caching is off. Sampling models are only
+    cached when LLM_CACHE_ALLOW_NONZERO_TEMPERATURE opts in.
+    """
+    global _shared_cache
+
+    if temperature > 0 and not settings.LLM_CACHE_ALLOW_NONZERO_TEMPERATURE:
+        return False
+    if _shared_cache is None:
+        _shared_cache = _build_cache()
+    return _shared_cache if _shared_cache is not None else False
+
+
+def get_cache_stats() -> dict:
+    if _shared_cache is None:
+        return {"backend": settings.LLM_CACHE_BACKEND, "enabled": False}
+    return {"backend": settings.LLM_CACHE_BACKEND, "enabled": True, **_shared_cache.stats.as_dict()}
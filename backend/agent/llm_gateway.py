@@ -0,0 +1,409 @@
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import settings
+from observability.log import get_logger
+from observability.metrics import LLM_COALESCED, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT_SECONDS, LLM_RETRIES, LLM_SHED
+
+logger = get_logger(__name__)
+
+# Lower runs first
+INTERACTIVE = 0  # a user is waiting on the chat stream
+BATCH = 10       # re-extraction and other background jobs
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class LLMOverloadedError(Exception):
+    """Raised when the gateway sheds a call (queue full or waited too long)."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# -------------------------------------------------------
+# Budgets
+# -------------------------------------------------------
+
+class TokenBucket:
+    """Refills at `rate` units per second up to `capacity`. A rate <= 0 means unlimited.
+    The level may go negative when actual usage exceeds the estimate taken up front."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (0 if it can be taken now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.level
+
+    def take(self, amount: float, now: float):
+        if not self.unlimited:
+            self._refill(now)
+            self.level -= amount
+
+
+# -------------------------------------------------------
+# Retry classification
+# -------------------------------------------------------
+
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The provider's retry-after hint (delta-seconds or HTTP date), if the error carries one."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_reason(error: BaseException) -> Optional[str]:
+    """Metric label for a retryable error, None when the error is final (e.g. 400, 401)."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        if status == 429:
+            return "rate_limited"
+        return "server_error" if status in _RETRY_STATUS else None
+    try:
+        from groq import APIConnectionError  # also covers APITimeoutError
+    except ImportError:
+        APIConnectionError = ConnectionError
+    if isinstance(error, (APIConnectionError, ConnectionError, TimeoutError)):
+        return "connection"
+    return None
+
+
+# -------------------------------------------------------
+# Token streaming
+# -------------------------------------------------------
+
+def streams_tokens() -> bool:
+    """Whether the current run streams tokens to a client (e.g. the graph's "messages"
+    stream mode), by the same handler check the chat model uses to pick its streaming API."""
+    from langchain_core.runnables.config import ensure_config  # deferred: pulls in LangChain
+    from langchain_core.tracers._streaming import _StreamingCallbackHandler
+
+    callbacks = ensure_config().get("callbacks")
+    handlers = getattr(callbacks, "handlers", callbacks) or []
+    return any(isinstance(h, _StreamingCallbackHandler) for h in handlers)
+
+
+@lru_cache(maxsize=None)
+def _token_watcher_type():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TokenWatcher(BaseCallbackHandler):
+        """Notes whether a call has emitted any streamed tokens."""
+
+        run_inline = True
+        started = False
+
+        def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+            self.started = True
+
+    return TokenWatcher
+
+
+# -------------------------------------------------------
+# Gateway
+# -------------------------------------------------------
+
+class _SharedCall:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class LLMGateway:
+    """
+    Process-wide front door for chat model calls.
+
+      - Admission: a call waits in a priority queue until the requests-per-second
+        and tokens-per-minute budgets and the concurrency limit allow it. The
+        token cost is estimated up front and corrected from usage_metadata.
+      - Shedding: a full queue, or a wait beyond `queue_timeout`, raises
+        LLMOverloadedError instead of queueing without bound.
+      - Retries: 429s, 5xx and connection errors are retried with exponential
+        backoff and jitter. A retry-after hint also pauses admission for every
+        caller, so one 429 does not turn into a burst of them. A call that has
+        already streamed tokens is not retried (the client would see them twice);
+        its error is raised instead.
+      - Coalescing: concurrent non-streaming calls with the same model and prompt
+        (per the LLM cache key, so message ids do not matter) share one upstream
+        call. Streaming calls always run on their own, so every caller gets its
+        own tokens.
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        requests_per_second: float,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        max_retries: int,
+        retry_base: float,
+        retry_max: float,
+    ):
+        # Bursts of up to one minute's token budget, or one second's requests
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+        self.requests = TokenBucket(requests_per_second, max(1.0, requests_per_second))
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+        self._waiting: List[tuple] = []  # heap of (priority, seq, cost, future)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._calls: Dict[str, _SharedCall] = {}
+        self._changed: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._loop = None
+
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "timeout": 0}
+        self.retries = 0
+        self.coalesced = 0
+
+    # ---------------------------
+    # Admission
+    # ---------------------------
+
+    def _ensure_pump(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (tests, benchmarks): start over
+            self._loop = loop
+            self._waiting.clear()
+            self._in_flight = 0
+            self._calls.clear()
+            self._changed = asyncio.Event()
+            self._pump_task = None
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = loop.create_task(self._pump())
+
+    async def _pump(self):
+        while True:
+            self._changed.clear()
+            delay = self._admit_ready()
+            try:
+                await asyncio.wait_for(self._changed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _admit_ready(self) -> Optional[float]:
+        """Admits queued calls in priority order while the budgets allow. Returns the
+        seconds until the head of the queue could be admitted (None: wait for a change)."""
+        while self._waiting:
+            _, _, cost, future = self._waiting[0]
+            if future.done():  # timed out or cancelled while queued
+                heapq.heappop(self._waiting)
+                continue
+            if self._in_flight >= self.max_concurrency:
+                break
+            now = time.monotonic()
+            delay = max(
+                self._paused_until - now,
+                self.requests.delay(1, now),
+                self.tokens.delay(cost, now),
+            )
+            if delay > 0:
+                LLM_QUEUE_DEPTH.set(len(self._waiting))
+                return delay
+            heapq.heappop(self._waiting)
+            self.requests.take(1, now)
+            self.tokens.take(cost, now)
+            self._in_flight += 1
+            self.admitted += 1
+            future.set_result(None)
+        LLM_QUEUE_DEPTH.set(len(self._waiting))
+        return None
+
+    def _shed(self, reason: str, message: str) -> LLMOverloadedError:
+        self.shed[reason] += 1
+        LLM_SHED.labels(reason).inc()
+        retry_after = max(1.0, self._paused_until - time.monotonic())
+        return LLMOverloadedError(message, retry_after=round(retry_after, 1))
+
+    async def _acquire(self, priority: int, cost: int):
+        self._ensure_pump()
+        if len(self._waiting) >= self.max_queue:
+            raise self._shed("queue_full", "The assistant is busy right now, please try again shortly.")
+
+        if not self.tokens.unlimited:
+            cost = min(cost, self.tokens.capacity)  # otherwise it could never be admitted
+        future = self._loop.create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), cost, future))
+        LLM_QUEUE_DEPTH.set(len(self._waiting))
+        self._changed.set()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._shed("timeout", "The assistant is busy right now, please try again shortly.") from None
+        except BaseException:
+            # Cancelled after being admitted: hand the slot back
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        finally:
+            LLM_QUEUE_WAIT_SECONDS.labels(PRIORITY_NAMES.get(priority, str(priority))).observe(time.perf_counter() - start)
+
+    def _release(self, estimated: int = 0, actual: Optional[int] = None):
+        self._in_flight -= 1
+        if actual is not None:
+            # Settle the token estimate against what the provider reported
+            self.tokens.take(actual - estimated, time.monotonic())
+        self._changed.set()
+
+    # ---------------------------
+    # Calls
+    # ---------------------------
+
+    @staticmethod
+    def estimate_tokens(messages: Sequence[Any], max_tokens: int) -> int:
+        # ~4 characters per token, plus the completion budget
+        return sum(len(str(getattr(m, "content", m))) for m in messages) // 4 + max_tokens
+
+    async def _call_with_retries(self, runnable, messages: Sequence[Any], priority: int, max_tokens: int):
+        from langchain_core.runnables.config import ensure_config, merge_configs
+
+        cost = self.estimate_tokens(messages, max_tokens)
+        attempt = 0
+        # The caller's callbacks plus a watcher for the first streamed token
+        watcher = _token_watcher_type()()
+        config = merge_configs(ensure_config(), {"callbacks": [watcher]})
+        while True:
+            await self._acquire(priority, cost)
+            try:
+                result = await runnable.ainvoke(messages, config=config)
+            except asyncio.CancelledError:
+                self._release()
+                raise
+            except Exception as e:
+                self._release()
+                reason = retry_reason(e)
+                if reason is None or attempt >= self.max_retries or watcher.started:
+                    raise
+                hinted = retry_after_seconds(e)
+                if hinted is not None:
+                    delay = hinted + random.uniform(0, self.retry_base)
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                else:
+                    delay = random.uniform(0.5, 1.0) * min(self.retry_max, self.retry_base * 2 ** attempt)
+                attempt += 1
+                self.retries += 1
+                LLM_RETRIES.labels(reason).inc()
+                logger.warning("LLM call failed (%s), retry %d/%d in %.1fs", reason, attempt, self.max_retries, delay)
+                await asyncio.sleep(delay)
+                continue
+            usage = getattr(result, "usage_metadata", None) or {}
+            self._release(cost, usage.get("total_tokens"))
+            return result
+
+    async def ainvoke(self, runnable, messages: Sequence[Any], priority: int = INTERACTIVE, max_tokens: int = 256):
+        """Calls `runnable.ainvoke(messages)` through admission control, retries and coalescing."""
+        from .llm_cache import make_cache_key  # deferred: pulls in LangChain
+        from langchain_core.load import dumps
+
+        self._ensure_pump()
+        if streams_tokens():
+            # Tokens go to this caller's callbacks only, so the call cannot be shared
+            return await self._call_with_retries(runnable, messages, priority, max_tokens)
+
+        # The runnable's identity stands for model, parameters and bound tools;
+        # clients are long-lived module singletons
+        key = make_cache_key(dumps(list(messages)), f"runnable:{id(runnable)}")
+        shared = self._calls.get(key)
+        if shared is None:
+            task = asyncio.create_task(self._call_with_retries(runnable, messages, priority, max_tokens))
+            shared = self._calls[key] = _SharedCall(task)
+            task.add_done_callback(lambda _: self._forget(key, shared))
+        else:
+            self.coalesced += 1
+            LLM_COALESCED.inc()
+
+        shared.waiters += 1
+        try:
+            return await asyncio.shield(shared.task)
+        finally:
+            shared.waiters -= 1
+            if shared.waiters == 0 and not shared.task.done():
+                # Every caller went away (e.g. client disconnects); stop the upstream call
+                shared.task.cancel()
+
+    def _forget(self, key: str, shared: _SharedCall):
+        if self._calls.get(key) is shared:
+            del self._calls[key]
+
+    async def close(self):
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            self._pump_task = None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "queue_depth": sum(1 for *_, f in self._waiting if not f.done()),
+            "in_flight": self._in_flight,
+            "paused_for_seconds": round(max(0.0, self._paused_until - now), 2),
+            "tokens_available": None if self.tokens.unlimited else round(self.tokens.available(now), 1),
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+        }
+
+
+# Every worker process has its own gateway; together they stay within the account's budgets
+_workers = max(1, settings.WEB_CONCURRENCY)
+
+llm_gateway = LLMGateway(
+    tokens_per_minute=math.ceil(settings.LLM_TOKENS_PER_MINUTE / _workers),  # stays > 0 (0 = unlimited)
+    requests_per_second=settings.LLM_REQUESTS_PER_SECOND / _workers,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_queue=settings.LLM_QUEUE_MAX,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    max_retries=settings.LLM_MAX_RETRIES,
+    retry_base=settings.LLM_RETRY_BASE_SECONDS,
+    retry_max=settings.LLM_RETRY_MAX_SECONDS,
+)
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+
+from observability.metrics import TOOL_ERRORS, TOOL_SECONDS
+from observability.tracing import span
+
+
+# -------------------------------------------------------
+# Stats (read back from the Prometheus metrics)
+# -------------------------------------------------------
+
+def bucket_quantile(buckets: Dict[str, int], count: int, q: float) -> Optional[float]:
+    """Upper bound of the cumulative bucket holding the q-quantile (None when empty or beyond the last bucket)."""
+    if not count:
+        return None
+    for bound, seen in buckets.items():
+        if seen >= q * count:
+            return None if bound == "+Inf" else float(bound)
+    return None
+
+
+def _tool_samples(metric, suffix: str):
+    """This process's samples of `metric` whose name ends with `suffix`, e.g. "_bucket"."""
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name.endswith(suffix):
+                yield sample
+
+
+# -------------------------------------------------------
+# Registry
+# -------------------------------------------------------
+
+class RegisteredTool:
+    def __init__(self, tool: BaseTool, max_concurrency: int, timeout: float):
+        self.tool = tool
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+
+class ToolRegistry:
+    """
+    Name-indexed tools with a per-tool concurrency limit and timeout.
+
+    `run_calls` dispatches all tool calls of one AI message concurrently and
+    returns the ToolMessages in the same order as the calls. The semaphores are
+    process-wide, so a limit also bounds a tool across concurrent chat sessions.
+    """
+
+    def __init__(
+        self,
+        tools: Iterable[BaseTool],
+        max_concurrency: int,
+        timeout: float,
+        overrides: Optional[Dict[str, dict]] = None,
+    ):
+        overrides = overrides or {}
+        self._tools: Dict[str, RegisteredTool] = {}
+        for tool in tools:
+            options = overrides.get(tool.name, {})
+            self._tools[tool.name] = RegisteredTool(
+                tool,
+                max_concurrency=options.get("max_concurrency", max_concurrency),
+                timeout=options.get("timeout", timeout),
+            )
+
+    def get(self, name: str) -> Optional[RegisteredTool]:
+        return self._tools.get(name)
+
+    async def run_call(self, tool_call: dict, config: RunnableConfig) -> ToolMessage:
+        tool_name = tool_call.get("name")
+        raw_args = tool_call.get("args")
+        tool_id = tool_call.get("id")
+
+        # ---------------------------
+        # Validate & parse JSON args
+        # ---------------------------
+        try:
+            tool_args = json.loads(raw_args) if isinstance(raw_args, str) else raw_args
+        except ValueError:
+            return ToolMessage(
+                content="Error: Invalid JSON passed to tool. Please return ONLY valid JSON.",
+                tool_call_id=tool_id
+            )
+
+        entry = self._tools.get(tool_name)
+        if entry is None:
+            return ToolMessage(content=f"Error: Tool '{tool_name}' not found.", tool_call_id=tool_id)
+
+        # ---------------------------
+        # Execute tool
+        # ---------------------------
+        async with entry.semaphore:
+            start = time.perf_counter()
+            try:
+                with span(f"tool.{tool_name}", tool_call_id=tool_id):
+                    # Forward the run config so tools can reach the injected DB session;
+                    # tool_call_id lets write tools derive an idempotency key
+                    call_config = {**config, "configurable": {**config.get("configurable", {}), "tool_call_id": tool_id}}
+                    result = await asyncio.wait_for(entry.tool.ainvoke(tool_args, config=call_config), entry.timeout)
+                content = str(result)
+            except asyncio.TimeoutError:
+                TOOL_ERRORS.labels(tool_name, "timeout").inc()
+                content = f"Execution Error: tool '{tool_name}' timed out after {entry.timeout:g}s"
+            except Exception as e:
+                TOOL_ERRORS.labels(tool_name, "error").inc()
+                content = f"Error running tool: {str(e)}"
+            finally:
+                TOOL_SECONDS.labels(tool_name).observe(time.perf_counter() - start)
+
+        return ToolMessage(content=content, tool_call_id=tool_id)
+
+    async def run_calls(self, tool_calls: List[dict], config: RunnableConfig) -> List[ToolMessage]:
+        if len(tool_calls) == 1:
+            return [await self.run_call(tool_calls[0], config)]
+        # gather keeps results in argument order, i.e. the original tool_call_id order
+        return list(await asyncio.gather(*(self.run_call(call, config) for call in tool_calls)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tool error, timeout and latency figures of this process, derived from
+        TOOL_ERRORS and TOOL_SECONDS so they always agree with /metrics."""
+        stats = {
+            name: {"timeout": entry.timeout, "errors": 0, "timeouts": 0, "latency": {"count": 0, "sum": 0.0, "buckets": {}}}
+            for name, entry in self._tools.items()
+        }
+        for sample in _tool_samples(TOOL_ERRORS, "_total"):
+            if sample.labels["tool"] in stats:
+                kind = "timeouts" if sample.labels["kind"] == "timeout" else "errors"
+                stats[sample.labels["tool"]][kind] = int(sample.value)
+        for suffix in ("_bucket", "_count", "_sum"):
+            for sample in _tool_samples(TOOL_SECONDS, suffix):
+                if sample.labels["tool"] not in stats:
+                    continue
+                latency = stats[sample.labels["tool"]]["latency"]
+                if suffix == "_bucket":
+                    latency["buckets"][sample.labels["le"]] = int(sample.value)  # cumulative, as in /metrics
+                elif suffix == "_count":
+                    latency["count"] = int(sample.value)
+                else:
+                    latency["sum"] = round(sample.value, 6)
+
+        for tool in stats.values():
+            latency = tool["latency"]
+            latency["p50"] = bucket_quantile(latency["buckets"], latency["count"], 0.5)
+            latency["p95"] = bucket_quantile(latency["buckets"], latency["count"], 0.95)
+        return stats
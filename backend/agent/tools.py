@@ -1,91 +1,179 @@
+import asyncio
 import json
-import requests
+from contextlib import asynccontextmanager
 from datetime import date
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from pydantic import ValidationError
 from langchain_core.tools import tool
-from models.schemas import LogInteractionSchema
-from config import settings
-from langchain_groq import ChatGroq
+from langchain_core.runnables import RunnableConfig
+from models.schemas import (
+    LogInteractionSchema, HCPInteractionCreate, SearchQuerySchema, ComplianceCheckSchema,
+    ScheduleTaskSchema, FollowUpTaskCreate,
+)
+from services.interactions import create_interaction
+from services.extraction import extract_interaction
+from services.hcp_directory import hcp_directory, link_hcps, UnknownHCPError
+from services.search import search_interactions, summarize_hits
+from services.compliance import check_compliance
+from services.tasks import create_follow_up_task
+from services.task_scheduler import task_scheduler
+from database.setup import async_session_factory
+from observability.log import get_logger
 
-# --- LLM Configuration ---
-MODEL_NAME = "llama-3.1-8b-instant"
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def tool_session(config: RunnableConfig):
+    """Reuses the request's session injected by stream_output; opens one if run standalone."""
+    session = config.get("configurable", {}).get("session")
+    if session is not None:
+        # Tool calls run concurrently but an AsyncSession must not be used by two
+        # tasks at once, so DB work on the shared session is serialized
+        lock = session.info.setdefault("tool_lock", asyncio.Lock())
+        async with lock:
+            yield session
+    else:
+        async with async_session_factory() as own_session:
+            yield own_session
 
-llm_extractor = ChatGroq(
-    api_key=settings.GROQ_API_KEY,
-    model=MODEL_NAME
-)
 
 # --- Tool 1: Data Extraction ---
 from langchain.tools import tool
 from datetime import date
 
 @tool
-def extract_interaction_from_text(text: str):
+async def extract_interaction_from_text(text: str):
     """
     Extracts only the ACTUAL interaction values. 
     NEVER return schema, properties, enum, title, or type.
     """
-    # simple extraction (you can improve this)
-    hcp = "Dr. Smith" if "Dr. Smith" in text else ""
-    topics = ["product X efficiency"] if "product" in text.lower() else []
-    materials = ["brochures"] if "brochures" in text.lower() else []
-    sentiment = "Positive" if "positive" in text.lower() else "Neutral"
-    # return {
-    #         "hcp_name": hcp,
-    #         "interaction_type": "Meeting",
-    #         "interaction_date": date.today().isoformat(),
-    #         "attendees": [hcp] if hcp else [],
-    #         "topics_discussed": topics,
-    #         "materials_shared": materials,
-    #         "samples_distributed": [],
-    #         "sentiment": sentiment,
-    #         "outcomes": text
-    #         }
-    data = {
-        "hcp_name": hcp,
-        "interaction_type": "Meeting",
-        "interaction_date": date.today().isoformat(),
-        "attendees": [hcp] if hcp else [],
-        "topics_discussed": topics,
-        "materials_shared": materials,
-        "samples_distributed": [],
-        "sentiment": sentiment,
-        "outcomes": text
-    }
-    print(f"data --------------------------: {data}")
+    # Gazetteer automaton + date/type/sentiment parsers (services/extraction.py)
+    data = extract_interaction(text).model_dump(mode="json")
+    # Known HCP under another spelling ("Smith, J."): use the master name and id
+    match = await hcp_directory.lookup(data["hcp_name"])
+    if match is not None:
+        data["hcp_name"], data["hcp_id"] = match.name, str(match.hcp_id)
+    logger.debug("extracted interaction: %s", data)
     return data
 
 
 # --- Tool 2: Data Logging (Crucial for breaking recursion) ---
 @tool
-def log_interaction(interaction_data: Dict[str, Any]) -> str:
+async def log_interaction(interaction_data: Dict[str, Any], config: RunnableConfig) -> str:
     """
-    Logs the final structured interaction data to the CRM API endpoint.
+    Logs the final structured interaction data to the CRM database.
     This tool serves as the definitive end-action for the agent.
     """
-    url = "http://localhost:8000/api/v1/interactions/log_form"
-    print(f"Attempting to log data to API: {url}")
-    
-    # Ensure the date object is converted to a string for JSON serialization
-    if 'interaction_date' in interaction_data and isinstance(interaction_data['interaction_date'], date):
-        interaction_data['interaction_date'] = interaction_data['interaction_date'].isoformat()
-        
+    logger.debug("Attempting to log interaction data in-process")
+
+    # Same validation the /log_form endpoint applies to its request body
     try:
-        response = requests.post(url, json=interaction_data, timeout=15)
-        response.raise_for_status()
-        
-        # Return a concise success message that guides the LLM to the final user confirmation
-        return f"SUCCESS: Interaction logged. API Response ID: {response.json().get('id', 'N/A')}. Generate a final user confirmation message."
-        
-    except requests.exceptions.HTTPError as e:
+        payload = HCPInteractionCreate.model_validate(interaction_data)
+    except ValidationError as e:
         # CRITICAL: Returning a clear error string here is what the agent's router checks for
-        return f"API ERROR: Failed to log interaction (HTTP {response.status_code}): {response.text}"
+        return f"API ERROR: Failed to log interaction (invalid data): {e}"
+
+    # Re-running the same tool call (graph retry, resumed thread) must not log twice
+    configurable = config.get("configurable", {})
+    thread_id, tool_call_id = configurable.get("thread_id"), configurable.get("tool_call_id")
+    idempotency_key = f"agent:{thread_id}:{tool_call_id}" if thread_id and tool_call_id else None
+
+    try:
+        [payload] = await link_hcps([payload])
+    except UnknownHCPError as e:
+        return f"API ERROR: Failed to log interaction (invalid data): {e}"
     except Exception as e:
-        return f"CONNECTION ERROR: Failed to log interaction due to network failure: {str(e)}"
+        return f"API ERROR: Failed to log interaction (database error): {str(e)}"
+
+    async with tool_session(config) as session:
+        try:
+            db_record, created = await create_interaction(session, payload, idempotency_key)
+        except Exception as e:
+            await session.rollback()
+            return f"API ERROR: Failed to log interaction (database error): {str(e)}"
+
+    if not created:
+        return f"SUCCESS: This interaction was already logged. API Response ID: {db_record.interaction_id}. Do not log it again; generate a final user confirmation message."
+
+    # Return a concise success message that guides the LLM to the final user confirmation
+    return f"SUCCESS: Interaction logged. API Response ID: {db_record.interaction_id}. Generate a final user confirmation message."
+
+
+# --- Tool 3: Interaction History Search ---
+@tool(args_schema=SearchQuerySchema)
+async def search_interactions_history(query: str, config: RunnableConfig) -> str:
+    """
+    Searches past logged interactions (outcomes and transcripts) by keywords,
+    e.g. an HCP name, product or topic. Returns the best matches with snippets.
+    """
+    async with tool_session(config) as session:
+        try:
+            hits = await search_interactions(session, query, limit=5)
+        except Exception as e:
+            return f"Execution Error: search failed: {str(e)}"
+    return summarize_hits(query, hits).model_dump_json()
+
+
+# --- Tool 4: Compliance Screening ---
+@tool(args_schema=ComplianceCheckSchema)
+async def check_interaction_compliance(
+    raw_text_segment: str,
+    material_references: Optional[List[str]] = None,
+    hcp_consent_verified: bool = False,
+) -> str:
+    """
+    Screens interaction notes for compliance risks (off-label claims, unapproved
+    materials, missing HCP consent) and returns a ComplianceReport with
+    status, details and risk_score. Run it before logging an interaction.
+    """
+    report = check_compliance(ComplianceCheckSchema(
+        raw_text_segment=raw_text_segment,
+        material_references=material_references or [],
+        hcp_consent_verified=hcp_consent_verified,
+    ))
+    return report.model_dump_json()
+
+
+# --- Tool 5: Follow-up Scheduling ---
+@tool(args_schema=ScheduleTaskSchema)
+async def schedule_follow_up_task(
+    task_description: str,
+    due_date: date,
+    assigned_user_id: str,
+    config: RunnableConfig,
+    priority: str = "Medium",
+) -> str:
+    """
+    Schedules a follow-up task (e.g. send a study reprint, book the next visit)
+    for a user by a due date. A reminder is sent to the assignee on the due date.
+    """
+    try:
+        payload = FollowUpTaskCreate(
+            task_description=task_description,
+            due_date=due_date,
+            priority=priority,
+            assigned_user_id=assigned_user_id,
+        )
+    except ValidationError as e:
+        return f"API ERROR: Failed to schedule task (invalid data): {e}"
+
+    async with tool_session(config) as session:
+        try:
+            task = await create_follow_up_task(session, payload)
+        except Exception as e:
+            await session.rollback()
+            return f"API ERROR: Failed to schedule task (database error): {str(e)}"
+
+    task_scheduler.notify(task)
+    return f"SUCCESS: Task scheduled for {task.due_date} (task ID: {task.task_id}). Confirm the follow-up to the user."
 
 
 # --- List of all available tools ---
 ALL_TOOLS = [
     extract_interaction_from_text,
     log_interaction,
+    search_interactions_history,
+    check_interaction_compliance,
+    schedule_follow_up_task,
 ]
\ No newline at end of file
@@ -1,102 +1,286 @@
-import json
-from fastapi import APIRouter, Depends
+import asyncio
+import importlib
+import signal
+import sys
+import threading
+import time
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import AsyncGenerator, Sequence, Annotated
-from langgraph.checkpoint.sqlite import SqliteSaver 
-from agent.graph import LANGGRAPH_APP
+from typing import AsyncGenerator, AsyncIterator, Optional, Sequence, Annotated
 from database.setup import get_db_session 
 from sqlmodel.ext.asyncio.session import AsyncSession
 from config import settings
-from langchain_core.messages import HumanMessage, ToolMessage, BaseMessage
+from agent.llm_gateway import llm_gateway, LLMOverloadedError
+from observability.log import current_thread_id, get_logger
+from observability.metrics import SSE_TTFB_SECONDS
+from observability.tracing import span
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# -------------------------------------------------------
+# Lazy agent
+# -------------------------------------------------------
+# LangGraph, LangChain and the Groq SDK are not imported with this module. The
+# agent (graph, checkpointer, LLM clients) is built by the first chat request,
+# or by preload_agent() in the background once the app is serving, so
+# form-only replicas never pay for it.
+
+_agent_app = None
+_agent_lock = asyncio.Lock()
+
+
+async def get_agent_app():
+    global _agent_app
+    if _agent_app is None:
+        async with _agent_lock:
+            if _agent_app is None:
+                # Import in a worker thread so the event loop keeps serving meanwhile
+                graph_module = await asyncio.to_thread(importlib.import_module, "agent.graph")
+                from agent.checkpointer import open_checkpointer
+
+                checkpointer = await open_checkpointer()
+                graph_module.get_llm_with_tools()
+                _agent_app = graph_module.graph.compile(checkpointer=checkpointer)
+    return _agent_app
+
+
+async def preload_agent():
+    try:
+        start = time.perf_counter()
+        await get_agent_app()
+        logger.info("Agent preloaded in %.2fs", time.perf_counter() - start)
+    except Exception as e:
+        # The first chat request retries the build
+        logger.warning("Agent preload failed: %s", e)
+
+
+async def shutdown_agent():
+    if "agent.checkpointer" in sys.modules:
+        from agent.checkpointer import close_checkpointer
+
+        await close_checkpointer()
+    await llm_gateway.close()
 
-# Use SqliteSaver for prototyping (requires external package)
-memory = SqliteSaver.from_conn_string(settings.LANGGRAPH_CHECKPOINTER_URL) 
 
 class ChatInput(BaseModel):
     thread_id: str 
     message: str
 
-# 
-async def stream_output(thread_id: str, message: str, session: AsyncSession) -> AsyncGenerator[str, None]:
-    """Runs the LangGraph agent and streams results back as SSE."""
-    
+# -------------------------------------------------------
+# SSE streaming
+# -------------------------------------------------------
+# Event types sent to the client:
+#   TEXT_DELTA         - LLM tokens of llm_node as they arrive
+#   TEXT               - the completed AI message (used by the UI to detect form JSON)
+#   TOOL_CALL_REQUEST  - tool calls requested by the LLM
+#   TOOL_CALL          - a tool result
+#   ERROR / DONE       - terminal events
+# An SSE comment (": ping") is sent when nothing else was sent for
+# SSE_HEARTBEAT_SECONDS, so idle-timeout proxies keep the connection open.
+
+HEARTBEAT = b": ping\n\n"
+
+# -------------------------------------------------------
+# Draining
+# -------------------------------------------------------
+# Draining starts when the worker receives SIGTERM/SIGINT, i.e. as uvicorn stops
+# accepting connections and begins waiting for open ones (its lifespan shutdown
+# only runs after they closed). Open streams keep running for up to
+# SHUTDOWN_DRAIN_SECONDS; a stream still running then ends with a retryable
+# ERROR event (the thread's checkpoint keeps every completed step) instead of
+# being cut off when uvicorn cancels it. New chats are refused with 503, so the
+# client retries on another worker.
+
+_open_streams: set = set()  # event queues of in-flight streams
+_drain_deadline: Optional[float] = None
+_DRAIN = object()  # wakes a waiting stream so it picks up the deadline
+
+
+def begin_drain(seconds: float = settings.SHUTDOWN_DRAIN_SECONDS) -> int:
+    """Starts draining (a repeated call keeps the first deadline); returns the number of open streams."""
+    global _drain_deadline
+    if _drain_deadline is None:
+        _drain_deadline = time.monotonic() + seconds
+        if _open_streams:
+            logger.info("Draining %d open chat stream(s) for up to %.0fs", len(_open_streams), seconds)
+        for queue in _open_streams:
+            queue.put_nowait(_DRAIN)
+    return len(_open_streams)
+
+
+def drain_on_exit_signal():
+    """
+    Chains begin_drain() in front of the server's SIGINT/SIGTERM handlers. Call
+    from the lifespan startup, once uvicorn has installed its handlers; they are
+    restored (without this hook) when the server stops.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return  # signals only reach the main thread (e.g. not under TestClient)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(begin_drain)
+            if callable(previous):
+                previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+def _drain_expired() -> bool:
+    return _drain_deadline is not None and time.monotonic() >= _drain_deadline
+
+
+def sse_event(payload: dict) -> bytes:
+    # orjson encodes straight to bytes; default=str covers UUIDs/dates in tool args
+    return b"data: " + orjson.dumps(payload, default=str) + b"\n\n"
+
+
+async def agent_events(thread_id: str, message: str, session: AsyncSession) -> AsyncIterator[dict]:
+    """Runs the LangGraph agent and yields typed event payloads."""
+
     config = {
         "configurable": {
             "thread_id": thread_id,
             "session": session # Inject the database session for tools
         }
     }
-    
+
+    app = await get_agent_app()
+    from langchain_core.messages import AIMessageChunk, HumanMessage, ToolMessage
+    from agent.checkpointer import mark_thread_for_compaction
+
     # Convert the input string into the required LangChain HumanMessage object
     input_message = HumanMessage(content=message)
-    
+
+    # Correlates logs and spans of this run (contextvars propagate into the graph's tasks)
+    current_thread_id.set(thread_id)
+
+    # "messages" yields LLM token chunks, "updates" yields each node's state update
+    async for mode, data in app.astream(
+        {"messages": [input_message]}, config=config, stream_mode=["messages", "updates"]
+    ):
+        if mode == "messages":
+            chunk, metadata = data
+            # Only the user-facing model; the context node's summary calls are not streamed
+            if metadata.get("langgraph_node") == "llm_node" and isinstance(chunk, AIMessageChunk) and chunk.content:
+                yield {"type": "TEXT_DELTA", "content": chunk.content}
+            continue
+
+        for node, update in data.items():
+            if node == "llm_node":
+                for msg in update["messages"]:
+                    if msg.content:
+                        yield {"type": "TEXT", "content": msg.content}
+                    if getattr(msg, "tool_calls", None):
+                        yield {"type": "TOOL_CALL_REQUEST", "tool_calls": msg.tool_calls}
+            elif node == "tools":
+                # The content will contain the JSON data or an error string (e.g., "Execution Error")
+                for msg in update["messages"]:
+                    if isinstance(msg, ToolMessage) and msg.content:
+                        yield {"type": "TOOL_CALL", "tool_result": msg.content, "tool_call_id": msg.tool_call_id}
+
+    mark_thread_for_compaction(thread_id)
+
+
+async def stream_output(thread_id: str, message: str, session: AsyncSession, request: Request) -> AsyncGenerator[bytes, None]:
+    """
+    Streams agent events as SSE. The graph runs in a producer task so heartbeats
+    can be interleaved while a node is busy; the task is cancelled as soon as the
+    client disconnects or the response is closed.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    started = time.perf_counter()
+
+    async def produce():
+        try:
+            with span("agent.run"):
+                async for event in agent_events(thread_id, message, session):
+                    queue.put_nowait(event)
+            queue.put_nowait({"type": "DONE"})
+        except LLMOverloadedError as e:
+            # Shed by the LLM gateway; the client may retry after `retry_after` seconds
+            queue.put_nowait({"type": "ERROR", "content": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            # CRITICAL FIX: This catches external errors like Rate Limit
+            queue.put_nowait({"type": "ERROR", "content": f"Agent error: {str(e)}"})
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    _open_streams.add(queue)
     try:
-        # Pass the correctly formed message object to astream
-        async for chunk in LANGGRAPH_APP.astream({"messages": [input_message]}, config=config, checkpointer=memory):
-            
-            print(f"Received chunk type: {type(chunk)}, value: {chunk}")
-            
-            if not isinstance(chunk, dict):
+        while True:
+            if _drain_expired():
+                yield sse_event({"type": "ERROR", "content": "Server is restarting, please retry.", "retry_after": 1})
+                break
+            timeout = settings.SSE_HEARTBEAT_SECONDS
+            if _drain_deadline is not None:
+                timeout = min(timeout, _drain_deadline - time.monotonic())
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if _drain_expired():
+                    continue
+                if await request.is_disconnected():
+                    break
+                yield HEARTBEAT
                 continue
+            if event is _DRAIN:
+                continue
+            if event is None:
+                break
+            if started is not None:
+                SSE_TTFB_SECONDS.observe(time.perf_counter() - started)
+                started = None
+            yield sse_event(event)
+    finally:
+        producer.cancel()
+        _open_streams.discard(queue)
 
-            # Standard LangGraph chunks contain updates keyed by node name or an internal structure.
-            # We look for a change in the 'messages' sequence, which is how LangGraph usually signals output.
-            
-            # Find the value that contains the updated message list (usually nested under a node name)
-            updated_messages = []
-            
-            # Check for messages in the top-level chunk keys (llm_node or tools)
-            for node_key in ['llm_node', 'tools']:
-                if node_key in chunk and 'messages' in chunk[node_key]:
-                    # LangGraph returns all messages in the node's state, but we only care about the NEW ones.
-                    # Simple approach: assume the last message in the list is the one to yield.
-                    # A robust approach would compare states, but for streaming, yielding the last is common.
-                    if chunk[node_key]['messages']:
-                        updated_messages.extend(chunk[node_key]['messages'])
-
-            # Process the updated messages (the newest outputs from the agent/tool)
-            for msg in updated_messages:
-                
-                # 1. Handle regular text content (AIMessage content)
-                content = getattr(msg, "content", None)
-                if content:
-                    yield f"data: {json.dumps({'type': 'TEXT', 'content': content})}\n\n"
-
-                # 2. Handle tool calls requested by the LLM (for execution signal)
-                if getattr(msg, "tool_calls", None):
-                    yield f"data: {json.dumps({
-                        "type": "TOOL_CALL_REQUEST", 
-                        "tool_calls": [tc for tc in msg.tool_calls]
-                    })}\n\n"
-                
-                # 3. Handle tool results (ToolMessage content)
-                # The content will contain the JSON data or an error string (e.g., "Execution Error")
-                if isinstance(msg, ToolMessage) and msg.content:
-                    yield f"data: {json.dumps({
-                        "type": "TOOL_CALL", # Type for tool result
-                        "tool_result": msg.content,
-                        "tool_call_id": msg.tool_call_id
-                    })}\n\n"
-
-        # Signal end of stream after successful termination
-        yield "data: [DONE]\n\n"
-            
-    except Exception as e:
-        # CRITICAL FIX: This catches external errors like Rate Limit
-        error_msg = {"type": "ERROR", "content": f"Agent error: {str(e)}"}
-        yield f"data: {json.dumps(error_msg)}\n\n"
-        
 @router.post("/chat/stream")
 async def chat_stream(
     input: ChatInput, 
+    request: Request,
     session: AsyncSession = Depends(get_db_session)
 ):
     """API endpoint for the conversational interface with streaming response."""
-    
+    if _drain_deadline is not None:
+        raise HTTPException(status_code=503, detail="Server is shutting down", headers={"Retry-After": "1"})
+
     return StreamingResponse(
-        stream_output(input.thread_id, input.message, session),
-        media_type="text/event-stream"
-    )
\ No newline at end of file
+        stream_output(input.thread_id, input.message, session, request),
+        media_type="text/event-stream",
+        # Disable proxy buffering (nginx) so tokens reach the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/llm_cache/stats")
+async def llm_cache_stats():
+    """Hit/miss counters of the shared LLM response cache."""
+    if "agent.llm_cache" not in sys.modules:
+        return {"enabled": False, "loaded": False}
+    from agent.llm_cache import get_cache_stats
+
+    return get_cache_stats()
+
+
+@router.get("/llm_gateway/stats")
+async def llm_gateway_stats():
+    """Admission queue depth, in-flight calls, shed/retry/coalesce counters of the LLM gateway."""
+    return llm_gateway.stats()
+
+
+@router.get("/tools/stats")
+async def tool_stats():
+    """Per-tool call latency histograms, error and timeout counts."""
+    if "agent.graph" not in sys.modules:
+        return {}
+    from agent.graph import TOOL_REGISTRY
+
+    return TOOL_REGISTRY.stats()
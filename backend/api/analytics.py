@@ -0,0 +1,41 @@
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.schemas import RollupDashboard, RollupSummary
+from database.setup import get_db_session
+from services.rollups import get_dashboard, list_summaries
+
+router = APIRouter()
+
+
+@router.get("/{dimension}", response_model=List[RollupSummary])
+async def list_summaries_endpoint(
+    dimension: Literal["hcp", "rep"],
+    inactive_days: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """
+    HCPs (or reps) ordered by last contact, longest without contact first.
+    `inactive_days` keeps only those not contacted for at least that many days.
+    """
+    return await list_summaries(session, dimension, inactive_days=inactive_days, limit=limit)
+
+
+@router.get("/{dimension}/{key}", response_model=RollupDashboard)
+async def dashboard_endpoint(
+    dimension: Literal["hcp", "rep"],
+    key: str,
+    days: int = Query(90, ge=1, le=730),
+    top: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Dashboard for one HCP (key = hcp_name) or rep (key = attendee name): all-time
+    counters and days since last contact, the daily trend over the last `days`
+    days and the `top` materials and samples. Served from the rollup tables.
+    """
+    dashboard = await get_dashboard(session, dimension, key, days, top)
+    if dashboard is None:
+        raise HTTPException(status_code=404, detail=f"No interactions for {dimension} '{key}'")
+    return dashboard
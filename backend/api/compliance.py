@@ -0,0 +1,45 @@
+from typing import List
+from fastapi import APIRouter, Body, Depends, Query, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.schemas import ComplianceCheckSchema, ComplianceReport, ComplianceRescreenResponse
+from database.setup import get_db_session
+from services.compliance import compliance_checker, check_compliance, check_compliance_batch, rescreen_interactions
+from config import settings
+
+router = APIRouter()
+
+# Bound request size so one batch cannot hold the worker for long
+MAX_BATCH_SIZE = 5000
+
+
+@router.post("/check", response_model=ComplianceReport)
+async def check_endpoint(item: ComplianceCheckSchema):
+    """Screens one text segment against the current compliance rule set."""
+    return check_compliance(item)
+
+
+@router.post("/check/batch", response_model=List[ComplianceReport])
+async def check_batch_endpoint(items: List[ComplianceCheckSchema] = Body(...)):
+    """Screens many segments in one engine pass; reports are returned in input order."""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} items per batch.")
+    return check_compliance_batch(items)
+
+
+@router.post("/rescreen", response_model=ComplianceRescreenResponse)
+async def rescreen_endpoint(
+    batch_size: int = Query(settings.COMPLIANCE_RESCREEN_BATCH_SIZE, ge=1, le=MAX_BATCH_SIZE),
+    max_flagged: int = Query(1000, ge=0, le=10000),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Re-screens all stored interactions with the current rule set and returns
+    counts per status, the first `max_flagged` non-passing records and throughput.
+    """
+    return await rescreen_interactions(session, batch_size=batch_size, max_flagged=max_flagged)
+
+
+@router.get("/stats")
+async def compliance_stats():
+    """Rule-set version, records screened, cache hits and records/sec."""
+    return compliance_checker.stats()
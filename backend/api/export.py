@@ -0,0 +1,66 @@
+from datetime import date, datetime
+from typing import AsyncIterator, Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from database.setup import async_session_factory
+from services.interactions import decode_cursor, get_interaction
+from services.export import ExportWriter, iter_export_batches
+from config import settings
+
+router = APIRouter()
+
+
+@router.get("/interactions")
+async def export_interactions(
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+    compression: Literal["none", "gzip", "zstd"] = "none",
+    hcp_name: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = Query(None, description="Resume token, e.g. the cursor in a CLI export manifest"),
+    after_id: Optional[UUID] = Query(None, description="Resume after this interaction (last row received)"),
+    batch_size: int = Query(settings.EXPORT_BATCH_SIZE, ge=100, le=50000),
+):
+    """
+    Streams every matching interaction, including list columns and raw transcripts,
+    in (interaction_date, interaction_id) order. Rows come from a server-side cursor
+    and are encoded batch by batch, so memory use does not grow with the export.
+
+    To resume after a disconnect, repeat the request with the same filters plus
+    `after_id` = the last interaction_id received (or `cursor`, if known).
+    """
+    after = None
+    async with async_session_factory() as session:
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        elif after_id is not None:
+            record = await get_interaction(session, after_id)
+            if record is None:
+                raise HTTPException(status_code=404, detail="Interaction not found")
+            after = (record.interaction_date, record.interaction_id)
+
+    try:
+        writer = ExportWriter(format, compression)
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=f"{format}/{compression} export is not available: {e}")
+
+    async def stream() -> AsyncIterator[bytes]:
+        # A session of its own: the stream outlives the request handler
+        async with async_session_factory() as session:
+            yield writer.header()
+            async for batch in iter_export_batches(
+                session, hcp_name=hcp_name, date_from=date_from, date_to=date_to, after=after, batch_size=batch_size
+            ):
+                yield writer.write(batch)
+            yield writer.finish()
+
+    filename = f"interactions-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{writer.extension}"
+    return StreamingResponse(
+        stream(),
+        media_type=writer.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"},
+    )
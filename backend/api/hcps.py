@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Query
+from models.schemas import HCPCandidate, HCPResolveResponse
+from services.hcp_directory import hcp_directory
+from services.hcp_matching import normalize_hcp_name
+
+router = APIRouter()
+
+
+@router.get("/resolve", response_model=HCPResolveResponse)
+async def resolve_hcp_endpoint(
+    name: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(5, ge=1, le=50),
+):
+    """
+    Ranked HCP master candidates for a free-text name ("Smith, J.", "Dr John Smith").
+    A form can offer these and submit the chosen hcp_id with /interactions/log_form.
+    """
+    candidates = await hcp_directory.search(name, limit)
+    return HCPResolveResponse(
+        query=name,
+        normalized=normalize_hcp_name(name),
+        candidates=[HCPCandidate(hcp_id=c.hcp_id, name=c.name, score=c.score) for c in candidates],
+    )
+
+
+@router.get("/directory/stats")
+async def hcp_directory_stats():
+    return hcp_directory.stats()
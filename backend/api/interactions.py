@@ -1,32 +1,255 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+import json
+from datetime import date
+from typing import Any, AsyncIterator, List, Literal, Optional, Tuple
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status, HTTPException
+from pydantic import ValidationError
 from sqlmodel.ext.asyncio.session import AsyncSession
 # FIX: Confirmed imports are correct for the structured logging endpoint
-from models.schemas import HCPInteractionCreate, HCPInteractionRead
-from models.database import HCPInteraction
+from models.schemas import (
+    HCPInteractionCreate, HCPInteractionRead, InteractionPage, SearchResponse, BulkIngestResponse, BulkRowResult
+)
 from database.setup import get_db_session
+from services.interactions import (
+    create_interaction, bulk_create_interactions, list_interactions, get_interaction, IdempotencyKeyConflict
+)
+from services.search import search_interactions
+from services.transcripts import transcript_text
+from services.hcp_directory import hcp_directory, link_hcps, UnknownHCPError
+from config import settings
 
 router = APIRouter()
 
+
+def _read(record, include_transcript: bool) -> HCPInteractionRead:
+    read = HCPInteractionRead.model_validate(record, from_attributes=True)
+    if include_transcript:
+        read.raw_transcript = transcript_text(record.transcript)
+    return read
+
 # Endpoint for structured form submission 
 @router.post("/log_form", response_model=HCPInteractionRead, status_code=status.HTTP_201_CREATED)
 async def log_form_interaction(
     interaction_data: HCPInteractionCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     session: AsyncSession = Depends(get_db_session)
 ):
     """
     Handles logging of an HCP interaction submitted via the structured form interface.
     Performs asynchronous database insertion.
+    hcp_name is resolved to the HCP master (or an HCP is created) unless hcp_id is given.
+    A retry with the same Idempotency-Key, or a resubmission of the same interaction,
+    returns the stored record with 200 and `Idempotent-Replayed: true`.
     """
     try:
-        # Convert Pydantic model to ORM model
-        db_record = HCPInteraction.model_validate(interaction_data)
-        
-        session.add(db_record)
-        await session.commit()
-        await session.refresh(db_record)
-        
-        return db_record
-        
+        [interaction_data] = await link_hcps([interaction_data])
+        record, created = await create_interaction(session, interaction_data, idempotency_key)
+    except (IdempotencyKeyConflict, UnknownHCPError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         # This will trigger the rollback in the get_db_session dependency
-        raise HTTPException(status_code=500, detail=f"Database error during form log: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Database error during form log: {e}")
+
+    if not created:
+        response.status_code = status.HTTP_200_OK
+        response.headers["Idempotent-Replayed"] = "true"
+    return record
+
+
+# ------------------ QUERY ------------------
+
+@router.get("", response_model=InteractionPage)
+async def list_interactions_endpoint(
+    hcp_name: Optional[str] = None,
+    hcp_id: Optional[UUID] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    interaction_type: Optional[Literal["Meeting", "Call", "Email"]] = None,
+    sentiment: Optional[Literal["Positive", "Neutral", "Negative"]] = None,
+    attendee: Optional[str] = None,
+    topic: Optional[str] = None,
+    material: Optional[str] = None,
+    sample: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_transcript: bool = False,
+    session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Lists interactions newest first. Pass `next_cursor` from the previous
+    response as `cursor` to fetch the following page (keyset pagination).
+    `attendee`, `topic`, `material` and `sample` keep interactions whose list
+    contains that exact value, e.g. ?material=Brochure&date_from=2024-07-01.
+    `raw_transcript` is only returned with include_transcript=true.
+    """
+    try:
+        items, next_cursor = await list_interactions(
+            session,
+            hcp_name=hcp_name,
+            hcp_id=hcp_id,
+            date_from=date_from,
+            date_to=date_to,
+            interaction_type=interaction_type,
+            sentiment=sentiment,
+            attendee=attendee,
+            topic=topic,
+            material=material,
+            sample=sample,
+            limit=limit,
+            cursor=cursor,
+            include_transcript=include_transcript,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return InteractionPage(
+        items=[_read(item, include_transcript) for item in items],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_interactions_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Ranked full-text search over outcomes and raw transcripts."""
+    items = await search_interactions(session, q, limit=limit, offset=offset)
+    return SearchResponse(query=q, limit=limit, offset=offset, items=items)
+
+
+@router.get("/{interaction_id}", response_model=HCPInteractionRead)
+async def read_interaction(
+    interaction_id: UUID,
+    include_transcript: bool = False,
+    session: AsyncSession = Depends(get_db_session)
+):
+    """`raw_transcript` is only returned with include_transcript=true."""
+    record = await get_interaction(session, interaction_id, include_transcript)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Interaction not found")
+    return _read(record, include_transcript)
+
+
+# ------------------ BULK INGEST ------------------
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def _iter_ndjson(request: Request) -> AsyncIterator[Any]:
+    """Yields one parsed object per line as the body streams in; bad lines yield the exception."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+async def _iter_json_array(request: Request) -> AsyncIterator[Any]:
+    try:
+        rows = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of interactions")
+    for row in rows:
+        yield row
+
+
+async def _flush_chunk(
+    session: AsyncSession,
+    chunk: List[Tuple[int, HCPInteractionCreate]],
+    results: List[BulkRowResult],
+    idempotency_key: Optional[str] = None,
+):
+    """Writes one validated chunk in its own transaction and records a status per row."""
+    hcp_ids = {row.hcp_id for _, row in chunk if row.hcp_id is not None}
+    unknown = hcp_ids - (await hcp_directory.get_many(hcp_ids)).keys() if hcp_ids else set()
+    if unknown:
+        results.extend(
+            BulkRowResult(index=i, status="error", errors=[f"hcp_id: Unknown hcp_id {row.hcp_id}"])
+            for i, row in chunk if row.hcp_id in unknown
+        )
+        chunk = [(i, row) for i, row in chunk if row.hcp_id not in unknown]
+    if not chunk:
+        return
+
+    # Row keys are "<request key>:<row index>", so a retried request maps row for row
+    keys = [f"{idempotency_key}:{i}" for i, _ in chunk] if idempotency_key else None
+    try:
+        written = await bulk_create_interactions(session, await link_hcps([row for _, row in chunk]), keys)
+    except Exception as e:
+        await session.rollback()
+        results.extend(BulkRowResult(index=i, status="error", errors=[f"Database error: {e}"]) for i, _ in chunk)
+        return
+    for (i, _), row_result in zip(chunk, written):
+        if isinstance(row_result, IdempotencyKeyConflict):
+            results.append(BulkRowResult(index=i, status="error", errors=[str(row_result)]))
+        else:
+            id_, created = row_result
+            results.append(BulkRowResult(index=i, status="created" if created else "duplicate", interaction_id=id_))
+
+
+@router.post("/bulk", response_model=BulkIngestResponse)
+async def bulk_ingest_interactions(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=200),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Bulk ingest for device syncs and CRM backfills. Accepts a JSON array
+    (application/json) or an NDJSON stream (application/x-ndjson). Rows are
+    validated and inserted in chunks of BULK_INGEST_CHUNK_SIZE, each chunk in its
+    own transaction, and every row gets its own status in the response.
+    Rows already stored (same content, or same Idempotency-Key and row index on a
+    retried request) are reported as "duplicate" with the existing interaction_id;
+    a row whose key and index were stored with different content is an "error".
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    rows = _iter_ndjson(request) if content_type in NDJSON_CONTENT_TYPES else _iter_json_array(request)
+
+    results: List[BulkRowResult] = []
+    chunk: List[Tuple[int, HCPInteractionCreate]] = []
+    received = 0
+
+    async for raw in rows:
+        index = received
+        received += 1
+        if isinstance(raw, Exception):
+            results.append(BulkRowResult(index=index, status="error", errors=[f"Invalid JSON: {raw}"]))
+            continue
+        try:
+            chunk.append((index, HCPInteractionCreate.model_validate(raw)))
+        except ValidationError as e:
+            results.append(BulkRowResult(
+                index=index,
+                status="error",
+                errors=[f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()],
+            ))
+            continue
+        if len(chunk) >= settings.BULK_INGEST_CHUNK_SIZE:
+            await _flush_chunk(session, chunk, results, idempotency_key)
+            chunk = []
+
+    await _flush_chunk(session, chunk, results, idempotency_key)
+
+    results.sort(key=lambda r: r.index)
+    created = sum(1 for r in results if r.status == "created")
+    duplicates = sum(1 for r in results if r.status == "duplicate")
+    return BulkIngestResponse(
+        received=received, created=created, duplicates=duplicates,
+        failed=received - created - duplicates, results=results,
+    )
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from database.setup import get_pool_status
+
+# Operational endpoints; mounted outside /api/v1 and hidden from the OpenAPI schema
+router = APIRouter()
+
+
+@router.get("/db/pool")
+async def db_pool_status():
+    """Live pool counters (size, checked out, overflow) and checkout wait times."""
+    return get_pool_status()
@@ -0,0 +1,69 @@
+from datetime import date
+from typing import Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.schemas import FollowUpTaskCreate, FollowUpTaskRead, FollowUpTaskPage
+from database.setup import get_db_session
+from services.interactions import get_interaction
+from services.tasks import create_follow_up_task, list_follow_up_tasks, complete_follow_up_task
+from services.task_scheduler import task_scheduler
+
+router = APIRouter()
+
+
+@router.post("", response_model=FollowUpTaskRead, status_code=status.HTTP_201_CREATED)
+async def create_task_endpoint(
+    task_data: FollowUpTaskCreate,
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Creates a follow-up task; its reminder fires at `remind_at` (default: the due date's reminder hour, UTC)."""
+    if task_data.interaction_id is not None and await get_interaction(session, task_data.interaction_id) is None:
+        raise HTTPException(status_code=404, detail="Interaction not found")
+    task = await create_follow_up_task(session, task_data)
+    task_scheduler.notify(task)
+    return task
+
+
+@router.get("", response_model=FollowUpTaskPage)
+async def list_tasks_endpoint(
+    assigned_user_id: Optional[str] = None,
+    status: Optional[Literal["pending", "reminded", "done"]] = None,
+    due_before: Optional[date] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Lists tasks earliest due first; pass `next_cursor` back as `cursor` for the next page."""
+    try:
+        items, next_cursor = await list_follow_up_tasks(
+            session,
+            assigned_user_id=assigned_user_id,
+            status=status,
+            due_before=due_before,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return FollowUpTaskPage(
+        items=[FollowUpTaskRead.model_validate(item, from_attributes=True) for item in items],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/scheduler/stats")
+async def scheduler_stats():
+    """This worker's scheduler: look-ahead heap size, next due reminder, reminders sent and lost claims."""
+    return task_scheduler.stats()
+
+
+@router.post("/{task_id}/complete", response_model=FollowUpTaskRead)
+async def complete_task_endpoint(
+    task_id: UUID,
+    session: AsyncSession = Depends(get_db_session)
+):
+    task = await complete_follow_up_task(session, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
@@ -0,0 +1,79 @@
+"""
+Concurrency benchmark for /agent/chat/stream.
+
+Replaces the Groq client with a fake async model that sleeps for a fixed
+latency, then fires N chat sessions in parallel. With async nodes the N
+sessions should finish in roughly the time of one.
+
+Usage (from backend/):
+    python -m benchmarks.bench_agent_concurrency --sessions 20 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# Point the app at a throwaway SQLite database before config is imported
+_TMP_DIR = tempfile.mkdtemp(prefix="aivoa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db")
+os.environ.setdefault("LANGGRAPH_CHECKPOINTER_URL", f"sqlite:///{_TMP_DIR}/checkpoints.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+import httpx
+from langchain_core.messages import AIMessage
+
+import agent.graph as graph_module
+from main import app
+from database.setup import create_db_and_tables
+from agent.checkpointer import open_checkpointer, close_checkpointer
+
+
+class FakeChatModel:
+    """Stand-in for llm_with_tools: answers after an async sleep."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return AIMessage(content="Noted.")
+
+
+async def run_session(client: httpx.AsyncClient, thread_id: str) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        "/api/v1/agent/chat/stream",
+        json={"thread_id": thread_id, "message": "Met Dr. Smith today"},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main(sessions: int, latency: float):
+    graph_module.llm = graph_module.llm_with_tools = FakeChatModel(latency)
+    await create_db_and_tables()
+    await open_checkpointer()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        single = await run_session(client, "bench-single")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_session(client, f"bench-{i}") for i in range(sessions)))
+        parallel = time.perf_counter() - start
+
+    await close_checkpointer()
+
+    print(f"fake LLM latency     : {latency:.3f}s")
+    print(f"1 session            : {single:.3f}s")
+    print(f"{sessions} parallel sessions : {parallel:.3f}s")
+    print(f"slowdown vs single   : {parallel / single:.2f}x (serial would be ~{sessions}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.latency))
@@ -0,0 +1,81 @@
+"""
+Rows/sec benchmark: /interactions/log_form (one row per request) versus
+/interactions/bulk with a JSON array and with an NDJSON stream.
+
+Usage (from backend/):
+    python -m benchmarks.bench_bulk_ingest --rows 20000 --single-rows 1000
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_bulk_ingest
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+_TMP_DIR = tempfile.mkdtemp(prefix="aivoa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+import httpx
+
+from main import app
+from database.setup import create_db_and_tables
+
+
+def make_rows(n: int) -> list:
+    rng = random.Random(7)
+    return [
+        {
+            "hcp_name": f"Dr. HCP {rng.randint(1, 5000)}",
+            "interaction_type": rng.choice(["Meeting", "Call", "Email"]),
+            "interaction_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "attendees": ["Rep A"],
+            "topics_discussed": ["Product X"],
+            "materials_shared": ["Brochure"],
+            "samples_distributed": [],
+            "sentiment": rng.choice(["Positive", "Neutral", "Negative"]),
+            "outcomes": "Discussed efficacy data and agreed on a follow-up visit.",
+        }
+        for _ in range(n)
+    ]
+
+
+async def main(rows: int, single_rows: int):
+    await create_db_and_tables()
+    data = make_rows(rows)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        for row in data[:single_rows]:
+            (await client.post("/api/v1/interactions/log_form", json=row)).raise_for_status()
+        single_rate = single_rows / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        response = await client.post("/api/v1/interactions/bulk", json=data)
+        response.raise_for_status()
+        json_rate = rows / (time.perf_counter() - start)
+        assert response.json()["created"] == rows, response.json()["failed"]
+
+        body = "\n".join(json.dumps(row) for row in data).encode()
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/v1/interactions/bulk", content=body, headers={"content-type": "application/x-ndjson"}
+        )
+        response.raise_for_status()
+        ndjson_rate = rows / (time.perf_counter() - start)
+
+    print(f"/log_form (sequential) : {single_rate:>10,.0f} rows/sec ({single_rows} rows)")
+    print(f"/bulk JSON array       : {json_rate:>10,.0f} rows/sec ({rows} rows)")
+    print(f"/bulk NDJSON stream    : {ndjson_rate:>10,.0f} rows/sec ({rows} rows)")
+    print(f"speedup                : {json_rate / single_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single-rows", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.single_rows))
@@ -0,0 +1,83 @@
+"""
+Checkpointer benchmark: per-turn write latency and storage size as a thread grows.
+
+Runs many turns on a handful of threads with a fake model, compacting after
+every batch of turns, and prints turn latency and checkpoint row counts. With
+CHECKPOINT_RETENTION_PER_THREAD > 0 both should stay flat.
+
+Usage (from backend/):
+    python -m benchmarks.bench_checkpointer --turns 200 --threads 5 --keep 20
+    LANGGRAPH_CHECKPOINTER_URL=postgresql://... python -m benchmarks.bench_checkpointer
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_TMP_DIR = tempfile.mkdtemp(prefix="aivoa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db")
+os.environ.setdefault("LANGGRAPH_CHECKPOINTER_URL", f"sqlite:///{_TMP_DIR}/checkpoints.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import agent.graph as graph_module
+import agent.checkpointer as checkpointer_module
+from config import settings
+
+
+class FakeChatModel:
+    async def ainvoke(self, messages, *args, **kwargs):
+        return AIMessage(content="Noted.")
+
+
+async def count_checkpoints() -> int:
+    saver = checkpointer_module.get_checkpointer()
+    if checkpointer_module._pool is not None:
+        async with checkpointer_module._pool.connection() as conn:
+            cur = await conn.execute("SELECT count(*) AS n FROM checkpoints")
+            return (await cur.fetchone())["n"]
+    async with saver.conn.execute("SELECT count(*) FROM checkpoints") as cur:
+        return (await cur.fetchone())[0]
+
+
+async def main(turns: int, threads: int, keep: int, report_every: int):
+    settings.CHECKPOINT_RETENTION_PER_THREAD = keep
+    graph_module.llm = graph_module.llm_with_tools = FakeChatModel()
+
+    saver = await checkpointer_module.open_checkpointer()
+    app = graph_module.graph.compile(checkpointer=saver)
+
+    print(f"retention per thread: {keep or 'unbounded'}")
+    print(f"{'turn':>6} {'avg turn ms':>12} {'checkpoints':>12}")
+
+    window = []
+    for turn in range(1, turns + 1):
+        for t in range(threads):
+            thread_id = f"bench-thread-{t}"
+            start = time.perf_counter()
+            await app.ainvoke(
+                {"messages": [HumanMessage(content=f"turn {turn}")]},
+                config={"configurable": {"thread_id": thread_id}},
+            )
+            window.append(time.perf_counter() - start)
+            checkpointer_module.mark_thread_for_compaction(thread_id)
+
+        if turn % report_every == 0:
+            await checkpointer_module.compact_pending_threads()
+            avg_ms = 1000 * sum(window) / len(window)
+            print(f"{turn:>6} {avg_ms:>12.2f} {await count_checkpoints():>12}")
+            window.clear()
+
+    await checkpointer_module.close_checkpointer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=5)
+    parser.add_argument("--keep", type=int, default=20, help="0 disables retention")
+    parser.add_argument("--report-every", type=int, default=25)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.threads, args.keep, args.report_every))
@@ -0,0 +1,83 @@
+"""
+Throughput benchmark for the compliance engine.
+
+Screens synthetic rep notes with the shipped rule set and reports records/sec
+for per-record checks, the single-pass batch API and a second (fully cached)
+pass through the checker.
+
+Usage (from backend/):
+    python -m benchmarks.bench_compliance --records 20000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from models.schemas import ComplianceCheckSchema
+from services.compliance import ComplianceChecker, ComplianceEngine, load_material_aliases, load_rules
+from config import settings
+
+TEMPLATES = [
+    "Met Dr. {name} to discuss Product X. Shared the Clinical trial summary. Positive response.",
+    "Called Dr. {name}; mentioned it works better than the competitor and has no side effects.",
+    "Left two samples with Dr. {name}. Consent obtained for follow-up email.",
+    "Dr. {name} asked about off-label use in children; suggested to double the dose. Patient ID: 123456.",
+    "Quick visit with Dr. {name}, walked through the internal slide deck and the dosing guide.",
+]
+NAMES = ["Smith", "Sharma", "Chen", "Brown", "Garcia", "Khan", "Novak", "Silva", "Ito", "Okafor"]
+MATERIALS = ["Brochures", "Dosing guide", "Competitor comparison chart", "Clinical trial summary"]
+
+
+def build_records(n: int) -> list:
+    rng = random.Random(42)
+    return [
+        ComplianceCheckSchema(
+            raw_text_segment=rng.choice(TEMPLATES).format(name=f"{rng.choice(NAMES)}{i}"),
+            material_references=rng.sample(MATERIALS, rng.randint(0, 2)),
+            hcp_consent_verified=rng.random() < 0.3,
+        )
+        for i in range(n)
+    ]
+
+
+def main(n_records: int):
+    start = time.perf_counter()
+    engine = ComplianceEngine(
+        load_rules(settings.COMPLIANCE_RULES_PATH), load_material_aliases(settings.EXTRACTION_GAZETTEER_PATH)
+    )
+    build_s = time.perf_counter() - start
+
+    records = build_records(n_records)
+
+    start = time.perf_counter()
+    single_reports = []
+    for record in records:
+        single_reports.append(engine.check(record))
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reports = engine.check_batch(records)
+    batch_s = time.perf_counter() - start
+
+    checker = ComplianceChecker(settings.COMPLIANCE_RULES_PATH, max_cache_entries=n_records,
+                                gazetteer_path=settings.EXTRACTION_GAZETTEER_PATH)
+    checker.check_batch(records)
+    start = time.perf_counter()
+    checker.check_batch(records)
+    cached_s = time.perf_counter() - start
+
+    by_status = {s: sum(1 for r in reports if r.status == s) for s in ("Pass", "Warning", "Fail")}
+    print(f"rule set           : v{engine.version}, {engine.matcher.size} keyword patterns (compiled in {build_s * 1000:.1f}ms)")
+    print(f"records            : {n_records} {by_status}")
+    print(f"per-record check   : {n_records / single_s:,.0f} records/sec")
+    print(f"batch check        : {n_records / batch_s:,.0f} records/sec")
+    print(f"cached re-check    : {n_records / cached_s:,.0f} records/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.records)
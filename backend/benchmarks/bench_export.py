@@ -0,0 +1,104 @@
+"""
+Export benchmark: throughput, output size and memory of GET /export/interactions.
+
+Seeds N interactions (with list columns and a transcript), then streams a full
+export in every format/compression combination straight from the ASGI app and
+reports rows/sec, MB written and the process RSS growth during the export.
+With a server-side cursor the RSS growth should not depend on --rows.
+
+Usage (from backend/):
+    python -m benchmarks.bench_export --rows 200000
+    python -m benchmarks.bench_export --rows 1000000 --formats parquet --compressions zstd
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+_TMP_DIR = tempfile.mkdtemp(prefix="aivoa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from main import app
+from database.setup import create_db_and_tables, async_session_factory
+from models.schemas import HCPInteractionCreate
+from services.interactions import bulk_create_interactions
+
+WORDS = "efficacy dosing safety trial oncology formulary reimbursement sample brochure follow-up".split()
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def seed(rows: int, chunk: int = 5000):
+    rng = random.Random(5)
+    async with async_session_factory() as session:
+        for offset in range(0, rows, chunk):
+            batch = [
+                HCPInteractionCreate(
+                    hcp_name=f"Dr. HCP {rng.randint(1, 2000)}",
+                    interaction_type=rng.choice(["Meeting", "Call", "Email"]),
+                    interaction_date=f"20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    attendees=[f"Rep {rng.randint(1, 50)}"],
+                    topics_discussed=rng.sample(["Product X", "Product Y", "OncoBoost"], 2),
+                    materials_shared=["Brochure"],
+                    sentiment=rng.choice(["Positive", "Neutral", "Negative"]),
+                    outcomes=" ".join(rng.choices(WORDS, k=20)) + f" #{offset + i}",
+                )
+                for i in range(min(chunk, rows - offset))
+            ]
+            await bulk_create_interactions(session, batch)
+
+
+async def run_export(fmt: str, compression: str, rows: int):
+    # Straight to the ASGI app: httpx's ASGITransport buffers the whole body
+    query = f"format={fmt}&compression={compression}".encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/api/v1/export/interactions", "raw_path": b"/api/v1/export/interactions", "query_string": query,
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    stats = {"size": 0, "peak": rss_mb(), "status": 0}
+    base_rss = stats["peak"]
+
+    async def receive():
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            stats["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            stats["size"] += len(message.get("body", b""))
+            stats["peak"] = max(stats["peak"], rss_mb())
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    done.set()
+    seconds = time.perf_counter() - start
+    assert stats["status"] == 200, stats["status"]
+    print(f"{fmt:<8} {compression:<5} {rows / seconds:>10.0f} rows/s {stats['size'] / 2**20:>9.1f} MB {stats['peak'] - base_rss:>+9.1f} MB RSS")
+
+
+async def main(args):
+    await create_db_and_tables()
+    start = time.perf_counter()
+    await seed(args.rows)
+    print(f"seeded {args.rows} rows in {time.perf_counter() - start:.1f}s\n")
+
+    for fmt in args.formats:
+        for compression in args.compressions:
+            await run_export(fmt, compression, args.rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--formats", nargs="+", default=["ndjson", "csv", "parquet"])
+    parser.add_argument("--compressions", nargs="+", default=["none", "gzip", "zstd"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""
+Throughput benchmark for the rule-based extraction engine.
+
+Generates synthetic rep transcripts against a synthetic gazetteer of the
+requested size and reports transcripts/sec for per-text extraction and for
+the single-pass batch API.
+
+Usage (from backend/):
+    python -m benchmarks.bench_extraction --transcripts 20000 --hcps 50000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from services.extraction import ExtractionEngine
+
+FIRST = ["John", "Priya", "Emily", "Michael", "Sara", "Ahmed", "Lena", "Carlos", "Mei", "Tom"]
+LAST = ["Smith", "Sharma", "Chen", "Brown", "Garcia", "Khan", "Novak", "Silva", "Ito", "Okafor"]
+TEMPLATES = [
+    "Met {hcp} on {date} to discuss {product}. Shared the {material}. She was very interested and agreed to a follow-up.",
+    "Called {hcp} yesterday about {product} dosing; left two {product} samples. Some concerns about side effects.",
+    "Emailed {hcp} the {material} after our lunch meeting. Positive response, keen on {product}.",
+    "Quick visit with {hcp}. Discussed {product} and {product2}. Neutral overall, asked for the {material}.",
+]
+
+
+def build_gazetteers(n_hcps: int) -> dict:
+    hcps = []
+    for i in range(n_hcps):
+        first, last = FIRST[i % len(FIRST)], f"{LAST[i % len(LAST)]}{i}"
+        hcps.append({"name": f"Dr. {first} {last}", "aliases": [f"Dr. {last}", f"{last}, {first[0]}."]})
+    products = [{"name": f"Product {i}", "aliases": [f"Prod{i}"]} for i in range(200)]
+    materials = [{"name": f"Brochure {i}", "aliases": [f"leaflet {i}"]} for i in range(200)]
+    return {"hcps": hcps, "products": products, "materials": materials, "samples": []}
+
+
+def build_transcripts(n: int, gazetteers: dict) -> list:
+    rng = random.Random(42)
+    transcripts = []
+    for _ in range(n):
+        transcripts.append(rng.choice(TEMPLATES).format(
+            hcp=rng.choice(gazetteers["hcps"])["aliases"][0],
+            date=f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+            product=rng.choice(gazetteers["products"])["name"],
+            product2=rng.choice(gazetteers["products"])["name"],
+            material=rng.choice(gazetteers["materials"])["name"],
+        ))
+    return transcripts
+
+
+def main(n_transcripts: int, n_hcps: int):
+    gazetteers = build_gazetteers(n_hcps)
+
+    start = time.perf_counter()
+    engine = ExtractionEngine(gazetteers)
+    build_s = time.perf_counter() - start
+
+    transcripts = build_transcripts(n_transcripts, gazetteers)
+
+    start = time.perf_counter()
+    for text in transcripts:
+        engine.extract(text)
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = engine.extract_batch(transcripts)
+    batch_s = time.perf_counter() - start
+
+    matched = sum(1 for r in results if r.hcp_name)
+    print(f"gazetteer patterns : {engine.matcher.size} (compiled in {build_s:.2f}s)")
+    print(f"transcripts        : {n_transcripts} ({matched} with a resolved HCP)")
+    print(f"per-text extract   : {n_transcripts / single_s:,.0f} transcripts/sec")
+    print(f"batch extract      : {n_transcripts / batch_s:,.0f} transcripts/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transcripts", type=int, default=20000)
+    parser.add_argument("--hcps", type=int, default=50000)
+    args = parser.parse_args()
+    main(args.transcripts, args.hcps)
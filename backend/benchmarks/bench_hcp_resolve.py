@@ -0,0 +1,127 @@
+"""
+Latency benchmark for HCP name resolution (services/hcp_matching.py).
+
+Builds a synthetic HCP directory of the requested size (syllable-generated
+names, with a skewed surname distribution so some trigrams are very common),
+then resolves noisy variants of directory names ("Smith, J.", "Dr Jon Smith",
+"SMITH, JOHN MD") plus unknown names. Reports index build time and memory,
+per-lookup latency percentiles, and how often a variant resolved to the HCP it
+was derived from (and how often to a wrong one).
+
+Usage (from backend/):
+    python -m benchmarks.bench_hcp_resolve --hcps 300000 --queries 20000
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import time
+from uuid import uuid4
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from services.hcp_matching import HCPIndex, normalize_hcp_name
+
+SYLLABLES = "ka ri mo ta ne lo su vi an el or is ba de fi go hu ja ke li ma no pe ra si to ul ve wa yo za chen sh".split()
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def make_word(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def build_directory(n: int, rng: random.Random):
+    firsts = list({make_word(rng, rng.randint(2, 3)) for _ in range(3000)})
+    lasts = list({make_word(rng, rng.randint(2, 4)) for _ in range(max(1000, n // 3))})
+    weights = list(itertools.accumulate(1 / (i + 1) ** 0.6 for i in range(len(lasts))))  # a few very common surnames
+    seen, directory = set(), []
+    while len(directory) < n:
+        first, last = rng.choice(firsts), rng.choices(lasts, cum_weights=weights)[0]
+        if (first, last) not in seen:
+            seen.add((first, last))
+            directory.append((uuid4(), first, last))
+    return directory
+
+
+def variant(rng: random.Random, first: str, last: str) -> str:
+    kind = rng.randrange(5)
+    if kind == 0:
+        return f"{last}, {first[0]}."
+    if kind == 1:
+        return f"{last.upper()}, {first.upper()} MD"
+    if kind == 2:
+        i = rng.randrange(1, len(first))
+        return f"Dr {first[:i] + first[i + 1:]} {last}"  # dropped letter in the given name
+    if kind == 3:
+        return f"Prof. {first} {last}"
+    return f"Dr. {first} {last}"
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main(n_hcps: int, n_queries: int, threshold: float, margin: float):
+    rng = random.Random(7)
+    directory = build_directory(n_hcps, rng)
+
+    base_rss = rss_mb()
+    start = time.perf_counter()
+    index = HCPIndex()
+    for hcp_id, first, last in directory:
+        name = f"Dr. {first} {last}"
+        index.add(hcp_id, name, normalize_hcp_name(name))
+    build_s = time.perf_counter() - start
+    print(f"indexed {len(index)} HCPs ({index.trigram_count} trigrams) in {build_s:.1f}s, +{rss_mb() - base_rss:.0f} MB RSS")
+
+    queries = []
+    for _ in range(n_queries):
+        if rng.random() < 0.2:
+            queries.append((None, f"Dr. {make_word(rng, 3)} {make_word(rng, 5)}"))  # not in the directory
+        else:
+            hcp_id, first, last = rng.choice(directory)
+            queries.append((hcp_id, variant(rng, first, last)))
+
+    for label, lookup in (
+        ("search top-5", lambda name: index.search(name, 5)),
+        ("best_match", lambda name: index.best_match(name, threshold, margin)),
+    ):
+        latencies = []
+        correct = wrong = unresolved = 0
+        for expected, name in queries:
+            start = time.perf_counter()
+            result = lookup(name)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if label == "best_match" and expected is not None:
+                if result is None:
+                    unresolved += 1
+                elif result.hcp_id == expected:
+                    correct += 1
+                else:
+                    wrong += 1
+        print(
+            f"{label:<13} mean {statistics.mean(latencies):.3f} ms  p50 {percentile(latencies, 0.5):.3f} ms  "
+            f"p99 {percentile(latencies, 0.99):.3f} ms"
+        )
+        if label == "best_match":
+            known = correct + wrong + unresolved
+            print(
+                f"              variants: {correct / known:.1%} linked correctly, {wrong / known:.2%} linked wrongly, "
+                f"{unresolved / known:.1%} left for a new HCP (ambiguous or below threshold)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hcps", type=int, default=300_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--margin", type=float, default=0.05)
+    args = parser.parse_args()
+    main(args.hcps, args.queries, args.threshold, args.margin)
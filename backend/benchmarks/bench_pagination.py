@@ -0,0 +1,78 @@
+"""
+Keyset pagination benchmark: page latency from the first page to deep pages.
+
+Seeds N interactions through the bulk service, then walks GET /interactions
+page by page with the returned cursor and prints the latency at sampled
+page numbers. With keyset pagination the latency should stay flat.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pagination --rows 500000 --page-size 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+_TMP_DIR = tempfile.mkdtemp(prefix="aivoa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+import httpx
+
+from main import app
+from database.setup import create_db_and_tables, async_session_factory
+from models.schemas import HCPInteractionCreate
+from services.interactions import bulk_create_interactions
+
+
+async def seed(rows: int, chunk: int = 5000):
+    rng = random.Random(11)
+    async with async_session_factory() as session:
+        for offset in range(0, rows, chunk):
+            batch = [
+                HCPInteractionCreate(
+                    hcp_name=f"Dr. HCP {rng.randint(1, 2000)}",
+                    interaction_type=rng.choice(["Meeting", "Call", "Email"]),
+                    interaction_date=f"20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    sentiment=rng.choice(["Positive", "Neutral", "Negative"]),
+                    outcomes=f"Seeded row {offset + i}",  # distinct, or the content hash dedupes it
+                )
+                for i in range(min(chunk, rows - offset))
+            ]
+            await bulk_create_interactions(session, batch)
+
+
+async def main(rows: int, page_size: int):
+    await create_db_and_tables()
+    start = time.perf_counter()
+    await seed(rows)
+    print(f"seeded {rows} rows in {time.perf_counter() - start:.1f}s")
+
+    pages = rows // page_size
+    samples = {1, 10, 100, 1000, 10000, pages}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        cursor = None
+        for page in range(1, pages + 1):
+            params = {"limit": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            start = time.perf_counter()
+            response = await client.get("/api/v1/interactions", params=params)
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            if page in samples:
+                print(f"page {page:>7}: {elapsed * 1000:7.2f} ms")
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.page_size))
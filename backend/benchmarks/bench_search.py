@@ -0,0 +1,77 @@
+"""
+Full-text search latency benchmark.
+
+Seeds N interactions with varied outcomes text, then times ranked searches
+through GET /interactions/search for rare and common terms.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search --rows 1000000
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_search
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+_TMP_DIR = tempfile.mkdtemp(prefix="aivoa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+import httpx
+
+from main import app
+from database.setup import create_db_and_tables, async_session_factory
+from models.schemas import HCPInteractionCreate
+from services.interactions import bulk_create_interactions
+
+WORDS = (
+    "efficacy dosing safety trial results formulary access pricing adherence side effects "
+    "renal hepatic cardiology oncology pediatric follow-up sample brochure webinar"
+).split()
+
+
+async def seed(rows: int, chunk: int = 5000):
+    rng = random.Random(5)
+    async with async_session_factory() as session:
+        for offset in range(0, rows, chunk):
+            batch = [
+                HCPInteractionCreate(
+                    hcp_name=f"Dr. HCP {rng.randint(1, 5000)}",
+                    interaction_type="Meeting",
+                    interaction_date="2024-01-01",
+                    sentiment="Neutral",
+                    outcomes=" ".join(rng.choices(WORDS, k=12)) + f" product{rng.randint(1, 100000)}",
+                )
+                for _ in range(min(chunk, rows - offset))
+            ]
+            await bulk_create_interactions(session, batch)
+
+
+async def main(rows: int, repeats: int):
+    await create_db_and_tables()
+    start = time.perf_counter()
+    await seed(rows)
+    print(f"seeded {rows} rows in {time.perf_counter() - start:.1f}s")
+
+    queries = {"rare term": "product4242", "two terms": "renal dosing", "common term": "efficacy"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for label, q in queries.items():
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                response = await client.get("/api/v1/interactions/search", params={"q": q, "limit": 20})
+                timings.append(time.perf_counter() - start)
+                response.raise_for_status()
+            print(f"{label:<12} '{q}': median {statistics.median(timings) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeats))
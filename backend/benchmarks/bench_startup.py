@@ -0,0 +1,91 @@
+"""
+Cold-start benchmark.
+
+Each measurement uses a fresh interpreter:
+  - import main       : time to import the app module
+  - first request     : from spawning uvicorn to the first 200 from
+                        GET /api/v1/interactions (empty database, then the same
+                        database again, when the schema is already current)
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup --runs 5
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_startup
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_seconds(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def first_request_seconds(env: dict, timeout: float = 60.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/api/v1/interactions?limit=1"
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(url, timeout=1.0).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError("server did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(runs: int):
+    tmp_dir = tempfile.mkdtemp(prefix="aivoa_bench_")
+    base_env = {
+        **os.environ,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "bench"),
+        "LOG_LEVEL": "WARNING",
+        "LANGGRAPH_CHECKPOINTER_URL": f"sqlite:///{tmp_dir}/checkpoints.db",
+        "LLM_CACHE_SQLITE_PATH": f"{tmp_dir}/llm_cache.db",
+    }
+
+    imports = [import_seconds({**base_env, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_dir}/import.db"}) for _ in range(runs)]
+
+    cold, warm = [], []
+    for i in range(runs):
+        env = {**base_env}
+        env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_dir}/run{i}.db")
+        cold.append(first_request_seconds(env))  # new database: migrations run
+        warm.append(first_request_seconds(env))  # schema current: no DDL
+
+    print(f"runs                          : {runs}")
+    print(f"import main                   : {statistics.median(imports) * 1000:.0f} ms (median)")
+    print(f"first request, new database   : {statistics.median(cold) * 1000:.0f} ms (median)")
+    print(f"first request, schema current : {statistics.median(warm) * 1000:.0f} ms (median)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main(args.runs)
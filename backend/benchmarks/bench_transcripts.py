@@ -0,0 +1,221 @@
+"""
+Transcript storage benchmark: row size and list-page latency with transcripts
+inline in hcpinteraction (the old raw_transcript column) and in the compressed,
+content-addressed transcript store.
+
+Seeds N interactions with synthetic voice-note transcripts (--transcript-kb
+each, --duplicate-rate of them repeating an earlier transcript) through the
+normal write path, copies them into a table with the old inline layout, then
+reports storage per interaction and the latency and bytes fetched of a 50-row
+list page (at random keyset positions) for: the inline layout, the new layout,
+and the new layout with include_transcript.
+
+Usage (from backend/):
+    python -m benchmarks.bench_transcripts --rows 20000
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_transcripts
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+_TMP_DIR = tempfile.mkdtemp(prefix="aivoa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from sqlalchemy import Column, Index, MetaData, Table, Text, func, insert, select, text, tuple_
+
+from database.setup import create_db_and_tables, async_session_factory, async_engine
+from models.database import HCPInteraction, Transcript
+from models.schemas import HCPInteractionCreate
+from services.interactions import bulk_create_interactions
+from services.transcripts import decode_transcript
+
+WORDS = (
+    "the doctor said patients on the current regimen report fewer side effects but she wants more data "
+    "on renal dosing and hepatic safety before switching we discussed the formulary status reimbursement "
+    "and the new trial results she asked for samples and a brochure and agreed to a follow-up call next month "
+    "um so basically yeah right okay I think that covers it"
+).split()
+
+PAGE = 50
+
+source = HCPInteraction.__table__
+inline = Table(
+    "hcpinteraction_inline", MetaData(),
+    *[Column(c.name, c.type, primary_key=c.primary_key) for c in source.columns if c.name != "transcript_digest"],
+    Column("raw_transcript", Text),
+    Index("ix_hcpinteraction_inline_date_id", "interaction_date", "interaction_id"),
+)
+
+# The old layout's generated search column, which was stored in the row as well
+_POSTGRES_INLINE_SEARCH = """
+    ALTER TABLE hcpinteraction_inline ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(outcomes, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(raw_transcript, '')), 'B')
+    ) STORED
+"""
+
+
+def make_transcript(rng: random.Random, kb: int) -> str:
+    sentences, size = [], 0
+    while size < kb * 1024:
+        sentence = " ".join(rng.choices(WORDS, k=rng.randint(8, 20))) + f" ({rng.randint(1, 10**6)})."
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+async def seed(rows: int, kb: int, duplicate_rate: float, chunk: int = 1000):
+    rng = random.Random(11)
+    recent = []
+    async with async_session_factory() as session:
+        for offset in range(0, rows, chunk):
+            batch = []
+            for i in range(offset, min(rows, offset + chunk)):
+                if recent and rng.random() < duplicate_rate:
+                    transcript = rng.choice(recent)  # e.g. the same voice note attached to two calls
+                else:
+                    transcript = make_transcript(rng, kb)
+                    recent = (recent + [transcript])[-100:]
+                batch.append(HCPInteractionCreate(
+                    hcp_name=f"Dr. HCP {rng.randint(1, 2000)}",
+                    interaction_type=rng.choice(["Meeting", "Call", "Email"]),
+                    interaction_date=f"20{rng.randint(18, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    attendees=[f"Rep {rng.randint(1, 50)}"],
+                    topics_discussed=["Product X"],
+                    sentiment=rng.choice(["Positive", "Neutral", "Negative"]),
+                    outcomes=f"Discussed dosing and next steps #{i}",
+                    raw_transcript=transcript,
+                ))
+            await bulk_create_interactions(session, batch)
+
+
+async def copy_to_inline_layout(batch_size: int = 1000):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(inline.create)
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text(_POSTGRES_INLINE_SEARCH))
+    columns = [source.c[c.name] for c in inline.columns if c.name != "raw_transcript"]
+    last_id = None
+    while True:
+        query = select(*columns, Transcript.codec, Transcript.data).outerjoin(
+            Transcript, Transcript.digest == source.c.transcript_digest
+        )
+        if last_id is not None:
+            query = query.where(source.c.interaction_id > last_id)
+        async with async_engine.begin() as conn:
+            rows = (await conn.execute(query.order_by(source.c.interaction_id).limit(batch_size))).all()
+            if not rows:
+                break
+            await conn.execute(insert(inline), [
+                {**{c.name: row._mapping[c.name] for c in columns},
+                 "raw_transcript": decode_transcript(row.codec, row.data) if row.data is not None else None}
+                for row in rows
+            ])
+        last_id = rows[-1].interaction_id
+
+
+async def table_bytes(names) -> int:
+    """Table storage without indexes: heap + TOAST on Postgres, b-tree and overflow pages on SQLite."""
+    total = 0
+    async with async_engine.connect() as conn:
+        for name in names:
+            if conn.dialect.name == "postgresql":
+                total += (await conn.execute(text("SELECT pg_table_size(:name)"), {"name": name})).scalar()
+            else:
+                total += (await conn.execute(text("SELECT sum(pgsize) FROM dbstat WHERE name = :name"), {"name": name})).scalar()
+    return total
+
+
+def payload_bytes(rows) -> int:
+    return sum(len(str(value)) for row in rows for value in row if value is not None)
+
+
+async def time_pages(label: str, fetch, cursors):
+    timings, sizes = [], []
+    async with async_engine.connect() as conn:
+        for cursor in cursors:
+            start = time.perf_counter()
+            rows = await fetch(conn, cursor)
+            timings.append((time.perf_counter() - start) * 1000)
+            sizes.append(payload_bytes(rows))
+    print(
+        f"{label:<28} median {statistics.median(timings):7.2f} ms  p95 {sorted(timings)[int(0.95 * len(timings))]:7.2f} ms  "
+        f"{statistics.mean(sizes) / 1024:8.1f} KB fetched per page"
+    )
+
+
+def page(table, cursor):
+    return (
+        select(*[c for c in table.columns if c.name != "search_vector"])
+        .where(tuple_(table.c.interaction_date, table.c.interaction_id) < cursor)
+        .order_by(table.c.interaction_date.desc(), table.c.interaction_id.desc())
+        .limit(PAGE)
+    )
+
+
+async def fetch_inline(conn, cursor):
+    return (await conn.execute(page(inline, cursor))).all()
+
+
+async def fetch_store(conn, cursor):
+    return (await conn.execute(page(source, cursor))).all()
+
+
+async def fetch_store_with_transcripts(conn, cursor):
+    rows = (await conn.execute(page(source, cursor))).all()
+    digests = {row.transcript_digest for row in rows if row.transcript_digest}
+    stored = (await conn.execute(
+        select(Transcript.digest, Transcript.codec, Transcript.data).where(Transcript.digest.in_(digests))
+    )).all()
+    texts = {row.digest: decode_transcript(row.codec, row.data) for row in stored}
+    return [(*row, texts.get(row.transcript_digest)) for row in rows]
+
+
+async def main(args):
+    await create_db_and_tables()
+    start = time.perf_counter()
+    await seed(args.rows, args.transcript_kb, args.duplicate_rate)
+    print(f"seeded {args.rows} interactions in {time.perf_counter() - start:.1f}s")
+    await copy_to_inline_layout()
+
+    async with async_engine.connect() as conn:
+        stored, raw_bytes, stored_bytes = (await conn.execute(
+            select(func.count(), func.sum(Transcript.size), func.sum(func.length(Transcript.data)))
+        )).one()
+    print(
+        f"transcript store: {stored} distinct transcripts for {args.rows} interactions, "
+        f"{raw_bytes / 2**20:.1f} MB text -> {stored_bytes / 2**20:.1f} MB compressed ({raw_bytes / stored_bytes:.1f}x)\n"
+    )
+
+    before = await table_bytes(["hcpinteraction_inline"])
+    after_rows = await table_bytes(["hcpinteraction"])
+    after_total = after_rows + await table_bytes(["transcript"])
+    print(f"{'inline layout':<28} {before / args.rows:10,.0f} bytes per interaction")
+    print(f"{'store: interaction row':<28} {after_rows / args.rows:10,.0f} bytes per interaction")
+    print(f"{'store: row + transcripts':<28} {after_total / args.rows:10,.0f} bytes per interaction\n")
+
+    rng = random.Random(3)
+    async with async_engine.connect() as conn:
+        keys = (await conn.execute(select(source.c.interaction_date, source.c.interaction_id))).all()
+    cursors = [tuple(key) for key in rng.sample(keys, min(args.pages, len(keys)))]
+    for label, fetch in (
+        ("inline layout", fetch_inline),
+        ("store", fetch_store),
+        ("store + include_transcript", fetch_store_with_transcripts),
+    ):
+        await time_pages(label, fetch, cursors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--transcript-kb", type=int, default=16)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--pages", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
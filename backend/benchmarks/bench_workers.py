@@ -0,0 +1,218 @@
+"""
+Multi-worker throughput benchmark: the same load against server.py with 1..N
+worker processes.
+
+For each --workers count a server is started through server.serve() (with the
+scripted fake LLM of benchmarks/fake_llm.py installed in every worker), and
+--clients client processes keep --concurrency requests in flight in total for
+--duration seconds per scenario:
+  log_form - POST /interactions/log_form (validation, HCP linking, one insert)
+  list     - GET /interactions?limit=50 (keyset page, JSON encoding)
+  chat     - POST /agent/chat/stream read to the end (graph run with one tool
+             call, checkpoint writes, SSE encoding)
+Reports requests/s, p50/p99 latency, errors and the speed-up over the first
+worker count. The numbers only mean something with at least workers + clients
+cores; use Postgres (DATABASE_URL and LANGGRAPH_CHECKPOINTER_URL), otherwise
+every worker's writes queue on the same SQLite file lock.
+
+Usage (from backend/):
+    python -m benchmarks.bench_workers --workers 1 2 4 --duration 15
+    DATABASE_URL=postgresql+asyncpg://... LANGGRAPH_CHECKPOINTER_URL=postgresql://... python -m benchmarks.bench_workers
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MESSAGE = "Met Dr. Smith today, discussed OncoBoost efficacy and left the Dosing guide. Very positive."
+
+
+# -------------------------------------------------------
+# Server side (runs in every worker)
+# -------------------------------------------------------
+
+def create_app():
+    """App factory for the benchmark server: main.app with the fake LLM installed."""
+    from benchmarks.fake_llm import ScriptedChatModel, install_fake_llm
+    from main import app
+
+    install_fake_llm(ScriptedChatModel(
+        latency=float(os.environ.get("BENCH_LLM_LATENCY", "0.05")),
+        tool_calls=[{"name": "extract_interaction_from_text", "args_from_message": "text"}],
+    ))
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, llm_latency: float) -> subprocess.Popen:
+    env = {**os.environ, "BENCH_LLM_LATENCY": str(llm_latency)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_workers", "--serve", "--workers", str(workers), "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.perf_counter() + 120
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0).status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not answer in time")
+
+
+def stop_server(server: subprocess.Popen):
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+# -------------------------------------------------------
+# Client side (runs in --clients processes)
+# -------------------------------------------------------
+
+async def _request(client: httpx.AsyncClient, scenario: str, rng: random.Random, tag: str) -> int:
+    if scenario == "log_form":
+        from benchmarks.loadtest import make_row
+
+        # A unique outcome per request: identical rows would be deduplicated, not inserted
+        body = json.dumps(make_row(rng, 0)).replace("__N__", tag)
+        response = await client.post("/api/v1/interactions/log_form", content=body,
+                                     headers={"content-type": "application/json"})
+        return response.status_code
+    if scenario == "list":
+        return (await client.get("/api/v1/interactions", params={"limit": 50})).status_code
+    async with client.stream("POST", "/api/v1/agent/chat/stream", json={"thread_id": f"bench-{tag}", "message": MESSAGE}) as response:
+        async for _ in response.aiter_bytes():
+            pass
+        return response.status_code
+
+
+async def _drive(url: str, scenario: str, concurrency: int, duration: float, seed: int) -> Tuple[List[float], int]:
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=60.0, limits=limits) as client:
+        async def loop(worker: int):
+            nonlocal errors
+            i = 0
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    status = await _request(client, scenario, rng, f"{seed}-{worker}-{i}")
+                except httpx.HTTPError:
+                    status = 599
+                latencies.append(time.perf_counter() - start)
+                if status >= 400:
+                    errors += 1
+                i += 1
+
+        await asyncio.gather(*(loop(w) for w in range(concurrency)))
+    return latencies, errors
+
+
+def run_client(url: str, scenario: str, concurrency: int, duration: float, seed: int) -> Tuple[List[float], int]:
+    return asyncio.run(_drive(url, scenario, concurrency, duration, seed))
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def measure(pool: ProcessPoolExecutor, url: str, scenario: str, args) -> dict:
+    shares = [args.concurrency // args.clients + (1 if c < args.concurrency % args.clients else 0) for c in range(args.clients)]
+    futures = [
+        pool.submit(run_client, url, scenario, share, args.duration, int(time.time() * 1000) + c)
+        for c, share in enumerate(shares) if share
+    ]
+    latencies, errors = [], 0
+    for future in futures:
+        client_latencies, client_errors = future.result()
+        latencies += client_latencies
+        errors += client_errors
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": errors,
+    }
+
+
+def main(args):
+    from benchmarks import fixtures  # throwaway database unless DATABASE_URL is set
+
+    results = {}
+    try:
+        with ProcessPoolExecutor(args.clients) as pool:
+            for workers in args.workers:
+                port = free_port()
+                server = start_server(workers, port, args.llm_latency)
+                url = f"http://127.0.0.1:{port}"
+                try:
+                    # Warm-up outside the measurement: graph compile and first connects in each worker
+                    measure(pool, url, "chat", argparse.Namespace(**{**vars(args), "duration": args.warmup}))
+                    for scenario in args.scenarios:
+                        results[workers, scenario] = measure(pool, url, scenario, args)
+                finally:
+                    stop_server(server)
+    finally:
+        fixtures.cleanup()
+
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} requests in flight from {args.clients} client processes, "
+          f"{args.duration:.0f}s per scenario, database {os.environ['DATABASE_URL'].split('://', 1)[0]}\n")
+    print(f"{'scenario':<10} {'workers':>7} {'req/s':>9} {'speed-up':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for scenario in args.scenarios:
+        base = results[args.workers[0], scenario]["rps"]
+        for workers in args.workers:
+            r = results[workers, scenario]
+            print(
+                f"{scenario:<10} {workers:>7} {r['rps']:>9.1f} {r['rps'] / base if base else 0.0:>8.2f}x "
+                f"{r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--scenarios", nargs="+", choices=["log_form", "list", "chat"], default=["log_form", "list", "chat"])
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight, over all clients")
+    parser.add_argument("--clients", type=int, default=4, help="client processes generating the load")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of chat traffic before measuring")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM seconds before the first token")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)  # internal: the server subprocess
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        from server import serve
+
+        serve(host="127.0.0.1", port=args.port, workers=args.workers[0], app="benchmarks.bench_workers:create_app", factory=True)
+    else:
+        main(args)
@@ -0,0 +1,103 @@
+"""
+Deterministic stand-in for ChatGroq, so the agent can be exercised offline.
+
+The reply depends only on the conversation, never on call order, which keeps
+concurrent sessions deterministic:
+  - last message is from the user  -> the scripted tool calls (if any)
+  - last message is a tool result  -> the scripted final answer
+  - summary requests (context node) -> a short fixed summary
+
+Replies are streamed word by word, so `messages` stream mode and SSE
+time-to-first-byte behave like a real provider.
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class ScriptedChatModel(BaseChatModel):
+    # Seconds before the first token, and between tokens
+    latency: float = 0.0
+    token_latency: float = 0.0
+    # e.g. [{"name": "extract_interaction_from_text", "args_from_message": "text"}]
+    # ("args_from_message" fills that argument with the user's message)
+    tool_calls: List[dict] = []
+    final_answer: str = "Interaction noted. Anything else to log?"
+    summary: str = "Earlier the rep discussed an HCP interaction."
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, HumanMessage) and last.content.startswith("EXISTING SUMMARY:"):
+            return AIMessage(content=self.summary)
+        if isinstance(last, HumanMessage) and self.tool_calls:
+            calls = []
+            for i, spec in enumerate(self.tool_calls):
+                args = dict(spec.get("args", {}))
+                if spec.get("args_from_message"):
+                    args[spec["args_from_message"]] = last.content
+                # Id derived from the prompt length keeps replies reproducible
+                calls.append({"name": spec["name"], "args": args, "id": f"call_{len(messages)}_{i}"})
+            return AIMessage(content="", tool_calls=calls)
+        return AIMessage(content=self.final_answer)
+
+    def _usage(self, messages: List[BaseMessage], reply: AIMessage) -> dict:
+        prompt = sum(len(str(m.content)) for m in messages) // 4
+        completion = max(1, len(reply.content) // 4)
+        return {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        reply = self._reply(messages)
+        reply.usage_metadata = self._usage(messages, reply)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        reply = self._reply(messages)
+        reply.usage_metadata = self._usage(messages, reply)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        reply = self._reply(messages)
+        if reply.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                    for i, c in enumerate(reply.tool_calls)
+                ],
+                usage_metadata=self._usage(messages, reply),
+            ))
+            return
+        words = reply.content.split(" ")
+        for i, word in enumerate(words):
+            if i and self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            # BaseChatModel forwards each chunk to the callbacks (LangGraph "messages" mode)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else f" {word}"))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, reply)))
+
+
+def install_fake_llm(model: BaseChatModel):
+    """Swaps the agent's Groq clients for `model` (call before the first chat request)."""
+    import agent.graph as graph_module
+    graph_module.llm = model
+    graph_module.llm_with_tools = model.bind_tools([])
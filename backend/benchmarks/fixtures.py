@@ -0,0 +1,36 @@
+"""
+Throwaway database fixture for benchmarks.
+
+Importing this module points the app at a fresh SQLite database (and checkpoint
+store) in a temporary directory, unless DATABASE_URL /
+LANGGRAPH_CHECKPOINTER_URL are already set, e.g. to a local Postgres. It must be
+imported before anything that imports `config`.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+
+TMP_DIR = tempfile.mkdtemp(prefix="aivoa_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{TMP_DIR}/bench.db")
+os.environ.setdefault("LANGGRAPH_CHECKPOINTER_URL", f"sqlite:///{TMP_DIR}/checkpoints.db")
+os.environ.setdefault("LLM_CACHE_SQLITE_PATH", f"{TMP_DIR}/llm_cache.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+# The fake LLM has no provider quota; set these to benchmark the gateway budgets themselves
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_REQUESTS_PER_SECOND", "0")
+# Keep benchmark output readable; warnings still pass
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+@asynccontextmanager
+async def running_app():
+    """Runs the FastAPI lifespan (tables, pool warm-up, checkpointer) around the benchmark."""
+    from main import app, lifespan
+
+    async with lifespan(app):
+        yield app
+
+
+def cleanup():
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
@@ -0,0 +1,296 @@
+"""
+Offline load test for the HTTP API.
+
+Runs the app in-process against a throwaway database (benchmarks/fixtures.py)
+with the scripted fake LLM (benchmarks/fake_llm.py), so no Groq key, network
+or container is needed. Each scenario is driven at rising concurrency and
+reports throughput, p50/p95/p99 latency, time to first byte and process RSS.
+
+Scenarios:
+  log_form - POST /interactions/log_form, one row per request
+  bulk     - POST /interactions/bulk, --bulk-rows rows per request
+  chat     - POST /agent/chat/stream, one new thread per request
+             (user message -> extract tool call -> streamed answer)
+
+Requests are sent straight to the ASGI app (no HTTP client), so TTFB is the
+time until the first response body chunk, not until the buffered body.
+Results are written as JSON; pass an earlier file with --compare to diff runs.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest
+    python -m benchmarks.loadtest --scenarios chat --concurrency 1 8 32 --requests 200 --llm-latency 0.3 --token-latency 0.01
+    python -m benchmarks.loadtest --compare benchmarks/results/loadtest-<commit>-<time>.json
+"""
+from benchmarks import fixtures  # noqa: F401  (configures the environment; import first)
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.fake_llm import ScriptedChatModel, install_fake_llm
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# -------------------------------------------------------
+# In-process ASGI client
+# -------------------------------------------------------
+
+async def asgi_request(app, method: str, path: str, body: bytes = b"") -> Tuple[int, float, float]:
+    """Returns (status, seconds to first body byte, total seconds)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    sent = False
+    never = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await never.wait()  # the client stays connected
+        return {"type": "http.disconnect"}
+
+    status = 0
+    first_byte: Optional[float] = None
+    start = time.perf_counter()
+
+    async def send(message):
+        nonlocal status, first_byte
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body") and first_byte is None:
+            first_byte = time.perf_counter() - start
+
+    await app(scope, receive, send)
+    total = time.perf_counter() - start
+    return status, first_byte if first_byte is not None else total, total
+
+
+# -------------------------------------------------------
+# Measurement helpers
+# -------------------------------------------------------
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize_ms(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 0.50) * 1000, 2),
+        "p95": round(percentile(values, 0.95) * 1000, 2),
+        "p99": round(percentile(values, 0.99) * 1000, 2),
+        "mean": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "max": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if platform.system() == "Darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+async def run_level(call: Callable[[int], Awaitable[Tuple[int, float, float]]], concurrency: int, requests: int) -> dict:
+    """`concurrency` workers issue `requests` calls in total as fast as they complete."""
+    latencies: List[float] = []
+    ttfbs: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            status, ttfb, total = await call(i)
+            if status >= 400:
+                errors += 1
+            latencies.append(total)
+            ttfbs.append(ttfb)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(requests / wall, 1),
+        "latency_ms": summarize_ms(latencies),
+        "ttfb_ms": summarize_ms(ttfbs),
+        "rss_mb": round(rss_mb(), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+# -------------------------------------------------------
+# Scenarios
+# -------------------------------------------------------
+
+def make_row(rng: random.Random, n: int) -> dict:
+    return {
+        "hcp_name": f"Dr. HCP {rng.randint(1, 5000)}",
+        "interaction_type": rng.choice(["Meeting", "Call", "Email"]),
+        "interaction_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "attendees": ["Rep A"],
+        "topics_discussed": ["Product X"],
+        "materials_shared": ["Brochures"],
+        "samples_distributed": [],
+        "sentiment": rng.choice(["Positive", "Neutral", "Negative"]),
+        # __N__ is replaced per request: identical rows would be deduplicated, not inserted
+        "outcomes": f"Discussed efficacy data and agreed on a follow-up visit (__N__/{n}).",
+    }
+
+
+def build_scenarios(app, args) -> Dict[str, Callable[[int], Awaitable[Tuple[int, float, float]]]]:
+    rng = random.Random(7)
+    rows = [json.dumps(make_row(rng, n)).encode() for n in range(1000)]
+    bulk_body = json.dumps([make_row(rng, n) for n in range(args.bulk_rows)]).encode()
+    run_id = int(time.time())
+
+    def unique(body: bytes, i: int) -> bytes:
+        return body.replace(b"__N__", f"{run_id}-{i}".encode())
+
+    async def log_form(i: int):
+        return await asgi_request(app, "POST", "/api/v1/interactions/log_form", unique(rows[i % len(rows)], i))
+
+    async def bulk(i: int):
+        return await asgi_request(app, "POST", "/api/v1/interactions/bulk", unique(bulk_body, i))
+
+    async def chat(i: int):
+        body = json.dumps({
+            "thread_id": f"load-{run_id}-{i}",
+            "message": "Met Dr. Smith today, discussed OncoBoost efficacy and left the Dosing guide. Very positive.",
+        }).encode()
+        return await asgi_request(app, "POST", "/api/v1/agent/chat/stream", body)
+
+    return {"log_form": log_form, "bulk": bulk, "chat": chat}
+
+
+# -------------------------------------------------------
+# Results
+# -------------------------------------------------------
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: List[dict]):
+    print(f"{'scenario':<10} {'conc':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ttfb p50':>9} {'err':>5} {'rss MB':>8}")
+    for r in results:
+        print(
+            f"{r['scenario']:<10} {r['concurrency']:>5} {r['throughput_rps']:>9.1f} "
+            f"{r['latency_ms']['p50']:>9.2f} {r['latency_ms']['p95']:>9.2f} {r['latency_ms']['p99']:>9.2f} "
+            f"{r['ttfb_ms']['p50']:>9.2f} {r['errors']:>5} {r['rss_mb']:>8.1f}"
+        )
+
+
+def compare(current: List[dict], baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\ncompared with {baseline_path}")
+    print(f"{'scenario':<10} {'conc':>5} {'rps':>16} {'p95 ms':>18}")
+    for r in current:
+        old = baseline.get((r["scenario"], r["concurrency"]))
+        if old is None:
+            continue
+        rps_delta = (r["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0.0
+        p95_delta = (r["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1) * 100 if old["latency_ms"]["p95"] else 0.0
+        print(f"{r['scenario']:<10} {r['concurrency']:>5} {r['throughput_rps']:>8.1f} ({rps_delta:+5.1f}%) {r['latency_ms']['p95']:>9.2f} ({p95_delta:+5.1f}%)")
+
+
+async def main(args):
+    install_fake_llm(ScriptedChatModel(
+        latency=args.llm_latency,
+        token_latency=args.token_latency,
+        tool_calls=[{"name": "extract_interaction_from_text", "args_from_message": "text"}],
+    ))
+
+    results = []
+    async with fixtures.running_app() as app:
+        scenarios = build_scenarios(app, args)
+        for name in args.scenarios:
+            # Warm-up request so one-time costs (graph compile, first connect) are not measured
+            await scenarios[name](-1)
+            for concurrency in args.concurrency:
+                level = await run_level(scenarios[name], concurrency, max(args.requests, concurrency))
+                results.append({"scenario": name, **level})
+
+    print_results(results)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    commit = git_commit()
+    path = os.path.join(args.output_dir, f"loadtest-{commit}-{stamp}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "meta": {
+                "commit": commit,
+                "timestamp": stamp,
+                "python": platform.python_version(),
+                "database": os.environ["DATABASE_URL"].split("://", 1)[0],
+                "args": {k: v for k, v in vars(args).items() if k not in ("compare", "output_dir")},
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"\nresults written to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=["log_form", "bulk", "chat"], default=["log_form", "bulk", "chat"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    parser.add_argument("--bulk-rows", type=int, default=500, help="rows per bulk request")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="fake LLM seconds between tokens")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    finally:
+        fixtures.cleanup()
@@ -0,0 +1,371 @@
+from typing import Callable, List, Tuple
+from uuid import uuid4
+
+from sqlalchemy import (
+    Column, Date, DateTime, Index, JSON, MetaData, String, Table, Uuid,
+    bindparam, func, insert, inspect, select, text, tuple_, update,
+)
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from models.database import (
+    utcnow, HCP, Transcript, HCPInteraction, InteractionListItem, FollowUpTask,
+    InteractionDailyRollup, InteractionRollupSummary, InteractionRollupItem,
+)
+from database.search import ensure_search_index, LEGACY_DDL, POSTGRES_TRANSCRIPT_COLUMN
+from models.schemas import HCPInteractionCreate
+from services.interactions import LIST_FIELDS, content_hash, list_item_rows
+from services.rollups import rebuild_rollups
+from services.hcp_matching import HCPIndex, plan_resolution
+from services.transcripts import store_transcripts_sync
+from config import settings
+
+
+# -------------------------------------------------------
+# Schema migrations
+# -------------------------------------------------------
+# Ordered (version, description, upgrade) steps. `upgrade` runs inside the boot
+# transaction on a sync Connection. The applied version is kept in a one-row
+# `schema_version` table, so a boot against an up-to-date database costs two
+# small queries and no DDL. Append new steps; never edit applied ones.
+
+# Step 1 is frozen as the schema the old create_all() bootstrap created: the
+# interaction table as it was then, and the full-text index over its inline
+# raw_transcript column. Later steps upgrade both from there, so a fresh
+# database and an upgraded one go through the same path.
+_BASELINE_METADATA = MetaData()
+
+_BASELINE_INTERACTION = Table(
+    "hcpinteraction", _BASELINE_METADATA,
+    Column("interaction_id", Uuid, primary_key=True),
+    Column("hcp_name", String, nullable=False),
+    Column("interaction_type", String, nullable=False),
+    Column("interaction_date", Date, nullable=False),
+    Column("attendees", JSON),
+    Column("topics_discussed", JSON),
+    Column("materials_shared", JSON),
+    Column("samples_distributed", JSON),
+    Column("sentiment", String, nullable=False),
+    Column("outcomes", String, nullable=False),
+    Column("follow_up_actions", JSON),
+    Column("raw_transcript", String),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_hcpinteraction_date_id", "interaction_date", "interaction_id"),
+    Index("ix_hcpinteraction_hcp_date_id", "hcp_name", "interaction_date", "interaction_id"),
+    Index("ix_hcpinteraction_type_date_id", "interaction_type", "interaction_date", "interaction_id"),
+    Index("ix_hcpinteraction_sentiment_date_id", "sentiment", "interaction_date", "interaction_id"),
+    Index("ix_hcpinteraction_created_at", "created_at"),
+)
+
+_BASELINE_SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE hcpinteraction ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(outcomes, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(raw_transcript, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_hcpinteraction_search_vector ON hcpinteraction USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS hcpinteraction_fts USING fts5(
+            outcomes, raw_transcript, content='hcpinteraction', content_rowid='rowid'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS hcpinteraction_fts_ai AFTER INSERT ON hcpinteraction BEGIN
+            INSERT INTO hcpinteraction_fts(rowid, outcomes, raw_transcript)
+            VALUES (new.rowid, new.outcomes, new.raw_transcript);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS hcpinteraction_fts_ad AFTER DELETE ON hcpinteraction BEGIN
+            INSERT INTO hcpinteraction_fts(hcpinteraction_fts, rowid, outcomes, raw_transcript)
+            VALUES ('delete', old.rowid, old.outcomes, old.raw_transcript);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS hcpinteraction_fts_au AFTER UPDATE OF outcomes, raw_transcript ON hcpinteraction BEGIN
+            INSERT INTO hcpinteraction_fts(hcpinteraction_fts, rowid, outcomes, raw_transcript)
+            VALUES ('delete', old.rowid, old.outcomes, old.raw_transcript);
+            INSERT INTO hcpinteraction_fts(rowid, outcomes, raw_transcript)
+            VALUES (new.rowid, new.outcomes, new.raw_transcript);
+        END
+        """,
+    ],
+}
+
+
+def _baseline(conn: Connection):
+    # Both parts are idempotent, so databases created by the old create_all()
+    # bootstrap adopt version 1 without changes. Later tables get their own
+    # steps, never create_all() of the current models.
+    dialect = conn.dialect.name
+    _BASELINE_METADATA.create_all(conn)
+    fts_is_new = dialect == "sqlite" and not inspect(conn).has_table("hcpinteraction_fts")
+    for ddl in _BASELINE_SEARCH_DDL.get(dialect, ()):
+        conn.execute(text(ddl))
+    if fts_is_new:
+        # Index rows that were inserted before the FTS table existed
+        conn.execute(text("INSERT INTO hcpinteraction_fts(hcpinteraction_fts) VALUES ('rebuild')"))
+
+
+def _follow_up_tasks(conn: Connection):
+    SQLModel.metadata.create_all(conn, tables=[FollowUpTask.__table__])
+
+
+def _add_column_if_missing(conn: Connection, table: str, column: str, ddl_type: str):
+    # Tables created by a later model version already have the column
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _backfill_content_hashes(conn: Connection, batch_size: int = 5000):
+    # Fills NULL content hashes oldest first; later copies of an already-seen
+    # interaction keep a NULL hash so the unique index can be built
+    table = HCPInteraction.__table__
+    seen = set()
+    last = None
+    while True:
+        query = select(
+            table.c.created_at, table.c.interaction_id, table.c.hcp_name,
+            table.c.interaction_date, table.c.interaction_type, table.c.outcomes,
+        ).where(table.c.content_hash.is_(None))
+        if last is not None:
+            query = query.where(tuple_(table.c.created_at, table.c.interaction_id) > last)
+        rows = conn.execute(query.order_by(table.c.created_at, table.c.interaction_id).limit(batch_size)).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            digest = content_hash(HCPInteractionCreate.model_construct(
+                hcp_name=row.hcp_name, interaction_date=row.interaction_date,
+                interaction_type=row.interaction_type, outcomes=row.outcomes,
+            ))
+            if digest not in seen:
+                seen.add(digest)
+                updates.append({"b_id": row.interaction_id, "b_hash": digest})
+        if updates:
+            conn.execute(
+                update(table).where(table.c.interaction_id == bindparam("b_id")).values(content_hash=bindparam("b_hash")),
+                updates,
+            )
+        last = (rows[-1].created_at, rows[-1].interaction_id)
+
+
+def _idempotency(conn: Connection):
+    _add_column_if_missing(conn, "hcpinteraction", "idempotency_key", "VARCHAR")
+    _add_column_if_missing(conn, "hcpinteraction", "content_hash", "VARCHAR")
+    _backfill_content_hashes(conn)
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_hcpinteraction_idempotency_key ON hcpinteraction (idempotency_key)"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_hcpinteraction_content_hash ON hcpinteraction (content_hash)"))
+
+
+def _list_items(conn: Connection, batch_size: int = 5000):
+    SQLModel.metadata.create_all(conn, tables=[InteractionListItem.__table__])
+
+    # Backfill from the JSON columns in primary-key order, one INSERT per batch;
+    # interactions that already have items are skipped so a rerun adds nothing
+    table = HCPInteraction.__table__
+    items = InteractionListItem.__table__
+    last_id = None
+    while True:
+        query = select(table.c.interaction_id, *[table.c[field] for field in LIST_FIELDS]).where(
+            ~select(items.c.interaction_id).where(items.c.interaction_id == table.c.interaction_id).exists()
+        )
+        if last_id is not None:
+            query = query.where(table.c.interaction_id > last_id)
+        rows = conn.execute(query.order_by(table.c.interaction_id).limit(batch_size)).all()
+        if not rows:
+            break
+        values = [item for row in rows for item in list_item_rows(row.interaction_id, row._mapping)]
+        if values:
+            conn.execute(insert(items), values)
+        last_id = rows[-1].interaction_id
+
+
+def _rollups(conn: Connection):
+    SQLModel.metadata.create_all(
+        conn, tables=[InteractionDailyRollup.__table__, InteractionRollupSummary.__table__, InteractionRollupItem.__table__]
+    )
+    rebuild_rollups(conn)
+
+
+def _hcp_master(conn: Connection):
+    SQLModel.metadata.create_all(conn, tables=[HCP.__table__])
+    uuid_type = "UUID" if conn.dialect.name == "postgresql" else "CHAR(32)"
+    _add_column_if_missing(conn, "hcpinteraction", "hcp_id", f"{uuid_type} REFERENCES hcp (hcp_id)")
+
+    # Link existing interactions: distinct names, most used spelling first so it
+    # becomes the display name, resolved with the same rules as live writes.
+    # hcp_name itself is rewritten to the display name by step 9.
+    hcps, interactions = HCP.__table__, HCPInteraction.__table__
+    index = HCPIndex()
+    for row in conn.execute(select(hcps.c.hcp_id, hcps.c.name, hcps.c.normalized_name)):
+        index.add(row.hcp_id, row.name, row.normalized_name)
+    names = conn.execute(
+        select(interactions.c.hcp_name)
+        .where(interactions.c.hcp_id.is_(None))
+        .group_by(interactions.c.hcp_name)
+        .order_by(func.count().desc(), interactions.c.hcp_name)
+    ).scalars().all()
+    matched, pending, new = plan_resolution(index, names, settings.HCP_MATCH_THRESHOLD, settings.HCP_MATCH_MARGIN)
+
+    created = {normalized: uuid4() for normalized in new}
+    now = utcnow()
+    if created:
+        conn.execute(insert(hcps), [
+            {"hcp_id": created[normalized], "name": name, "normalized_name": normalized, "created_at": now}
+            for normalized, name in new.items()
+        ])
+    links = [{"b_name": name, "b_id": match.hcp_id} for name, match in matched.items()]
+    links += [{"b_name": name, "b_id": created[normalized]} for name, normalized in pending.items()]
+    if links:
+        conn.execute(
+            update(interactions)
+            .where(interactions.c.hcp_name == bindparam("b_name"), interactions.c.hcp_id.is_(None))
+            .values(hcp_id=bindparam("b_id")),
+            links,
+        )
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_hcpinteraction_hcp_id_date_id ON hcpinteraction (hcp_id, interaction_date, interaction_id)"
+    ))
+
+
+def _transcript_store(conn: Connection, batch_size: int = 1000):
+    SQLModel.metadata.create_all(conn, tables=[Transcript.__table__])
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(POSTGRES_TRANSCRIPT_COLUMN))  # written by store_transcripts_sync()
+    _add_column_if_missing(conn, "hcpinteraction", "transcript_digest", "VARCHAR REFERENCES transcript (digest)")
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_hcpinteraction_transcript_digest ON hcpinteraction (transcript_digest)"
+    ))
+
+    # The old full-text index reads raw_transcript: drop it, move the inline
+    # transcripts into the store in primary-key order, drop the column (on
+    # Postgres the space is reclaimed by the next VACUUM FULL) and build the new
+    # index over outcomes + stored transcripts in one pass at the end
+    for ddl in LEGACY_DDL.get(conn.dialect.name, ()):
+        conn.execute(text(ddl))
+    last_id = None
+    while True:
+        query = text(
+            "SELECT interaction_id, raw_transcript FROM hcpinteraction "
+            "WHERE raw_transcript IS NOT NULL AND raw_transcript <> ''"
+            + (" AND interaction_id > :last_id" if last_id is not None else "")
+            + " ORDER BY interaction_id LIMIT :limit"
+        )
+        rows = conn.execute(query, {"last_id": last_id, "limit": batch_size}).all()
+        if not rows:
+            break
+        digests = store_transcripts_sync(conn, [row.raw_transcript for row in rows])
+        conn.execute(
+            text("UPDATE hcpinteraction SET transcript_digest = :b_digest WHERE interaction_id = :b_id"),
+            [{"b_digest": digest, "b_id": row.interaction_id} for row, digest in zip(rows, digests)],
+        )
+        last_id = rows[-1].interaction_id
+    conn.execute(text("ALTER TABLE hcpinteraction DROP COLUMN raw_transcript"))
+    ensure_search_index(conn)
+
+
+def _search_documents(conn: Connection):
+    # The SQLite FTS table of step 7 was keyed by hcpinteraction's implicit rowid,
+    # which VACUUM may renumber. ensure_search_index() rebuilds an FTS table that
+    # has no document table; one built by step 7 with this code is left as is.
+    if conn.dialect.name == "sqlite":
+        ensure_search_index(conn)
+
+
+def _canonical_hcp_names(conn: Connection):
+    # Live writes store the display name of the linked HCP as hcp_name, but step 6
+    # left older rows as written, so one HCP's history was split by spelling in
+    # the rollups, duplicate detection, the hcp_name filter and exports. Rewrite
+    # linked rows to the display name, then recompute what is derived from it:
+    # content hashes (rows that now repeat an older one keep NULL, as in step 3)
+    # and the rollups.
+    hcps, interactions = HCP.__table__, HCPInteraction.__table__
+    renamed = conn.execute(
+        update(interactions)
+        .where(interactions.c.hcp_id == hcps.c.hcp_id, interactions.c.hcp_name != hcps.c.name)
+        .values(hcp_name=hcps.c.name)
+    ).rowcount
+    if not renamed:
+        return
+    conn.execute(update(interactions).values(content_hash=None))
+    _backfill_content_hashes(conn)
+    rebuild_rollups(conn)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline: hcpinteraction table, indexes and full-text search", _baseline),
+    (2, "followuptask table with scheduler and assignee indexes", _follow_up_tasks),
+    (3, "hcpinteraction idempotency_key and content_hash with unique indexes", _idempotency),
+    (4, "interactionlistitem table for list-field membership queries, backfilled", _list_items),
+    (5, "per-HCP / per-rep analytics rollup tables, built from existing interactions", _rollups),
+    (6, "hcp master table and hcpinteraction.hcp_id, linked by name resolution", _hcp_master),
+    (7, "compressed content-addressed transcript store replacing hcpinteraction.raw_transcript", _transcript_store),
+    (8, "SQLite full-text index keyed by a stable document id instead of hcpinteraction rowid", _search_documents),
+    (9, "hcpinteraction.hcp_name rewritten to the linked HCP's display name, hashes and rollups rebuilt", _canonical_hcp_names),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(text("SELECT version FROM schema_version")).scalar() or 0
+
+
+# -------------------------------------------------------
+# Bootstrap lock
+# -------------------------------------------------------
+# Every worker process migrates on startup. The first one to find the schema
+# behind takes this lock for the rest of the boot transaction; the others block
+# on it, then re-read the version and find nothing left to do.
+# Postgres: a transaction-level advisory lock.
+# SQLite:   the database write lock (BEGIN IMMEDIATE), waited for with a busy
+#           timeout long enough to outlast a migration.
+
+MIGRATION_LOCK_ID = 0x4149564F  # pg_advisory_xact_lock key, any bigint unique to this app
+SQLITE_LOCK_TIMEOUT_MS = 600_000
+
+
+def lock_migrations(conn: Connection):
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+    elif dialect == "sqlite":
+        busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+        conn.exec_driver_sql(f"PRAGMA busy_timeout = {SQLITE_LOCK_TIMEOUT_MS}")
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {busy_timeout}")
+
+
+def run_migrations(conn: Connection) -> int:
+    """Applies pending migrations in order and returns the number applied."""
+    if current_version(conn) >= LATEST_VERSION:
+        return 0
+
+    lock_migrations(conn)
+    version = current_version(conn)  # another worker may have migrated while we waited
+    if version >= LATEST_VERSION:
+        return 0
+
+    if version == 0:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+        conn.execute(text("DELETE FROM schema_version"))
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (0)"))
+
+    applied = 0
+    for step, description, upgrade in MIGRATIONS:
+        if step <= version:
+            continue
+        upgrade(conn)
+        conn.execute(text("UPDATE schema_version SET version = :v"), {"v": step})
+        applied += 1
+    return applied
@@ -0,0 +1,122 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from config import settings
+
+
+# -------------------------------------------------------
+# Instrumented pool
+# -------------------------------------------------------
+# QueuePool already knows its size / checked-out / overflow counts; what it does
+# not expose is how long callers wait for a connection. The checkout path
+# (_do_get) is timed here so pool sizing can be based on observed wait times.
+
+class PoolWaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        if timed_out:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # Pools are recreated on dispose(); carry the counters over
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+# -------------------------------------------------------
+# Engine options
+# -------------------------------------------------------
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """create_async_engine() keyword arguments for the configured pool."""
+    url = make_url(database_url)
+    options: Dict[str, Any] = {
+        "echo": False,
+        # Validates a connection on checkout, so connections broken by a
+        # failover are replaced instead of failing the request
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+    # In-memory SQLite uses a StaticPool (one shared connection); nothing to size
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+
+    if url.get_driver_name() == "asyncpg":
+        # statement_cache_size is asyncpg's per-connection prepared statement LRU;
+        # prepared_statement_cache_size is SQLAlchemy's adapter cache on top of it.
+        # Set 0 behind PgBouncer in transaction mode.
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            # Timestamps are bound as UTC timestamptz; in a UTC session they are also
+            # stored unshifted in the TIMESTAMP (without time zone) columns of older tables
+            "server_settings": {"timezone": "UTC"},
+        }
+
+    return options
+
+
+def pool_status(pool) -> dict:
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # Negative while the pool has not yet opened pool_size connections
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(wait_stats.as_dict())
+    return status
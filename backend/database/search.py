@@ -0,0 +1,170 @@
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from sqlalchemy import bindparam, inspect, text, Uuid
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.elements import TextClause
+
+from services.transcripts import decode_transcript, transcript_digest
+
+
+# -------------------------------------------------------
+# Full-text index over outcomes + transcript
+# -------------------------------------------------------
+# Transcripts live compressed in the transcript table (services/transcripts.py),
+# so the index of an interaction is built from its outcomes plus its transcript:
+# Postgres: a tsvector column maintained by a BEFORE INSERT/UPDATE trigger that
+#           combines the outcomes with the tsvector stored once per transcript
+#           (transcript.search_vector, written with the transcript), plus a GIN
+#           index on it.
+# SQLite:   a contentless FTS5 table written by the application together with
+#           the interaction (index_for_search), since the transcript text is not
+#           readable from SQL. Its rowid is the docid of a document table that
+#           maps it to the interaction_id (hcpinteraction has no integer key, and
+#           its implicit rowid may change on VACUUM) and records what was indexed:
+#           a contentless table can only remove a row given the same values, which
+#           is how an interaction indexed again replaces its previous entry.
+# Every statement is idempotent, so this runs safely on each startup and also
+# upgrades tables created before search existed.
+
+FTS_TABLE = "hcpinteraction_fts"
+FTS_DOC_TABLE = "hcpinteraction_fts_doc"
+
+POSTGRES_TRANSCRIPT_COLUMN = "ALTER TABLE transcript ADD COLUMN IF NOT EXISTS search_vector tsvector"
+
+POSTGRES_DDL = [
+    "ALTER TABLE hcpinteraction ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    POSTGRES_TRANSCRIPT_COLUMN,
+    """
+    CREATE OR REPLACE FUNCTION hcpinteraction_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := setweight(to_tsvector('english', coalesce(NEW.outcomes, '')), 'A') ||
+            coalesce((SELECT t.search_vector FROM transcript t WHERE t.digest = NEW.transcript_digest), ''::tsvector);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS hcpinteraction_search_vector ON hcpinteraction",
+    """
+    CREATE TRIGGER hcpinteraction_search_vector BEFORE INSERT OR UPDATE OF outcomes, transcript_digest
+    ON hcpinteraction FOR EACH ROW EXECUTE FUNCTION hcpinteraction_search_vector()
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_hcpinteraction_search_vector ON hcpinteraction USING GIN (search_vector)",
+]
+
+# Fills search_vector for rows stored before the column existed (fires the trigger)
+POSTGRES_BACKFILL = "UPDATE hcpinteraction SET outcomes = outcomes"
+
+SQLITE_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {FTS_DOC_TABLE} (
+        docid INTEGER PRIMARY KEY,
+        interaction_id CHAR(32) NOT NULL UNIQUE,
+        outcomes VARCHAR NOT NULL,
+        transcript_digest VARCHAR
+    )
+    """,
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(outcomes, transcript, content='')",
+]
+
+# What is indexed for some interactions (param: interaction_ids)
+SQLITE_INDEXED = text(
+    f"SELECT d.docid, d.interaction_id, d.outcomes, t.codec, t.data FROM {FTS_DOC_TABLE} d "
+    "LEFT JOIN transcript t ON t.digest = d.transcript_digest WHERE d.interaction_id IN :interaction_ids"
+).bindparams(bindparam("interaction_ids", type_=Uuid, expanding=True)).columns(interaction_id=Uuid)
+
+# Removes an indexed entry, given the values it was indexed with
+_SQLITE_UNINDEX = text(
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, outcomes, transcript) VALUES ('delete', :docid, :outcomes, :transcript)"
+)
+
+_SQLITE_UPSERT_DOC = text(
+    f"INSERT INTO {FTS_DOC_TABLE}(interaction_id, outcomes, transcript_digest) "
+    "VALUES (:interaction_id, :outcomes, :transcript_digest) ON CONFLICT (interaction_id) "
+    "DO UPDATE SET outcomes = excluded.outcomes, transcript_digest = excluded.transcript_digest"
+).bindparams(bindparam("interaction_id", type_=Uuid))
+
+_SQLITE_INDEX = text(
+    f"INSERT INTO {FTS_TABLE}(rowid, outcomes, transcript) "
+    f"SELECT docid, :outcomes, :transcript FROM {FTS_DOC_TABLE} WHERE interaction_id = :interaction_id"
+).bindparams(bindparam("interaction_id", type_=Uuid))
+
+
+def sqlite_index_statements(
+    rows: Sequence[Mapping[str, Any]], indexed: Sequence[Any]
+) -> List[Tuple[TextClause, List[Dict[str, Any]]]]:
+    """
+    Statements (with executemany parameters) that index `rows` (interaction_id,
+    outcomes, transcript), replacing the entries of those already `indexed`
+    (rows of SQLITE_INDEXED).
+    """
+    statements = []
+    if indexed:
+        statements.append((_SQLITE_UNINDEX, [
+            {"docid": doc.docid, "outcomes": doc.outcomes,
+             "transcript": decode_transcript(doc.codec, doc.data) if doc.data is not None else None}
+            for doc in indexed
+        ]))
+    statements.append((_SQLITE_UPSERT_DOC, [
+        {"interaction_id": row["interaction_id"], "outcomes": row["outcomes"],
+         "transcript_digest": transcript_digest(row["transcript"]) if row["transcript"] else None}
+        for row in rows
+    ]))
+    statements.append((_SQLITE_INDEX, [
+        {"interaction_id": row["interaction_id"], "outcomes": row["outcomes"], "transcript": row["transcript"]}
+        for row in rows
+    ]))
+    return statements
+
+# Search artifacts of the inline raw_transcript layout, dropped by migration 7
+LEGACY_DDL = {
+    "postgresql": ["ALTER TABLE hcpinteraction DROP COLUMN IF EXISTS search_vector"],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS hcpinteraction_fts_ai",
+        "DROP TRIGGER IF EXISTS hcpinteraction_fts_ad",
+        "DROP TRIGGER IF EXISTS hcpinteraction_fts_au",
+        f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    ],
+}
+
+def _backfill_sqlite(conn: Connection, batch_size: int = 1000):
+    last_id = None
+    while True:
+        query = text(
+            "SELECT h.interaction_id, h.outcomes, t.codec, t.data FROM hcpinteraction h "
+            "LEFT JOIN transcript t ON t.digest = h.transcript_digest"
+            + (" WHERE h.interaction_id > :last_id" if last_id is not None else "")
+            + " ORDER BY h.interaction_id LIMIT :limit"
+        ).columns(interaction_id=Uuid)
+        if last_id is not None:
+            query = query.bindparams(bindparam("last_id", last_id, type_=Uuid))
+        rows = conn.execute(query, {"limit": batch_size}).all()
+        if not rows:
+            break
+        for statement, params in sqlite_index_statements([
+            {"interaction_id": row.interaction_id, "outcomes": row.outcomes,
+             "transcript": decode_transcript(row.codec, row.data) if row.data is not None else None}
+            for row in rows
+        ], []):
+            conn.execute(statement, params)
+        last_id = rows[-1].interaction_id
+
+
+def ensure_search_index(conn: Connection):
+    """Creates (or upgrades to) the full-text index for the connected dialect."""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        is_new = "search_vector" not in {c["name"] for c in inspect(conn).get_columns("hcpinteraction")}
+        for ddl in POSTGRES_DDL:
+            conn.execute(text(ddl))
+        if is_new:
+            conn.execute(text(POSTGRES_BACKFILL))
+    elif dialect == "sqlite":
+        is_new = not inspect(conn).has_table(FTS_DOC_TABLE)
+        if is_new:
+            # An FTS table without documents is keyed by hcpinteraction rowid: rebuild it
+            conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        for ddl in SQLITE_DDL:
+            conn.execute(text(ddl))
+        if is_new:
+            # Index rows that were inserted before the FTS table existed
+            _backfill_sqlite(conn)
@@ -3,18 +3,26 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.orm import sessionmaker
+import asyncio
 from typing import AsyncGenerator
+from sqlalchemy import text
 
 from config import settings
 from models.database import HCPInteraction
+from database.migrations import run_migrations
+from database.pool import engine_options, pool_status
+from observability.log import get_logger
+from observability.metrics import instrument_engine
 
+logger = get_logger(__name__)
 
-# 1. Create Async Engine
+
+# 1. Create Async Engine (pool sizing, pre-ping and statement caching come from Settings)
 async_engine: AsyncEngine = create_async_engine(
     settings.DATABASE_URL,
-    echo=False,
-    future=True
+    **engine_options(settings.DATABASE_URL)
 )
+instrument_engine(async_engine.sync_engine)
 
 
 # 2. Async session factory
@@ -25,13 +33,34 @@ async_session_factory = sessionmaker(
 )
 
 
-# 3. Create tables on startup
+# 3. Bring the schema up to date on startup (no DDL when it already is)
 async def create_db_and_tables():
     async with async_engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+        applied = await conn.run_sync(run_migrations)
+    if applied:
+        logger.info("Applied %d schema migration(s)", applied)
+
+
+# 4. Open pool connections up front so the first requests do not pay for connect + auth
+async def warm_db_pool(connections: int = settings.DB_POOL_SIZE):
+    async def _open():
+        conn = await async_engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    conns = await asyncio.gather(*(_open() for _ in range(connections)), return_exceptions=True)
+    for conn in conns:
+        if isinstance(conn, BaseException):
+            logger.warning("DB pool warm-up: connection failed: %s", conn)
+        else:
+            await conn.close()  # returned to the pool, not closed
+
+
+def get_pool_status() -> dict:
+    return pool_status(async_engine.pool)
 
 
-# 4. Dependency for FastAPI routes
+# 5. Dependency for FastAPI routes
 async def get_db_session() -> AsyncGenerator:
     async with async_session_factory() as session:
         try:
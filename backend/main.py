@@ -1,20 +1,41 @@
-import uvicorn
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from api import interactions, agent
+from api import interactions, agent, compliance, tasks, export, analytics, hcps, internal
 from config import settings
-from database.setup import create_db_and_tables
+from database.setup import create_db_and_tables, warm_db_pool
+from services.compliance import compliance_checker
+from services.task_scheduler import task_scheduler
+from observability.log import configure_logging, get_logger
+from observability.metrics import MetricsMiddleware, mark_worker_exit, render_metrics
+
+configure_logging()
+logger = get_logger(__name__)
 
 # 1. Lifespan Context Manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Application startup: Creating database tables...")
+    logger.info("Application startup: Applying schema migrations...")
     await create_db_and_tables()
-    print("Database ready. Starting application...")
+    await warm_db_pool()
+    # Compile the compliance rule set once, before the first request needs it
+    compliance_checker.reload()
+    if settings.TASK_SCHEDULER_ENABLED:
+        task_scheduler.start()
+    # The agent is built lazily; optionally warm it up in the background once serving
+    preload = asyncio.create_task(agent.preload_agent()) if settings.AGENT_PRELOAD else None
+    # Open chat streams start draining as soon as the server is told to stop
+    agent.drain_on_exit_signal()
+    logger.info("Database ready. Starting application...")
     yield
-    print("Application shutdown complete.")
+    if preload is not None and not preload.done():
+        preload.cancel()
+    await task_scheduler.stop()
+    await agent.shutdown_agent()
+    mark_worker_exit()
+    logger.info("Application shutdown complete.")
 
 # 2. FastAPI Initialization
 app = FastAPI(
@@ -32,14 +53,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms (pure ASGI middleware, does not buffer SSE)
+app.add_middleware(MetricsMiddleware)
+
 # 4. Include API Routers
 app.include_router(interactions.router, prefix=settings.API_V1_STR + "/interactions", tags=["Interactions"])
 app.include_router(agent.router, prefix=settings.API_V1_STR + "/agent", tags=["Agent"])
+app.include_router(tasks.router, prefix=settings.API_V1_STR + "/tasks", tags=["Tasks"])
+app.include_router(export.router, prefix=settings.API_V1_STR + "/export", tags=["Export"])
+app.include_router(hcps.router, prefix=settings.API_V1_STR + "/hcps", tags=["HCPs"])
+app.include_router(analytics.router, prefix=settings.API_V1_STR + "/analytics", tags=["Analytics"])
+app.include_router(compliance.router, prefix=settings.API_V1_STR + "/compliance", tags=["Compliance"])
+app.include_router(internal.router, prefix="/internal", tags=["Internal"], include_in_schema=False)
 
 # 5. Root Endpoint (Sanity check)
 @app.get("/")
 def read_root():
     return {"message": "AI-First HCP CRM API is running."}
 
+# 6. Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Multi-worker serving with stream draining; see server.py
+    from server import serve
+
+    serve()
\ No newline at end of file
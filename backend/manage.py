@@ -0,0 +1,156 @@
+"""
+Maintenance commands (run from backend/).
+
+    python manage.py export --out exports/2024 --format parquet --compression zstd --date-from 2024-01-01
+    python manage.py export --out exports/2024 --resume
+    python manage.py rebuild-rollups
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+
+
+# -------------------------------------------------------
+# export
+# -------------------------------------------------------
+# Writes numbered part files plus manifest.json into --out. A part is recorded
+# in the manifest (with the resume cursor after its last row) only once it is
+# closed, so every listed part is a complete, readable file. --resume deletes an
+# unfinished part and continues from the manifest's cursor with its options.
+
+def _write_manifest(path: str, manifest: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+async def export(args):
+    from database.setup import async_session_factory
+    from services.export import ExportWriter, iter_export_batches, batch_cursor
+    from services.interactions import decode_cursor
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest_path = os.path.join(args.out, "manifest.json")
+
+    if args.resume:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["complete"]:
+            print(f"export in {args.out} is already complete")
+            return
+        listed = {part["file"] for part in manifest["parts"]}
+        for name in os.listdir(args.out):
+            if name.startswith("interactions-") and name not in listed:
+                os.remove(os.path.join(args.out, name))  # interrupted part
+    else:
+        if os.path.exists(manifest_path):
+            sys.exit(f"{manifest_path} exists; pass --resume or choose another --out")
+        manifest = {
+            "format": args.format,
+            "compression": args.compression,
+            "filters": {"hcp_name": args.hcp, "date_from": args.date_from, "date_to": args.date_to},
+            "rows_per_file": args.rows_per_file,
+            "parts": [],
+            "cursor": None,
+            "complete": False,
+        }
+        _write_manifest(manifest_path, manifest)
+
+    filters = manifest["filters"]
+    after = decode_cursor(manifest["cursor"]) if manifest["cursor"] else None
+
+    writer = part = None
+    part_rows = 0
+
+    def open_part():
+        nonlocal writer, part, part_rows
+        writer = ExportWriter(manifest["format"], manifest["compression"])
+        name = f"interactions-{len(manifest['parts']) + 1:05d}.{writer.extension}"
+        part = open(os.path.join(args.out, name), "wb")
+        part.write(writer.header())
+        part_rows = 0
+
+    def close_part(cursor: str):
+        nonlocal writer, part
+        part.write(writer.finish())
+        part.close()
+        manifest["parts"].append({"file": os.path.basename(part.name), "rows": part_rows})
+        manifest["cursor"] = cursor
+        _write_manifest(manifest_path, manifest)
+        print(f"wrote {part.name} ({part_rows} rows)")
+        writer = part = None
+
+    cursor = None
+    async with async_session_factory() as session:
+        async for batch in iter_export_batches(
+            session,
+            hcp_name=filters["hcp_name"],
+            date_from=date.fromisoformat(filters["date_from"]) if filters["date_from"] else None,
+            date_to=date.fromisoformat(filters["date_to"]) if filters["date_to"] else None,
+            after=after,
+            batch_size=args.batch_size,
+        ):
+            if part is None:
+                open_part()
+            part.write(writer.write(batch))
+            part_rows += len(batch)
+            cursor = batch_cursor(batch)
+            if part_rows >= manifest["rows_per_file"]:
+                close_part(cursor)
+
+    if part is not None:
+        close_part(cursor)
+    manifest["complete"] = True
+    _write_manifest(manifest_path, manifest)
+    print(f"export complete: {sum(p['rows'] for p in manifest['parts'])} rows in {len(manifest['parts'])} file(s)")
+
+
+# -------------------------------------------------------
+# rebuild-rollups
+# -------------------------------------------------------
+# Recomputes the analytics rollups from hcpinteraction in one transaction, e.g.
+# after interactions were loaded or repaired outside the API. Safe while serving.
+
+async def rebuild(args):
+    from database.setup import async_engine
+    from services.rollups import rebuild_rollups
+
+    async with async_engine.begin() as conn:
+        scanned = await conn.run_sync(rebuild_rollups, args.batch_size)
+    print(f"rebuilt rollups from {scanned} interactions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("export", help="dump interactions to NDJSON/CSV/Parquet part files")
+    p.add_argument("--out", required=True, help="output directory (holds part files and manifest.json)")
+    p.add_argument("--format", choices=["ndjson", "csv", "parquet"], default="ndjson")
+    p.add_argument("--compression", choices=["none", "gzip", "zstd"], default="none")
+    p.add_argument("--hcp", help="only this HCP")
+    p.add_argument("--date-from", help="YYYY-MM-DD (inclusive)")
+    p.add_argument("--date-to", help="YYYY-MM-DD (inclusive)")
+    p.add_argument("--rows-per-file", type=int, default=1_000_000)
+    p.add_argument("--batch-size", type=int, default=None, help="rows per cursor fetch (default EXPORT_BATCH_SIZE)")
+    p.add_argument("--resume", action="store_true", help="continue an interrupted export in --out")
+
+    p = commands.add_parser("rebuild-rollups", help="recompute the analytics rollup tables from scratch")
+    p.add_argument("--batch-size", type=int, default=5000)
+
+    args = parser.parse_args()
+    if args.command == "rebuild-rollups":
+        asyncio.run(rebuild(args))
+    elif args.command == "export":
+        if args.batch_size is None:
+            from config import settings
+            args.batch_size = settings.EXPORT_BATCH_SIZE
+        asyncio.run(export(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,58 @@
-from sqlmodel import SQLModel, Field, Column, JSON
-from datetime import date, datetime
+from sqlmodel import SQLModel, Field, Column, JSON, Index, LargeBinary, Relationship
+from datetime import date, datetime, timezone
 from typing import List, Optional
 from uuid import UUID, uuid4
 
+
+def utcnow() -> datetime:
+    # Timestamps are UTC and timezone-aware: sqlmodel's datetime columns reject naive values
+    return datetime.now(timezone.utc)
+
+
+class HCP(SQLModel, table=True):
+    # HCP master: one row per physician, keyed by the normalized name that the
+    # resolver (services/hcp_directory.py) matches free-text names against.
+    __table_args__ = (
+        Index("ux_hcp_normalized_name", "normalized_name", unique=True),
+        Index("ix_hcp_created_at", "created_at"),
+    )
+
+    hcp_id: UUID = Field(default_factory=uuid4, primary_key=True)
+    name: str  # display name, as first seen
+    normalized_name: str
+    created_at: datetime = Field(default_factory=utcnow)
+
+
+class Transcript(SQLModel, table=True):
+    # Content-addressed transcript store (services/transcripts.py): keyed by the
+    # sha256 of the text, so identical transcripts are stored once, and kept
+    # compressed outside the interaction row.
+    digest: str = Field(primary_key=True)
+    codec: str  # zstd | zlib | none
+    size: int  # uncompressed UTF-8 bytes
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    created_at: datetime = Field(default_factory=utcnow)
+
+
 class HCPInteraction(SQLModel, table=True):
+    # Composite indexes end in (interaction_date, interaction_id) so every filter
+    # can be served in keyset order (newest first) straight from the index.
+    __table_args__ = (
+        Index("ix_hcpinteraction_date_id", "interaction_date", "interaction_id"),
+        Index("ix_hcpinteraction_hcp_date_id", "hcp_name", "interaction_date", "interaction_id"),
+        Index("ix_hcpinteraction_type_date_id", "interaction_type", "interaction_date", "interaction_id"),
+        Index("ix_hcpinteraction_sentiment_date_id", "sentiment", "interaction_date", "interaction_id"),
+        Index("ix_hcpinteraction_hcp_id_date_id", "hcp_id", "interaction_date", "interaction_id"),
+        Index("ix_hcpinteraction_created_at", "created_at"),
+        Index("ix_hcpinteraction_transcript_digest", "transcript_digest"),
+        # Idempotent writes (services/interactions.py); NULLs never collide
+        Index("ux_hcpinteraction_idempotency_key", "idempotency_key", unique=True),
+        Index("ux_hcpinteraction_content_hash", "content_hash", unique=True),
+    )
+
     interaction_id: UUID = Field(default_factory=uuid4, primary_key=True)
     hcp_name: str
+    hcp_id: Optional[UUID] = Field(default=None, foreign_key="hcp.hcp_id")  # resolved HCP master row
     interaction_type: str
     interaction_date: date
 
@@ -18,6 +65,96 @@ class HCPInteraction(SQLModel, table=True):
     outcomes: str
 
     follow_up_actions: List[str] = Field(default_factory=list, sa_column=Column(JSON))
-    raw_transcript: Optional[str] = None
+    # Never loaded with the row: select it explicitly with selectinload(HCPInteraction.transcript)
+    transcript_digest: Optional[str] = Field(default=None, foreign_key="transcript.digest")
+    transcript: Optional[Transcript] = Relationship(sa_relationship_kwargs={"lazy": "raise"})
+
+    idempotency_key: Optional[str] = None
+    content_hash: Optional[str] = None  # sha256 of HCP, date, type and normalized outcomes
+
+    created_at: datetime = Field(default_factory=utcnow)
+
+
+class InteractionListItem(SQLModel, table=True):
+    # One row per element of an interaction's list fields (attendees, topics_discussed,
+    # materials_shared, samples_distributed, follow_up_actions). The JSON columns
+    # stay the read copy; this table makes "which interactions contain X" an index
+    # lookup on (field, value) instead of decoding JSON for every row.
+    __table_args__ = (
+        Index("ix_interactionlistitem_field_value", "field", "value", "interaction_id"),
+    )
+
+    interaction_id: UUID = Field(foreign_key="hcpinteraction.interaction_id", primary_key=True)
+    field: str = Field(primary_key=True)
+    position: int = Field(primary_key=True)
+    value: str
+
+
+class RollupCounters(SQLModel):
+    """Counters shared by the analytics rollup tables (services/rollups.py)."""
+
+    interactions: int = 0
+    meetings: int = 0
+    calls: int = 0
+    emails: int = 0
+    positive: int = 0
+    neutral: int = 0
+    negative: int = 0
+    materials_shared: int = 0  # list elements, not interactions
+    samples_distributed: int = 0
+
+
+class InteractionDailyRollup(RollupCounters, table=True):
+    # dimension is "hcp" (key = hcp_name) or "rep" (key = one of the attendees);
+    # the primary key makes a dashboard's trend window one range scan.
+    dimension: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+
+
+class InteractionRollupSummary(RollupCounters, table=True):
+    __table_args__ = (
+        Index("ix_interactionrollupsummary_dimension_last_contact", "dimension", "last_contact"),
+    )
+
+    dimension: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    first_contact: date
+    last_contact: date
+
+
+class InteractionRollupItem(SQLModel, table=True):
+    # Running totals per material / sample for each HCP and rep
+    dimension: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    field: str = Field(primary_key=True)  # materials_shared | samples_distributed
+    value: str = Field(primary_key=True)
+    total: int = 0
+
+
+class FollowUpTask(SQLModel, table=True):
+    # The scheduler only ever reads pending tasks in reminder order, so
+    # (status, remind_at) turns its look-ahead window into an index range scan.
+    __table_args__ = (
+        Index("ix_followuptask_status_remind_at", "status", "remind_at"),
+        Index("ix_followuptask_assignee_due", "assigned_user_id", "due_date"),
+    )
+
+    task_id: UUID = Field(default_factory=uuid4, primary_key=True)
+    task_description: str
+    due_date: date
+    priority: str = "Medium"
+    assigned_user_id: str
+    interaction_id: Optional[UUID] = Field(default=None, foreign_key="hcpinteraction.interaction_id")
+
+    # pending -> reminded -> done (or pending -> done)
+    status: str = "pending"
+    remind_at: datetime  # UTC
+    reminded_at: Optional[datetime] = None
+
+    # Row lease held by the scheduler worker delivering the reminder
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+
+    created_at: datetime = Field(default_factory=utcnow)
 
-    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -24,15 +24,77 @@ class LogInteractionSchema(BaseSchema):
 
 
 class HCPInteractionCreate(LogInteractionSchema):
-    pass
+    # Optional: an id picked from /hcps/resolve; otherwise hcp_name is resolved on write
+    hcp_id: Optional[UUID] = None
+    raw_transcript: Optional[str] = None  # stored compressed in the transcript table
 
 
 class HCPInteractionRead(LogInteractionSchema):
     interaction_id: UUID
-    raw_transcript: Optional[str] = None
+    hcp_id: Optional[UUID] = None
+    transcript_digest: Optional[str] = None
+    raw_transcript: Optional[str] = None  # only filled when requested (include_transcript=true)
     created_at: datetime
 
 
+class InteractionPage(BaseSchema):
+    items: List[HCPInteractionRead]
+    next_cursor: Optional[str] = None
+
+
+class SearchHit(BaseSchema):
+    interaction_id: UUID
+    hcp_name: str
+    interaction_date: date
+    interaction_type: str
+    rank: float
+    snippet: str
+
+
+class SearchResponse(BaseSchema):
+    query: str
+    limit: int
+    offset: int
+    items: List[SearchHit]
+
+
+# ------------------ BULK INGEST ------------------
+
+class BulkRowResult(BaseSchema):
+    index: int
+    status: Literal["created", "duplicate", "error"]
+    interaction_id: Optional[UUID] = None
+    errors: List[str] = Field(default_factory=list)
+
+
+class BulkIngestResponse(BaseSchema):
+    received: int
+    created: int
+    duplicates: int = 0
+    failed: int
+    results: List[BulkRowResult]
+
+
+# ------------------ COMPLIANCE ------------------
+
+class ComplianceFlag(BaseSchema):
+    interaction_id: UUID
+    status: Literal["Pass", "Warning", "Fail"]
+    details: str
+    risk_score: int
+
+
+class ComplianceRescreenResponse(BaseSchema):
+    rule_version: str
+    scanned: int
+    passed: int
+    warnings: int
+    failed: int
+    flagged: List[ComplianceFlag]
+    seconds: float
+    records_per_sec: float
+
+
 # ------------------ TOOL SCHEMAS ------------------
 
 class InteractionUpdateSchema(BaseSchema):
@@ -69,3 +131,77 @@ class ComplianceReport(BaseSchema):
 class SearchResult(BaseSchema):
     summary: str
     source_documents: List[str]
+
+
+# ------------------ FOLLOW-UP TASKS ------------------
+
+class FollowUpTaskCreate(ScheduleTaskSchema):
+    interaction_id: Optional[UUID] = None
+    # UTC; defaults to TASK_DEFAULT_REMINDER_HOUR on the due date
+    remind_at: Optional[datetime] = None
+
+
+class FollowUpTaskRead(ScheduleTaskSchema):
+    task_id: UUID
+    interaction_id: Optional[UUID] = None
+    status: Literal["pending", "reminded", "done"]
+    remind_at: datetime
+    reminded_at: Optional[datetime] = None
+    created_at: datetime
+
+
+class FollowUpTaskPage(BaseSchema):
+    items: List[FollowUpTaskRead]
+    next_cursor: Optional[str] = None
+
+
+# ------------------ ANALYTICS ROLLUPS ------------------
+
+class RollupCounts(BaseSchema):
+    interactions: int
+    meetings: int
+    calls: int
+    emails: int
+    positive: int
+    neutral: int
+    negative: int
+    materials_shared: int
+    samples_distributed: int
+
+
+class RollupDay(RollupCounts):
+    day: date
+
+
+class RollupSummary(RollupCounts):
+    dimension: Literal["hcp", "rep"]
+    key: str
+    first_contact: date
+    last_contact: date
+    days_since_last_contact: int
+
+
+class RollupItemTotal(BaseSchema):
+    value: str
+    total: int
+
+
+class RollupDashboard(BaseSchema):
+    summary: RollupSummary
+    daily: List[RollupDay]
+    materials: List[RollupItemTotal]
+    samples: List[RollupItemTotal]
+
+
+# ------------------ HCP DIRECTORY ------------------
+
+class HCPCandidate(BaseSchema):
+    hcp_id: UUID
+    name: str
+    score: float
+
+
+class HCPResolveResponse(BaseSchema):
+    query: str
+    normalized: str
+    candidates: List[HCPCandidate]
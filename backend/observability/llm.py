@@ -0,0 +1,51 @@
+import time
+from typing import Any, Dict
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from observability.metrics import LLM_ERRORS, LLM_REQUEST_SECONDS, LLM_TOKENS
+
+
+# -------------------------------------------------------
+# LLM (LangChain callback)
+# -------------------------------------------------------
+# Kept apart from metrics.py so the HTTP layer does not import LangChain.
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records latency and token usage of every chat model call it is attached to."""
+
+    # Runs in the caller's task instead of a thread pool; the handlers only touch counters
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[UUID, tuple] = {}
+
+    def _model(self, serialized: Dict[str, Any], kwargs: Dict[str, Any]) -> str:
+        params = kwargs.get("invocation_params") or {}
+        return params.get("model") or params.get("model_name") or (serialized or {}).get("name", "unknown")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = (time.perf_counter(), self._model(serialized, kwargs))
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = (time.perf_counter(), self._model(serialized, kwargs))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        start, model = self._started.pop(run_id, (None, "unknown"))
+        if start is not None:
+            LLM_REQUEST_SECONDS.labels(model).observe(time.perf_counter() - start)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.labels(model, "prompt").inc(usage.get("input_tokens", 0))
+                    LLM_TOKENS.labels(model, "completion").inc(usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        _, model = self._started.pop(run_id, (None, "unknown"))
+        LLM_ERRORS.labels(model).inc()
+
+
+llm_metrics_callback = LLMMetricsCallback()
@@ -0,0 +1,44 @@
+import logging
+import random
+from contextvars import ContextVar
+
+from config import settings
+
+
+# Set by stream_output for the duration of an agent run, so every log line and
+# trace span of that run can be correlated by thread_id
+current_thread_id: ContextVar[str] = ContextVar("current_thread_id", default="-")
+
+
+class ContextFilter(logging.Filter):
+    """
+    Adds `thread_id` to every record and samples chatty levels: records below
+    WARNING pass with probability LOG_SAMPLE_RATE, warnings and errors always pass.
+    """
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.thread_id = current_thread_id.get()
+        if record.levelno >= logging.WARNING or self.sample_rate >= 1.0:
+            return True
+        return random.random() < self.sample_rate
+
+
+def configure_logging():
+    """Installs one handler on the root logger (idempotent). Level and sampling come from Settings."""
+    root = logging.getLogger()
+    if any(getattr(h, "_crm_handler", False) for h in root.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler._crm_handler = True
+    handler.addFilter(ContextFilter(settings.LOG_SAMPLE_RATE))
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [thread=%(thread_id)s] %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,156 @@
+import functools
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from observability.tracing import span
+
+
+# -------------------------------------------------------
+# Metric definitions
+# -------------------------------------------------------
+# With several workers (server.py), PROMETHEUS_MULTIPROC_DIR is set before they
+# start: each process writes its samples to files there and /metrics aggregates
+# all of them, whichever worker serves the scrape. Gauges only count live
+# processes: queue depths are summed, the scheduler window (the same tasks in
+# every worker) is the largest one.
+
+# Seconds; covers sub-millisecond DB calls up to slow LLM round trips
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency (until the last body byte)",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+SSE_TTFB_SECONDS = Histogram(
+    "sse_time_to_first_event_seconds", "Time from request to the first SSE data event",
+    buckets=LATENCY_BUCKETS,
+)
+GRAPH_NODE_SECONDS = Histogram(
+    "agent_node_duration_seconds", "LangGraph node execution time", ["node"], buckets=LATENCY_BUCKETS,
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "LLM call latency", ["model"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by kind (prompt/completion)", ["model", "kind"])
+LLM_ERRORS = Counter("llm_errors_total", "Failed LLM calls", ["model"])
+LLM_QUEUE_DEPTH = Gauge("llm_gateway_queue_depth", "LLM calls waiting for admission", multiprocess_mode="livesum")
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_gateway_queue_wait_seconds", "Time an LLM call waited for admission", ["priority"], buckets=LATENCY_BUCKETS,
+)
+LLM_SHED = Counter("llm_gateway_shed_total", "LLM calls rejected by the gateway", ["reason"])
+LLM_RETRIES = Counter("llm_gateway_retries_total", "LLM call retries", ["reason"])
+LLM_COALESCED = Counter("llm_gateway_coalesced_total", "LLM calls served by an identical in-flight call")
+TOOL_SECONDS = Histogram(
+    "agent_tool_duration_seconds", "Agent tool call latency", ["tool"], buckets=LATENCY_BUCKETS,
+)
+TOOL_ERRORS = Counter("agent_tool_errors_total", "Failed agent tool calls", ["tool", "kind"])
+TASK_REMINDERS = Counter("task_reminders_total", "Follow-up task reminders delivered by this worker")
+TASK_SCHEDULER_HEAP = Gauge(
+    "task_scheduler_heap_size", "Pending tasks held in the scheduler's look-ahead window", multiprocess_mode="livemax",
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ["operation"], buckets=LATENCY_BUCKETS,
+)
+
+
+def render_metrics():
+    """Prometheus text exposition of the default registry, or of all workers in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_worker_exit():
+    """Drops this worker's live gauge samples from the multiprocess aggregate."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+# -------------------------------------------------------
+# HTTP (pure ASGI, so streaming responses are not buffered)
+# -------------------------------------------------------
+
+def _route_label(scope) -> str:
+    """The matched route's path template (e.g. /api/v1/interactions/{interaction_id}), so label
+    cardinality stays bounded. Unrouted paths (404s) share one label."""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # FastAPI may keep an included router's routes unprefixed (route.path is then "/{task_id}");
+    # the router prefix is the part of the request path in front of what the route matches
+    path, regex = scope["path"], getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        for start in [i for i, c in enumerate(path) if c == "/"] + [len(path)]:
+            if regex.match(path[start:]):
+                return path[:start] + template
+    return template
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], _route_label(scope), str(status["code"])
+            ).observe(time.perf_counter() - start)
+
+
+# -------------------------------------------------------
+# Graph nodes
+# -------------------------------------------------------
+
+def instrument_node(name: str):
+    """Times a LangGraph node and wraps it in a trace span. functools.wraps keeps the
+    signature visible, so LangGraph still injects `config` where the node asks for it."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                with span(f"node.{name}"):
+                    return await fn(*args, **kwargs)
+            finally:
+                GRAPH_NODE_SECONDS.labels(name).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# -------------------------------------------------------
+# DB (SQLAlchemy engine events)
+# -------------------------------------------------------
+
+def instrument_engine(engine: Engine):
+    """Times every statement on a (sync) engine; pass AsyncEngine.sync_engine for async engines."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - starts.pop())
@@ -0,0 +1,45 @@
+import time
+from contextlib import contextmanager
+
+from config import settings
+from observability.log import current_thread_id, get_logger
+
+logger = get_logger(__name__)
+
+
+# -------------------------------------------------------
+# Trace spans
+# -------------------------------------------------------
+# Disabled by default. With TRACING_ENABLED=true, spans are exported through
+# OpenTelemetry when it is installed (configure the SDK/exporter as usual), and
+# otherwise written to the log at DEBUG level. Every span carries the thread_id
+# of the agent run it belongs to.
+
+_tracer = None
+
+if settings.TRACING_ENABLED:
+    try:
+        # Optional dependency
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("aivoa-crm")
+    except ImportError:
+        _tracer = None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    if not settings.TRACING_ENABLED:
+        yield
+        return
+
+    thread_id = current_thread_id.get()
+    if _tracer is not None:
+        with _tracer.start_as_current_span(name, attributes={"thread_id": thread_id, **attributes}):
+            yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.debug("span %s %.2fms %s", name, (time.perf_counter() - start) * 1000, attributes or "")
@@ -0,0 +1,74 @@
+"""
+Production server (run from backend/).
+
+    python server.py                          # WEB_CONCURRENCY workers on SERVER_HOST:SERVER_PORT
+    python server.py --workers 4 --port 8080
+
+Workers are separate processes accepting on one shared socket, so CPU-bound
+work (SSE encoding, extraction, validation) scales past one core. Every worker
+runs the app's lifespan; what must happen once, or be shared, goes through the
+database or the environment set up here:
+  - schema migrations and the Postgres checkpointer's setup run under advisory
+    locks (database/migrations.py, agent/checkpointer.py), so only the first
+    worker to start does the work
+  - follow-up reminders are claimed under row leases (services/task_scheduler.py)
+  - the LLM token/request budgets are split between the workers (agent/llm_gateway.py)
+  - metrics of all workers are aggregated through PROMETHEUS_MULTIPROC_DIR
+    (observability/metrics.py)
+Use a Postgres LANGGRAPH_CHECKPOINTER_URL with more than one worker.
+
+On SIGTERM/SIGINT a worker stops accepting connections and gives open chat
+streams SHUTDOWN_DRAIN_SECONDS to finish (api/agent.py) before it exits.
+"""
+import argparse
+import glob
+import math
+import os
+import tempfile
+from typing import Optional
+
+import uvicorn
+
+from config import settings
+
+# Extra seconds uvicorn waits after the drain deadline, so streams can send their final event
+_DRAIN_GRACE_SECONDS = 5
+
+
+def _prepare_metrics_dir():
+    """Points PROMETHEUS_MULTIPROC_DIR (inherited by the workers) at an empty directory."""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path is None:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="aivoa_metrics_")
+        return
+    os.makedirs(path, exist_ok=True)
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        os.remove(stale)  # samples of a previous run
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None, workers: Optional[int] = None,
+          app: str = "main:app", factory: bool = False):
+    """Runs `app` (an import string, or an app factory with factory=True) until SIGTERM/SIGINT."""
+    workers = max(1, workers or settings.WEB_CONCURRENCY)
+    # Workers re-read the settings; they size their share of the LLM budgets by it
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    if workers > 1:
+        _prepare_metrics_dir()
+
+    uvicorn.run(
+        app,
+        factory=factory,
+        host=host or settings.SERVER_HOST,
+        port=port or settings.SERVER_PORT,
+        workers=workers,
+        timeout_graceful_shutdown=math.ceil(settings.SHUTDOWN_DRAIN_SECONDS) + _DRAIN_GRACE_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", help="default SERVER_HOST")
+    parser.add_argument("--port", type=int, help="default SERVER_PORT")
+    parser.add_argument("--workers", type=int, help="default WEB_CONCURRENCY")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
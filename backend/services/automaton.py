@@ -0,0 +1,93 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+
+class Match(NamedTuple):
+    start: int
+    end: int  # exclusive
+    value: Any
+
+
+class AhoCorasick:
+    """
+    Compiled multi-pattern matcher (Aho-Corasick automaton).
+
+    Patterns are matched case-insensitively and only on word boundaries, so one
+    left-to-right scan finds every gazetteer/rule term regardless of how many
+    patterns are loaded. Each pattern carries an arbitrary payload (`value`).
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        # State 0 is the root. goto[s] maps a character to the next state.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]  # (pattern length, value)
+        self.size = 0
+
+        for pattern, value in patterns:
+            key = pattern.lower().strip()
+            if key:
+                self._add(key, value)
+                self.size += 1
+        self._build()
+
+    def _add(self, pattern: str, value: Any):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append((len(pattern), value))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0  # root children fail to root
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        # Tuples of atomic values are untracked by the cyclic GC, so a large
+        # automaton does not slow down every collection in the process.
+        self._out = [tuple(out) for out in self._out]
+
+    def iter_matches(self, text: str) -> List[Match]:
+        """All word-bounded matches in `text` (may overlap). `text` need not be lowercased."""
+        lowered = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(lowered)
+        state = 0
+        matches = []
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = i + 1
+                if end < n and lowered[end].isalnum():
+                    continue
+                for length, value in out[state]:
+                    start = end - length
+                    if start == 0 or not lowered[start - 1].isalnum():
+                        matches.append(Match(start, end, value))
+        return matches
+
+    def find(self, text: str) -> List[Match]:
+        """Leftmost-longest, non-overlapping matches in text order."""
+        selected = []
+        last_end = -1
+        for m in sorted(self.iter_matches(text), key=lambda m: (m.start, m.start - m.end)):
+            if m.start >= last_end:
+                selected.append(m)
+                last_end = m.end
+        return selected
@@ -0,0 +1,331 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.schemas import ComplianceCheckSchema, ComplianceReport
+from models.database import HCPInteraction, Transcript
+from services.automaton import AhoCorasick
+from services.extraction import load_gazetteers
+from services.transcripts import decode_transcript
+from config import settings
+
+
+# -------------------------------------------------------
+# Rule set
+# -------------------------------------------------------
+# Versioned JSON file (data/compliance_rules.json):
+#   version            - stamped into every report and part of the cache key
+#   thresholds         - risk score at which a record becomes Warning / Fail
+#   keyword_rules      - phrase lists, compiled into one Aho-Corasick automaton
+#   pattern_rules      - regexes (no named groups), compiled into one alternation
+#   approved_materials - allowlist for ComplianceCheckSchema.material_references
+#   consent            - trigger phrases that need HCP consent, and phrases that confirm it
+# Material references are first resolved through the "materials" aliases of the
+# extraction gazetteer, so "brochure" is checked as the approved "Brochures".
+
+def load_rules(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _normalize_material(material: str) -> str:
+    return " ".join(material.lower().split())
+
+
+def load_material_aliases(path: str) -> Dict[str, str]:
+    """Normalized material name or alias -> canonical name, from the gazetteer file (empty if missing)."""
+    if not os.path.exists(path):
+        return {}
+    aliases = {}
+    for entry in load_gazetteers(path)["materials"]:
+        for surface in [entry["name"], *entry["aliases"]]:
+            aliases[_normalize_material(surface)] = entry["name"]
+    return aliases
+
+
+class Finding(NamedTuple):
+    rule_id: str
+    severity: int
+    detail: str
+
+
+# -------------------------------------------------------
+# Engine
+# -------------------------------------------------------
+
+class ComplianceEngine:
+    """
+    Immutable, compiled rule set. Like the extraction engine it is batch-first:
+    texts are lowercased and joined once, the keyword automaton and the combined
+    regex each make one pass, and hits are routed back to their record by offset.
+    """
+
+    _SEPARATOR = "\n\x00\n"
+
+    def __init__(self, rules: dict, material_aliases: Optional[Dict[str, str]] = None):
+        self.version = str(rules["version"])
+        self.warning_threshold = rules["thresholds"]["warning"]
+        self.fail_threshold = rules["thresholds"]["fail"]
+
+        # Automaton payloads: ("rule", rule) | ("consent_trigger", None) | ("consent_ok", None)
+        patterns = []
+        for rule in rules.get("keyword_rules", []):
+            for term in rule["terms"]:
+                patterns.append((term, ("rule", (rule["id"], rule["severity"], rule["reason"]))))
+        consent = rules.get("consent", {})
+        for term in consent.get("triggers", []):
+            patterns.append((term, ("consent_trigger", None)))
+        for term in consent.get("confirmations", []):
+            patterns.append((term, ("consent_ok", None)))
+        self.matcher = AhoCorasick(patterns)
+
+        self._pattern_rules = {f"r{i}": rule for i, rule in enumerate(rules.get("pattern_rules", []))}
+        self.regex = re.compile(
+            "|".join(f"(?P<{name}>{rule['pattern']})" for name, rule in self._pattern_rules.items())
+        ) if self._pattern_rules else None
+
+        self.approved_materials = {_normalize_material(m) for m in rules.get("approved_materials", [])}
+        self.material_aliases = {
+            alias: _normalize_material(name) for alias, name in (material_aliases or {}).items()
+        }
+        self.unapproved_material_severity = rules.get("unapproved_material_severity", 40)
+        self.consent_severity = consent.get("severity", 0)
+        self.consent_reason = consent.get("reason", "HCP consent not recorded")
+
+    def check(self, item: ComplianceCheckSchema) -> ComplianceReport:
+        return self.check_batch([item])[0]
+
+    def check_batch(self, items: Sequence[ComplianceCheckSchema]) -> List[ComplianceReport]:
+        if not items:
+            return []
+
+        offsets = []
+        position = 0
+        for item in items:
+            offsets.append(position)
+            position += len(item.raw_text_segment) + len(self._SEPARATOR)
+        lowered = self._SEPARATOR.join(item.raw_text_segment for item in items).lower()
+
+        def route(pos: int) -> int:
+            return bisect.bisect_right(offsets, pos) - 1
+
+        findings: List[Dict[str, Finding]] = [{} for _ in items]  # one finding per rule id
+        triggered = [False] * len(items)
+        confirmed = [False] * len(items)
+
+        for m in self.matcher.iter_matches(lowered):
+            i = route(m.start)
+            kind, rule = m.value
+            if kind == "rule":
+                rule_id, severity, reason = rule
+                findings[i].setdefault(rule_id, Finding(rule_id, severity, f"{reason} ('{lowered[m.start:m.end]}')"))
+            elif kind == "consent_trigger":
+                triggered[i] = True
+            else:
+                confirmed[i] = True
+
+        if self.regex is not None:
+            for hit in self.regex.finditer(lowered):
+                i = route(hit.start())
+                rule = self._pattern_rules[hit.lastgroup]
+                findings[i].setdefault(rule["id"], Finding(rule["id"], rule["severity"], f"{rule['reason']} ('{hit.group()}')"))
+
+        reports = []
+        for i, item in enumerate(items):
+            record = findings[i]
+            for material in item.material_references:
+                normalized = _normalize_material(material)
+                if self.material_aliases.get(normalized, normalized) not in self.approved_materials:
+                    record.setdefault(
+                        f"UNAPPROVED_MATERIAL_REF:{material}",
+                        Finding("UNAPPROVED_MATERIAL_REF", self.unapproved_material_severity,
+                                f"Material not on the approved list ('{material}')"),
+                    )
+            if triggered[i] and not (item.hcp_consent_verified or confirmed[i]) and self.consent_severity:
+                record["CONSENT_MISSING"] = Finding("CONSENT_MISSING", self.consent_severity, self.consent_reason)
+            reports.append(self._report(list(record.values())))
+        return reports
+
+    def _report(self, findings: List[Finding]) -> ComplianceReport:
+        score = min(100, sum(f.severity for f in findings))
+        if score >= self.fail_threshold:
+            status = "Fail"
+        elif score >= self.warning_threshold:
+            status = "Warning"
+        else:
+            status = "Pass"
+        details = "; ".join(f"{f.rule_id}: {f.detail}" for f in findings) or "No compliance issues found."
+        return ComplianceReport(status=status, details=f"{details} [rules v{self.version}]", risk_score=score)
+
+
+# -------------------------------------------------------
+# Cached checker
+# -------------------------------------------------------
+
+def _cache_key(version: str, item: ComplianceCheckSchema) -> str:
+    payload = "\x00".join([
+        item.raw_text_segment,
+        "\x1f".join(sorted(item.material_references)),
+        "1" if item.hcp_consent_verified else "0",
+    ])
+    return f"{version}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+class ComplianceChecker:
+    """
+    Holds the compiled engine plus an LRU of reports keyed by rule-set version
+    and input hash, so unchanged records are not re-scored until the rules change.
+    Safe to call from worker threads.
+    """
+
+    def __init__(self, rules_path: str, max_cache_entries: int, gazetteer_path: Optional[str] = None):
+        self.rules_path = rules_path
+        self.gazetteer_path = gazetteer_path
+        self.max_cache_entries = max_cache_entries
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, ComplianceReport]" = OrderedDict()
+        self._engine: Optional[ComplianceEngine] = None
+        self.records = 0
+        self.cache_hits = 0
+        self.seconds = 0.0
+
+    def reload(self) -> ComplianceEngine:
+        aliases = load_material_aliases(self.gazetteer_path) if self.gazetteer_path else None
+        engine = ComplianceEngine(load_rules(self.rules_path), aliases)
+        self._engine = engine
+        return engine
+
+    @property
+    def engine(self) -> ComplianceEngine:
+        return self._engine or self.reload()
+
+    def check_batch(self, items: Sequence[ComplianceCheckSchema]) -> List[ComplianceReport]:
+        start = time.perf_counter()
+        engine = self.engine
+        keys = [_cache_key(engine.version, item) for item in items]
+
+        reports: List[Optional[ComplianceReport]] = [None] * len(items)
+        misses = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    reports[i] = cached
+                else:
+                    misses.append(i)
+
+        if misses:
+            for i, report in zip(misses, engine.check_batch([items[i] for i in misses])):
+                reports[i] = report
+
+        with self._lock:
+            for i in misses:
+                self._cache[keys[i]] = reports[i]
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+            self.records += len(items)
+            self.cache_hits += len(items) - len(misses)
+            self.seconds += time.perf_counter() - start
+
+        return reports
+
+    def check(self, item: ComplianceCheckSchema) -> ComplianceReport:
+        return self.check_batch([item])[0]
+
+    def stats(self) -> dict:
+        return {
+            "rule_version": self.engine.version,
+            "records": self.records,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self._cache),
+            "records_per_sec": round(self.records / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+compliance_checker = ComplianceChecker(
+    settings.COMPLIANCE_RULES_PATH, settings.COMPLIANCE_CACHE_MAX_ENTRIES, settings.EXTRACTION_GAZETTEER_PATH
+)
+
+
+def check_compliance(item: ComplianceCheckSchema) -> ComplianceReport:
+    return compliance_checker.check(item)
+
+
+def check_compliance_batch(items: Sequence[ComplianceCheckSchema]) -> List[ComplianceReport]:
+    return compliance_checker.check_batch(items)
+
+
+# ------------------ BULK RE-SCREENING ------------------
+
+def _screen_rows(rows) -> List[ComplianceReport]:
+    items = [
+        ComplianceCheckSchema(
+            raw_text_segment=(decode_transcript(row.codec, row.data) if row.data else None) or row.outcomes or "",
+            material_references=row.materials_shared or [],
+        )
+        for row in rows
+    ]
+    return check_compliance_batch(items)
+
+
+async def rescreen_interactions(session: AsyncSession, batch_size: int, max_flagged: int) -> dict:
+    """
+    Re-screens every stored interaction (its transcript, falling back to outcomes)
+    against the current rule set. Rows are read in interaction_id keyset batches
+    with only the needed columns; each batch is scored in one engine pass.
+    """
+    counts = {"Pass": 0, "Warning": 0, "Fail": 0}
+    flagged = []
+    last_id: Optional[UUID] = None
+    start = time.perf_counter()
+
+    while True:
+        query = select(
+            HCPInteraction.interaction_id,
+            HCPInteraction.outcomes,
+            HCPInteraction.materials_shared,
+            Transcript.codec,
+            Transcript.data,
+        ).outerjoin(
+            Transcript, Transcript.digest == HCPInteraction.transcript_digest
+        ).order_by(HCPInteraction.interaction_id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(HCPInteraction.interaction_id > last_id)
+
+        rows = (await session.execute(query)).all()
+        if not rows:
+            break
+        last_id = rows[-1].interaction_id
+
+        # Transcript decompression and CPU-bound scoring run off the event loop
+        reports = await asyncio.to_thread(_screen_rows, rows)
+
+        for row, report in zip(rows, reports):
+            counts[report.status] += 1
+            if report.status != "Pass" and len(flagged) < max_flagged:
+                flagged.append({"interaction_id": row.interaction_id, **report.model_dump()})
+
+    seconds = time.perf_counter() - start
+    scanned = sum(counts.values())
+    return {
+        "rule_version": compliance_checker.engine.version,
+        "scanned": scanned,
+        "passed": counts["Pass"],
+        "warnings": counts["Warning"],
+        "failed": counts["Fail"],
+        "flagged": flagged,
+        "seconds": round(seconds, 3),
+        "records_per_sec": round(scanned / seconds, 1) if seconds else 0.0,
+    }
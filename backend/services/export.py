@@ -0,0 +1,262 @@
+import csv
+import io
+import zlib
+from datetime import date
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import orjson
+from sqlalchemy import tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.database import HCPInteraction, Transcript
+from services.interactions import LIST_FIELDS, encode_cursor
+from services.transcripts import decode_transcript
+
+
+# ------------------ ROW SOURCE ------------------
+# Rows are read in (interaction_date, interaction_id) order from a server-side
+# cursor (asyncpg cursor / incremental aiosqlite fetch) and handed out in
+# fixed-size batches, so memory is bounded by one batch whatever the table size.
+# Every batch ends on a keyset position, which is the resume token.
+# Transcripts are outer-joined from the transcript store and decompressed per row.
+
+LIST_COLUMNS = LIST_FIELDS
+
+EXPORT_COLUMNS = (
+    "interaction_id", "hcp_name", "interaction_type", "interaction_date",
+    "attendees", "topics_discussed", "materials_shared", "samples_distributed",
+    "sentiment", "outcomes", "follow_up_actions", "raw_transcript", "created_at",
+)
+
+
+async def iter_export_batches(
+    session: AsyncSession,
+    *,
+    hcp_name: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    after: Optional[Tuple[date, UUID]] = None,
+    batch_size: int = 5000,
+) -> AsyncIterator[List[Dict]]:
+    columns = [getattr(HCPInteraction, name) for name in EXPORT_COLUMNS if name != "raw_transcript"]
+    query = select(*columns, Transcript.codec, Transcript.data).outerjoin(
+        Transcript, Transcript.digest == HCPInteraction.transcript_digest
+    )
+    if hcp_name is not None:
+        query = query.where(HCPInteraction.hcp_name == hcp_name)
+    if date_from is not None:
+        query = query.where(HCPInteraction.interaction_date >= date_from)
+    if date_to is not None:
+        query = query.where(HCPInteraction.interaction_date <= date_to)
+    if after is not None:
+        query = query.where(tuple_(HCPInteraction.interaction_date, HCPInteraction.interaction_id) > after)
+    query = query.order_by(HCPInteraction.interaction_date, HCPInteraction.interaction_id)
+
+    result = await session.stream(query.execution_options(yield_per=batch_size))
+    async for partition in result.mappings().partitions(batch_size):
+        yield [_export_row(row) for row in partition]
+
+
+def _export_row(row) -> Dict:
+    transcript = None if row["data"] is None else decode_transcript(row["codec"], row["data"])
+    return {name: transcript if name == "raw_transcript" else row[name] for name in EXPORT_COLUMNS}
+
+
+def batch_cursor(batch: List[Dict]) -> str:
+    """Resume token pointing after the last row of `batch` (same format as the list API's next_cursor)."""
+    last = batch[-1]
+    return encode_cursor(last["interaction_date"], last["interaction_id"])
+
+
+# ------------------ ENCODERS ------------------
+# Each encoder turns batches into bytes incrementally: header(), then encode()
+# per batch, then finish(). Nothing is buffered beyond the current batch.
+
+class NDJSONEncoder:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, batch: List[Dict]) -> bytes:
+        # orjson serializes UUID, date and datetime natively; default=str covers
+        # asyncpg's own UUID type, which orjson does not recognize
+        return b"".join(orjson.dumps(row, default=str) + b"\n" for row in batch)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class CSVEncoder:
+    """List columns are written as JSON arrays inside the cell."""
+
+    media_type = "text/csv"
+    extension = "csv"
+
+    def _rows(self, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode()
+
+    def header(self) -> bytes:
+        return self._rows([EXPORT_COLUMNS])
+
+    def encode(self, batch: List[Dict]) -> bytes:
+        return self._rows(
+            [orjson.dumps(row[c]).decode() if c in LIST_COLUMNS else row[c] for c in EXPORT_COLUMNS]
+            for row in batch
+        )
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the caller."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """
+    One row group per batch; the list fields are native list<string> columns.
+    Compression is Parquet's own per-column codec rather than an outer stream.
+    """
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, compression: Optional[str] = None):
+        import pyarrow as pa  # optional dependency (requirements.txt)
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.schema = pa.schema([
+            ("interaction_id", pa.string()),
+            ("hcp_name", pa.string()),
+            ("interaction_type", pa.string()),
+            ("interaction_date", pa.date32()),
+            *[(name, pa.list_(pa.string())) for name in LIST_COLUMNS[:4]],
+            ("sentiment", pa.string()),
+            ("outcomes", pa.string()),
+            ("follow_up_actions", pa.list_(pa.string())),
+            ("raw_transcript", pa.string()),
+            ("created_at", pa.timestamp("us")),
+        ])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression=compression or "none")
+
+    def header(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, batch: List[Dict]) -> bytes:
+        columns = {name: [row[name] for row in batch] for name in EXPORT_COLUMNS}
+        columns["interaction_id"] = [str(value) for value in columns["interaction_id"]]
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self.schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+# ------------------ STREAM COMPRESSION ------------------
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _Gzip:
+    def __init__(self):
+        self._z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        # Sync flush at batch boundaries so a reader sees every completed batch
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _Zstd:
+    def __init__(self):
+        import zstandard  # optional dependency (requirements.txt)
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._z = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+FORMATS = ("ndjson", "csv", "parquet")
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+_MEDIA_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+
+
+class ExportWriter:
+    """An encoder plus optional stream compression (Parquet compresses internally)."""
+
+    def __init__(self, fmt: str, compression: str = "none"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}'")
+        codec = None if compression == "none" else compression
+        if fmt == "parquet":
+            self.encoder = ParquetEncoder(codec)
+            self._stream = _Identity()
+        else:
+            self.encoder = NDJSONEncoder() if fmt == "ndjson" else CSVEncoder()
+            self._stream = {"none": _Identity, "gzip": _Gzip, "zstd": _Zstd}[compression]()
+        outer = compression if fmt != "parquet" else "none"
+        self.extension = self.encoder.extension + _EXTENSIONS.get(outer, "")
+        self.media_type = _MEDIA_TYPES.get(outer, self.encoder.media_type)
+
+    def header(self) -> bytes:
+        return self._stream.compress(self.encoder.header())
+
+    def write(self, batch: List[Dict]) -> bytes:
+        return self._stream.compress(self.encoder.encode(batch)) + self._stream.flush()
+
+    def finish(self) -> bytes:
+        return self._stream.compress(self.encoder.finish()) + self._stream.finish()
@@ -0,0 +1,300 @@
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from models.schemas import LogInteractionSchema
+from services.automaton import AhoCorasick
+from config import settings
+from observability.log import get_logger
+
+logger = get_logger(__name__)
+
+
+# -------------------------------------------------------
+# Gazetteers
+# -------------------------------------------------------
+# JSON file with one list per category. Entries are either a plain name or
+# {"name": "...", "aliases": [...]}; every alias resolves to the canonical name.
+#   {"hcps": [...], "products": [...], "materials": [...], "samples": [...]}
+
+CATEGORIES = ("hcps", "products", "materials", "samples")
+
+
+def load_gazetteers(path: str) -> Dict[str, List[dict]]:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    gazetteers = {}
+    for category in CATEGORIES:
+        entries = []
+        for entry in raw.get(category, []):
+            if isinstance(entry, str):
+                entry = {"name": entry}
+            entries.append({"name": entry["name"], "aliases": entry.get("aliases", [])})
+        gazetteers[category] = entries
+    return gazetteers
+
+
+# -------------------------------------------------------
+# Field parsers (precompiled once at import)
+# -------------------------------------------------------
+
+_MONTHS = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+)}
+_WEEKDAYS = {d: i for i, d in enumerate(
+    ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+)}
+
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_SLASH_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{2,4})\b")  # MM/DD/YYYY
+# Full or abbreviated month names only, so words like "decided" or "market" are not months
+_MONTH = (
+    r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?"
+)
+_MONTH_DAY = re.compile(rf"\b{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b")
+_DAY_MONTH = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+{_MONTH}(?:,?\s+(\d{{4}}))?\b")
+_RELATIVE_DAY = re.compile(r"\b(today|yesterday|last\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday))\b")
+
+_INTERACTION_TYPES = [
+    ("Email", re.compile(r"\b(e-?mail(ed|s)?|wrote to|replied)\b")),
+    ("Call", re.compile(r"\b(call(ed|s)?|phoned?|rang|spoke (on|over) the phone|video call|zoom|teams)\b")),
+    ("Meeting", re.compile(r"\b(met|meet(ing)?|visit(ed)?|lunch|dinner|in[- ]person|dropped by)\b")),
+]
+
+_POSITIVE = r"positive|interested|keen|enthusiastic|receptive|pleased|happy|impressed|agreed|great|good"
+_NEGATIVE = r"negative|concern(?:ed|s)?|skeptical|sceptical|unhappy|declined|refused|rejected|complain(?:ed|t)?|frustrated"
+# One pass over sentiment cues. A negation right before a cue ("not happy",
+# "wasn't very interested", "no concerns") is part of the same match and flips
+# it, so the cue inside it is never counted on its own.
+_SENTIMENT = re.compile(
+    r"\b(?:(?P<negation>not|no|never|no longer|without|\w+n't)\s+"
+    r"(?:(?:very|really|too|so|that|at all|all that|particularly|especially|overly|entirely|yet|any|much)\s+)*)?"
+    rf"(?:(?P<positive>{_POSITIVE})|(?P<negative>{_NEGATIVE}))\b"
+)
+
+_SAMPLE_KEYWORD = re.compile(r"\bsamples?\b")
+_SAMPLE_WINDOW = 40  # chars between "sample" and a product name to count it as distributed
+
+# Fallback for HCPs missing from the gazetteer: "Dr. Jane Doe", "Dr Doe"
+_DR_NAME = re.compile(r"\bDr\.?\s+([A-Z][a-zA-Z'-]+(?:\s+[A-Z][a-zA-Z'-]+)?)")
+
+
+def parse_interaction_date(lowered: str, today: date) -> date:
+    m = _ISO_DATE.search(lowered)
+    if m:
+        try:
+            return date(int(m[1]), int(m[2]), int(m[3]))
+        except ValueError:
+            pass
+    m = _SLASH_DATE.search(lowered)
+    if m:
+        year = int(m[3]) + (2000 if len(m[3]) == 2 else 0)
+        try:
+            return date(year, int(m[1]), int(m[2]))
+        except ValueError:
+            pass
+    for pattern, month_group, day_group in ((_MONTH_DAY, 1, 2), (_DAY_MONTH, 2, 1)):
+        m = pattern.search(lowered)
+        if m:
+            year = int(m[3]) if m[3] else today.year
+            try:
+                parsed = date(year, _MONTHS[m[month_group][:3]], int(m[day_group]))
+            except ValueError:
+                continue
+            # "May 3" said in January means last May, not a future meeting
+            if not m[3] and parsed > today:
+                parsed = parsed.replace(year=year - 1)
+            return parsed
+    m = _RELATIVE_DAY.search(lowered)
+    if m:
+        if m[1] == "yesterday":
+            return today - timedelta(days=1)
+        if m[2]:
+            delta = (today.weekday() - _WEEKDAYS[m[2]]) % 7 or 7
+            return today - timedelta(days=delta)
+    return today
+
+
+def _unique(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+# -------------------------------------------------------
+# Engine
+# -------------------------------------------------------
+
+class ExtractionEngine:
+    """
+    Immutable, compiled extractor. Build once per gazetteer version and share.
+
+    Extraction is batch-first: transcripts are lowercased and joined once, then the
+    gazetteer automaton and each field regex make a single pass over the joined
+    text, and every hit is routed back to its transcript by offset.
+    """
+
+    # Never part of a word or phrase, so no match can span two transcripts
+    _SEPARATOR = "\n\x00\n"
+
+    def __init__(self, gazetteers: Dict[str, List[dict]]):
+        patterns = []
+        for category, entries in gazetteers.items():
+            for entry in entries:
+                for surface in [entry["name"], *entry["aliases"]]:
+                    patterns.append((surface, (category, entry["name"])))
+        self.matcher = AhoCorasick(patterns)
+
+    def extract(self, text: str, today: Optional[date] = None) -> LogInteractionSchema:
+        return self.extract_batch([text], today)[0]
+
+    def extract_batch(self, texts: Sequence[str], today: Optional[date] = None) -> List[LogInteractionSchema]:
+        today = today or date.today()
+        if not texts:
+            return []
+
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + len(self._SEPARATOR)
+
+        joined = self._SEPARATOR.join(texts)
+        lowered = joined.lower()
+
+        def route(pos: int) -> int:
+            return bisect.bisect_right(offsets, pos) - 1
+
+        # Gazetteer matches, rebased to each transcript
+        per_text = [[] for _ in texts]
+        for m in self.matcher.find(lowered):
+            i = route(m.start)
+            per_text[i].append(m._replace(start=m.start - offsets[i], end=m.end - offsets[i]))
+
+        # Interaction type: the type with the most cues in the transcript; on a tie,
+        # the one mentioned first ("Called Dr Smith, then emailed the brochure" is a call)
+        cues: List[Dict[str, tuple]] = [{} for _ in texts]
+        for interaction_type, pattern in _INTERACTION_TYPES:
+            for hit in pattern.finditer(lowered):
+                i = route(hit.start())
+                count, first = cues[i].get(interaction_type, (0, hit.start()))
+                cues[i][interaction_type] = (count + 1, first)
+        types = [
+            max(found, key=lambda t: (found[t][0], -found[t][1])) if found else None
+            for found in cues
+        ]
+
+        # Sentiment: balance of (possibly negated) cues per transcript
+        balance = [0] * len(texts)
+        for hit in _SENTIMENT.finditer(lowered):
+            polarity = 1 if hit["positive"] else -1
+            balance[route(hit.start())] += -polarity if hit["negation"] else polarity
+
+        sample_positions = [[] for _ in texts]
+        for hit in _SAMPLE_KEYWORD.finditer(lowered):
+            i = route(hit.start())
+            sample_positions[i].append(hit.start() - offsets[i])
+
+        results = []
+        for i, text in enumerate(texts):
+            text_lower = lowered[offsets[i]:offsets[i] + len(text)]
+            results.append(LogInteractionSchema(
+                interaction_type=types[i] or "Meeting",
+                interaction_date=parse_interaction_date(text_lower, today),
+                sentiment="Positive" if balance[i] > 0 else "Negative" if balance[i] < 0 else "Neutral",
+                outcomes=text,
+                **self._entity_fields(text, per_text[i], sample_positions[i]),
+            ))
+        return results
+
+    @staticmethod
+    def _entity_fields(text: str, matches, sample_positions: List[int]) -> dict:
+        found: Dict[str, List[str]] = {c: [] for c in CATEGORIES}
+        for m in matches:
+            found[m.value[0]].append(m.value[1])
+
+        # Products mentioned close to "sample(s)" count as distributed samples
+        samples = list(found["samples"])
+        if sample_positions:
+            for m in matches:
+                if m.value[0] != "products":
+                    continue
+                j = bisect.bisect_left(sample_positions, m.start - _SAMPLE_WINDOW)
+                if j < len(sample_positions) and sample_positions[j] <= m.end + _SAMPLE_WINDOW:
+                    samples.append(f"{m.value[1]} samples")
+
+        hcps = _unique(found["hcps"])
+        if not hcps:
+            hcps = _unique(f"Dr. {name}" for name in _DR_NAME.findall(text))
+
+        return {
+            "hcp_name": hcps[0] if hcps else "",
+            "attendees": hcps,
+            "topics_discussed": _unique(found["products"]),
+            "materials_shared": _unique(found["materials"]),
+            "samples_distributed": _unique(samples),
+        }
+
+
+# -------------------------------------------------------
+# Hot-reloading store
+# -------------------------------------------------------
+
+class GazetteerStore:
+    """
+    Holds the current engine and rebuilds it when the gazetteer file changes.
+    The mtime is checked at most every `check_interval` seconds, and the new
+    engine is swapped in atomically, so no restart is needed.
+    """
+
+    def __init__(self, path: str, check_interval: float):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._engine: Optional[ExtractionEngine] = None
+        self._mtime = None
+        self._next_check = 0.0
+
+    def _mtime_now(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def reload(self) -> ExtractionEngine:
+        with self._lock:
+            mtime = self._mtime_now()
+            gazetteers = load_gazetteers(self.path) if mtime is not None else {c: [] for c in CATEGORIES}
+            self._engine = ExtractionEngine(gazetteers)
+            self._mtime = mtime
+            self._next_check = time.monotonic() + self.check_interval
+            return self._engine
+
+    def get_engine(self) -> ExtractionEngine:
+        if self._engine is None:
+            return self.reload()
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            if self._mtime_now() != self._mtime:
+                try:
+                    return self.reload()
+                except (OSError, ValueError, KeyError) as e:
+                    # Keep serving the last good engine if the edited file is invalid
+                    logger.warning("Gazetteer reload failed, keeping previous version: %s", e)
+        return self._engine
+
+
+gazetteer_store = GazetteerStore(settings.EXTRACTION_GAZETTEER_PATH, settings.EXTRACTION_RELOAD_CHECK_SECONDS)
+
+
+def extract_interaction(text: str) -> LogInteractionSchema:
+    return gazetteer_store.get_engine().extract(text)
+
+
+def extract_interactions(texts: Sequence[str]) -> List[LogInteractionSchema]:
+    return gazetteer_store.get_engine().extract_batch(texts)
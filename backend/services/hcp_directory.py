@@ -0,0 +1,172 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+from uuid import UUID, uuid4
+
+from sqlmodel import select
+
+from models.database import HCP, utcnow
+from models.schemas import HCPInteractionCreate
+from database.setup import async_session_factory
+from services.hcp_matching import HCPIndex, HCPMatch, normalize_hcp_name, plan_resolution
+from config import settings
+
+
+# -------------------------------------------------------
+# Directory (index + HCP master table)
+# -------------------------------------------------------
+
+class HCPDirectory:
+    """
+    Resolves free-text HCP names to HCP master rows.
+
+    The index is loaded from the hcp table on first use and then topped up every
+    `refresh_seconds` with rows created since the last load (ix_hcp_created_at),
+    re-reading a short overlap so rows committed late by other workers are not
+    missed. HCPs created by this process are added to the index immediately.
+    """
+
+    _OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, session_factory, threshold: float, margin: float, refresh_seconds: float):
+        self.session_factory = session_factory
+        self.threshold = threshold
+        self.margin = margin
+        self.refresh_seconds = refresh_seconds
+        self.index = HCPIndex()
+        self._loaded_until: Optional[datetime] = None
+        self._next_refresh = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self.created = 0
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def refresh(self, force: bool = False):
+        if not force and time.monotonic() < self._next_refresh:
+            return
+        async with self._get_lock():
+            if not force and time.monotonic() < self._next_refresh:
+                return
+            query = select(HCP.hcp_id, HCP.name, HCP.normalized_name, HCP.created_at)
+            if self._loaded_until is not None:
+                query = query.where(HCP.created_at >= self._loaded_until - self._OVERLAP)
+            async with self.session_factory() as session:
+                rows = (await session.exec(query)).all()
+            for hcp_id, name, normalized, created_at in rows:
+                self.index.add(hcp_id, name, normalized)
+                if self._loaded_until is None or created_at > self._loaded_until:
+                    self._loaded_until = created_at
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+
+    async def search(self, name: str, limit: int = 5) -> List[HCPMatch]:
+        await self.refresh()
+        return self.index.search(name, limit)
+
+    async def lookup(self, name: str) -> Optional[HCPMatch]:
+        """Confident match only; never creates a master row."""
+        normalized = normalize_hcp_name(name)
+        if not normalized:
+            return None
+        await self.refresh()
+        return self.index.best_match(name, self.threshold, self.margin, normalized)
+
+    async def get(self, hcp_id: UUID) -> Optional[HCPMatch]:
+        return (await self.get_many([hcp_id])).get(hcp_id)
+
+    async def get_many(self, hcp_ids: Iterable[UUID]) -> Dict[UUID, HCPMatch]:
+        """Master rows of the given ids that exist; one forced refresh if any is not indexed yet."""
+        hcp_ids = set(hcp_ids)
+        found = {hcp_id: match for hcp_id in hcp_ids if (match := self.index.get(hcp_id)) is not None}
+        if len(found) < len(hcp_ids):
+            await self.refresh(force=True)
+            found = {hcp_id: match for hcp_id in hcp_ids if (match := self.index.get(hcp_id)) is not None}
+        return found
+
+    async def resolve_many(self, names: Iterable[str]) -> Dict[str, HCPMatch]:
+        """
+        Maps each distinct non-empty name to a master row, creating rows for names
+        without a confident match. New rows are committed in their own transaction
+        (INSERT ... ON CONFLICT DO NOTHING on the normalized name), so a concurrent
+        worker creating the same HCP ends up with the same id.
+        """
+        await self.refresh()
+        resolved, pending, new = plan_resolution(self.index, names, self.threshold, self.margin)
+        if new:
+            created = await self._create(new)
+            for name, normalized in pending.items():
+                resolved[name] = created[normalized]
+        return resolved
+
+    async def resolve(self, name: str) -> Optional[HCPMatch]:
+        return (await self.resolve_many([name])).get(name)
+
+    async def _create(self, new: Dict[str, str]) -> Dict[str, HCPMatch]:
+        now = utcnow()
+        rows = [
+            {"hcp_id": uuid4(), "name": name, "normalized_name": normalized, "created_at": now}
+            for normalized, name in sorted(new.items())
+        ]
+        async with self.session_factory() as session:
+            dialect = session.bind.dialect.name
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            await session.execute(insert(HCP).on_conflict_do_nothing(index_elements=["normalized_name"]), rows)
+            stored = (await session.exec(
+                select(HCP.hcp_id, HCP.name, HCP.normalized_name).where(HCP.normalized_name.in_(list(new)))
+            )).all()
+            await session.commit()
+
+        created = {}
+        for hcp_id, name, normalized in stored:
+            self.created += self.index.add(hcp_id, name, normalized)
+            created[normalized] = HCPMatch(hcp_id, name, 1.0)
+        return created
+
+    def stats(self) -> dict:
+        return {
+            "hcps": len(self.index),
+            "trigrams": self.index.trigram_count,
+            "loaded_until": self._loaded_until,
+            "created": self.created,
+        }
+
+
+class UnknownHCPError(ValueError):
+    """The given hcp_id is not in the HCP master table."""
+
+
+async def link_hcps(rows: Sequence[HCPInteractionCreate]) -> List[HCPInteractionCreate]:
+    """
+    Returns the rows with hcp_id set and hcp_name replaced by the master row's
+    display name, so every spelling of one HCP shares history, rollups and
+    duplicate detection. An explicit hcp_id wins over the name; rows without a
+    name stay unlinked.
+    """
+    resolved = await hcp_directory.resolve_many(row.hcp_name for row in rows if row.hcp_id is None)
+    by_id = await hcp_directory.get_many(row.hcp_id for row in rows if row.hcp_id is not None)
+    linked = []
+    for row in rows:
+        if row.hcp_id is not None:
+            match = by_id.get(row.hcp_id)
+            if match is None:
+                raise UnknownHCPError(f"Unknown hcp_id {row.hcp_id}")
+        else:
+            match = resolved.get(row.hcp_name)
+        linked.append(row if match is None else row.model_copy(update={"hcp_id": match.hcp_id, "hcp_name": match.name}))
+    return linked
+
+
+hcp_directory = HCPDirectory(
+    async_session_factory,
+    threshold=settings.HCP_MATCH_THRESHOLD,
+    margin=settings.HCP_MATCH_MARGIN,
+    refresh_seconds=settings.HCP_DIRECTORY_REFRESH_SECONDS,
+)
@@ -0,0 +1,225 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+
+# -------------------------------------------------------
+# Name normalization
+# -------------------------------------------------------
+# "Dr. John Smith", "Smith, John MD" and "SMITH, J." all become "john smith" /
+# "j smith": accents, punctuation, titles and degree suffixes are dropped and
+# "Last, First" is turned around so the surname is always the last token.
+
+_TITLES = {
+    "dr", "doctor", "prof", "professor", "mr", "mrs", "ms", "miss", "sir",
+    "md", "phd", "mbbs", "dds", "dmd", "frcp", "facp", "rn", "np", "jr", "sr", "ii", "iii",
+}
+_DOTTED_DEGREES = re.compile(r"\b(m\.\s?d|ph\.\s?d|d\.\s?d\.\s?s)\.?")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(part: str) -> List[str]:
+    return [t for t in _TOKEN.findall(part.replace("'", "")) if t not in _TITLES]
+
+
+def normalize_hcp_name(name: str) -> str:
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().casefold()
+    text = _DOTTED_DEGREES.sub(" ", text)
+    surname, _, given = text.partition(",")
+    given_tokens = _tokens(given)
+    if given_tokens:
+        return " ".join(given_tokens + _tokens(surname))
+    return " ".join(_tokens(surname))
+
+
+def name_trigrams(normalized: str) -> Set[str]:
+    """pg_trgm-style trigrams: each token padded with two leading and one trailing space."""
+    grams = set()
+    for token in normalized.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _dice(a: Set[str], b: Set[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+def _given_name_agreement(a: List[str], b: List[str]) -> Optional[float]:
+    """
+    None unless the given names agree as far as both are known: initials and short
+    forms ("j" ~ "john") or a near spelling with the same initial ("jon" ~ "john").
+    Otherwise how closely they agree, 0.5 when one side has no given names at all.
+    """
+    if not a or not b:
+        return 0.5
+    total = 0.0
+    for x, y in zip(a, b):
+        if x[0] != y[0]:
+            return None
+        similarity = _dice(name_trigrams(x), name_trigrams(y))
+        if not (x.startswith(y) or y.startswith(x)) and similarity < 0.4:
+            return None
+        total += similarity
+    return total / min(len(a), len(b))
+
+
+def match_score(query: str, query_grams: Set[str], candidate: str) -> float:
+    """
+    1.0 for the same normalized name. Same surname with agreeing given names scores
+    0.85-0.99, by how much of the given names is known to match, so a bare "Dr. Smith"
+    scores every Smith alike. Anything else is the trigram Dice similarity.
+    """
+    if query == candidate:
+        return 1.0
+    q, c = query.split(), candidate.split()
+    if q and c and q[-1] == c[-1]:
+        agreement = _given_name_agreement(q[:-1], c[:-1])
+        if agreement is not None:
+            return round(0.85 + 0.14 * agreement, 4)
+    return round(_dice(query_grams, name_trigrams(candidate)), 4)
+
+
+class HCPMatch(NamedTuple):
+    hcp_id: UUID
+    name: str
+    score: float
+
+
+# -------------------------------------------------------
+# Trigram index
+# -------------------------------------------------------
+
+class HCPIndex:
+    """
+    In-memory candidate index over HCP master names. HCPs are only ever appended,
+    so updates are incremental.
+
+    A lookup scores a small candidate set exactly:
+      - the HCP with the same normalized name, if any
+      - HCPs with the same surname and first initial (the only ones that can get
+        the same-person score), at most `block_limit` of them
+      - the `rescore` HCPs sharing most trigrams with the query, counted over the
+        query's rarest posting lists only (at most `posting_budget` entries), which
+        catches misspelled surnames without ever walking a list like " sm"
+    """
+
+    def __init__(self, posting_budget: int = 1000, rescore: int = 8, block_limit: int = 64):
+        self.posting_budget = posting_budget
+        self.rescore = rescore
+        self.block_limit = block_limit
+        self._ids: List[UUID] = []
+        self._names: List[str] = []
+        self._keys: List[str] = []
+        self._by_key: Dict[str, int] = {}
+        self._by_id: Dict[UUID, int] = {}
+        self._blocks: Dict[Tuple[str, str], List[int]] = {}  # (surname, first initial or "") -> positions
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def trigram_count(self) -> int:
+        return len(self._postings)
+    @staticmethod
+    def _block_keys(tokens: List[str]) -> List[Tuple[str, str]]:
+        # Every HCP is in its surname-only block (for "Dr. Smith") and its initial block
+        if not tokens:
+            return []
+        keys = [(tokens[-1], "")]
+        if len(tokens) > 1:
+            keys.append((tokens[-1], tokens[0][0]))
+        return keys
+
+    def add(self, hcp_id: UUID, name: str, normalized: str) -> bool:
+        if hcp_id in self._by_id:
+            return False
+        position = len(self._ids)
+        self._ids.append(hcp_id)
+        self._names.append(name)
+        self._keys.append(normalized)
+        self._by_id[hcp_id] = position
+        self._by_key.setdefault(normalized, position)
+        for key in self._block_keys(normalized.split()):
+            self._blocks.setdefault(key, []).append(position)
+        for gram in name_trigrams(normalized):
+            self._postings.setdefault(gram, []).append(position)
+        return True
+
+    def get(self, hcp_id: UUID) -> Optional[HCPMatch]:
+        position = self._by_id.get(hcp_id)
+        return None if position is None else HCPMatch(hcp_id, self._names[position], 1.0)
+
+    def search(self, name: str, limit: int = 5, normalized: Optional[str] = None) -> List[HCPMatch]:
+        query = normalize_hcp_name(name) if normalized is None else normalized
+        grams = name_trigrams(query)
+        if not grams:
+            return []
+
+        positions: Set[int] = set()
+        exact = self._by_key.get(query)
+        if exact is not None:
+            positions.add(exact)
+        block_keys = self._block_keys(query.split())
+        positions.update(self._blocks.get(block_keys[-1], ())[:self.block_limit])
+
+        shared: Counter = Counter()
+        budget = self.posting_budget
+        for postings in sorted((self._postings.get(g, ()) for g in grams), key=len):
+            if len(postings) > budget and shared:
+                break
+            shared.update(postings[:budget])
+            budget -= len(postings)
+        positions.update(p for p, _ in shared.most_common(self.rescore))
+
+        scored = sorted(
+            (HCPMatch(self._ids[p], self._names[p], match_score(query, grams, self._keys[p])) for p in positions),
+            key=lambda m: (-m.score, m.name),
+        )
+        return scored[:limit]
+
+    def best_match(self, name: str, threshold: float, margin: float, normalized: Optional[str] = None) -> Optional[HCPMatch]:
+        """The top candidate if it clears `threshold` and beats the runner-up by `margin`."""
+        candidates = self.search(name, limit=2, normalized=normalized)
+        if not candidates or candidates[0].score < threshold:
+            return None
+        if len(candidates) > 1 and candidates[0].score < 1.0 and candidates[0].score - candidates[1].score < margin:
+            return None  # e.g. "Dr. Smith" with two Smiths on file
+        return candidates[0]
+
+
+def plan_resolution(
+    index: HCPIndex, names: Iterable[str], threshold: float, margin: float
+) -> Tuple[Dict[str, HCPMatch], Dict[str, str], Dict[str, str]]:
+    """
+    Resolves a batch of names against `index` without touching it. Returns
+    (matched: name -> match, pending: name -> normalized key of the HCP to create,
+    new: normalized key -> display name). Unmatched names are also matched against
+    each other, so "Dr. John Smith" and "Smith, J." in one batch create one HCP.
+    """
+    matched: Dict[str, HCPMatch] = {}
+    pending: Dict[str, str] = {}
+    new: Dict[str, str] = {}
+    batch = HCPIndex()
+    batch_keys: Dict[UUID, str] = {}
+    for name in dict.fromkeys(names):
+        normalized = normalize_hcp_name(name)
+        if not normalized:
+            continue
+        match = index.best_match(name, threshold, margin, normalized)
+        if match is not None:
+            matched[name] = match
+            continue
+        match = batch.best_match(name, threshold, margin, normalized)
+        if match is not None:
+            pending[name] = batch_keys[match.hcp_id]
+            continue
+        placeholder = uuid4()
+        batch.add(placeholder, name, normalized)
+        batch_keys[placeholder] = normalized
+        new[normalized] = name.strip()
+        pending[name] = normalized
+    return matched, pending, new
@@ -0,0 +1,345 @@
+import base64
+import hashlib
+import re
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID, uuid4
+from sqlalchemy import insert, or_, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.schemas import HCPInteractionCreate
+from models.database import HCPInteraction, InteractionListItem, utcnow
+from services.rollups import apply_rollups
+from services.transcripts import store_transcripts
+from services.search import index_for_search
+from config import settings
+
+
+# ------------------ LIST FIELDS ------------------
+# The list fields are written twice: as JSON on the interaction (the read copy
+# returned by the API) and as one interactionlistitem row per element, written
+# in the same transaction, which is what membership filters query.
+
+LIST_FIELDS = ("attendees", "topics_discussed", "materials_shared", "samples_distributed", "follow_up_actions")
+
+
+def list_item_rows(interaction_id: UUID, values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"interaction_id": interaction_id, "field": field, "position": position, "value": value}
+        for field in LIST_FIELDS
+        for position, value in enumerate(values.get(field) or ())
+    ]
+
+
+async def _insert_list_items(session: AsyncSession, rows: List[Dict[str, Any]]):
+    if rows:
+        await session.execute(insert(InteractionListItem), rows)
+
+
+def has_list_item(field: str, value: str):
+    """Filter for interactions whose `field` list contains `value` (served by ix_interactionlistitem_field_value)."""
+    return HCPInteraction.interaction_id.in_(
+        select(InteractionListItem.interaction_id).where(
+            InteractionListItem.field == field, InteractionListItem.value == value
+        )
+    )
+
+
+# ------------------ IDEMPOTENCY ------------------
+# Two unique indexes stop repeated writes:
+#   idempotency_key - sent by clients (Idempotency-Key header) or derived for
+#                     agent writes from thread_id + tool_call_id
+#   content_hash    - same HCP, date, type and normalized outcomes, which catches
+#                     the agent logging one conversation twice under new tool calls
+# A replayed write returns the stored record, served from a small LRU when this
+# worker saw the original, otherwise found with one indexed lookup.
+
+class IdempotencyKeyConflict(ValueError):
+    """The idempotency key was already used for a different interaction."""
+
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _normalize(value: str) -> str:
+    return _NON_WORD.sub(" ", value.casefold()).strip()
+
+
+def content_hash(data: HCPInteractionCreate) -> str:
+    key = "\x1f".join((
+        _normalize(data.hcp_name),
+        data.interaction_date.isoformat(),
+        data.interaction_type.casefold(),
+        _normalize(data.outcomes),
+    ))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ReplayCache:
+    """LRU of recently written records by idempotency key and by content hash."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, HCPInteraction]" = OrderedDict()
+        self.hits = 0
+
+    def get(self, idempotency_key: Optional[str], digest: str) -> Optional[HCPInteraction]:
+        for key in (f"key:{idempotency_key}" if idempotency_key else None, f"hash:{digest}"):
+            record = self._entries.get(key) if key else None
+            if record is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return record
+        return None
+
+    def put(self, record: HCPInteraction):
+        keys = [f"hash:{record.content_hash}"] if record.content_hash else []
+        if record.idempotency_key:
+            keys.append(f"key:{record.idempotency_key}")
+        for key in keys:
+            self._entries[key] = record
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+replay_cache = ReplayCache(settings.IDEMPOTENCY_CACHE_MAX_ENTRIES)
+
+
+async def _find_existing(session: AsyncSession, idempotency_key: Optional[str], digest: str) -> Optional[HCPInteraction]:
+    condition = HCPInteraction.content_hash == digest
+    if idempotency_key:
+        condition = or_(HCPInteraction.idempotency_key == idempotency_key, condition)
+    rows = (await session.exec(select(HCPInteraction).where(condition).limit(2))).all()
+    # A key match wins over a content match
+    return next((r for r in rows if idempotency_key and r.idempotency_key == idempotency_key), rows[0] if rows else None)
+
+
+_KEY_CONFLICT = "Idempotency-Key was already used for a different interaction."
+
+
+def _check_replay(record: HCPInteraction, idempotency_key: Optional[str], digest: str):
+    if idempotency_key and record.idempotency_key == idempotency_key and record.content_hash != digest:
+        raise IdempotencyKeyConflict(_KEY_CONFLICT)
+
+
+async def create_interaction(
+    session: AsyncSession, interaction_data: HCPInteractionCreate, idempotency_key: Optional[str] = None
+) -> Tuple[HCPInteraction, bool]:
+    """
+    Persists a validated interaction and returns (record, created). A repeat of an
+    earlier write (same idempotency key, or same content) returns the stored record
+    with created=False instead of inserting again.
+    Shared by the /log_form endpoint and the agent's log_interaction tool.
+    """
+    digest = content_hash(interaction_data)
+    existing = replay_cache.get(idempotency_key, digest)
+    if existing is None and idempotency_key:
+        # A keyed write is usually a retry when it misses the cache on this worker
+        existing = await _find_existing(session, idempotency_key, digest)
+
+    if existing is None:
+        try:
+            # The transcript row is written first because the interaction references it
+            [transcript_digest] = await store_transcripts(session, [interaction_data.raw_transcript])
+            # Convert Pydantic model to ORM model
+            db_record = HCPInteraction.model_validate(
+                interaction_data,
+                update={"idempotency_key": idempotency_key, "content_hash": digest, "transcript_digest": transcript_digest},
+            )
+            session.add(db_record)
+            values = interaction_data.model_dump()
+            await _insert_list_items(session, list_item_rows(db_record.interaction_id, values))
+            await apply_rollups(session, [values])
+            await index_for_search(session, [{
+                "interaction_id": db_record.interaction_id, "outcomes": db_record.outcomes,
+                "transcript": interaction_data.raw_transcript,
+            }])
+            # All column values are generated client-side and expire_on_commit=False keeps
+            # them loaded, so no refresh() round trip is needed after the commit.
+            await session.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent identical write
+            await session.rollback()
+            existing = await _find_existing(session, idempotency_key, digest)
+            if existing is None:
+                raise
+        else:
+            replay_cache.put(db_record)
+            return db_record, True
+
+    _check_replay(existing, idempotency_key, digest)
+    replay_cache.put(existing)
+    return existing, False
+
+
+def _insert_skipping_duplicates(session: AsyncSession):
+    """INSERT that skips rows violating a unique index (ON CONFLICT DO NOTHING)."""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(HCPInteraction)
+    return dialect_insert(HCPInteraction).on_conflict_do_nothing()
+
+
+async def bulk_create_interactions(
+    session: AsyncSession,
+    rows: Sequence[HCPInteractionCreate],
+    idempotency_keys: Optional[Sequence[Optional[str]]] = None,
+) -> List[Union[Tuple[UUID, bool], IdempotencyKeyConflict]]:
+    """
+    Inserts a chunk of validated interactions in one transaction using a multi-row
+    INSERT ... ON CONFLICT DO NOTHING RETURNING (SQLAlchemy batches the VALUES
+    clause) and returns (interaction_id, created) in input order. Rows that repeat
+    a stored interaction, or an earlier row of the chunk, get the existing id with
+    created=False. A row whose idempotency key is stored with different content
+    gets an IdempotencyKeyConflict instead, as create_interaction() would raise.
+    The caller bounds the chunk size.
+    """
+    if not rows:
+        return []
+
+    now = utcnow()
+    keys = idempotency_keys or [None] * len(rows)
+    transcript_digests = await store_transcripts(session, [row.raw_transcript for row in rows])
+    values = [
+        {**row.model_dump(exclude={"raw_transcript"}), "interaction_id": uuid4(), "created_at": now,
+         "idempotency_key": key, "content_hash": content_hash(row), "transcript_digest": transcript_digest}
+        for row, key, transcript_digest in zip(rows, keys, transcript_digests)
+    ]
+    result = await session.execute(
+        _insert_skipping_duplicates(session).returning(HCPInteraction.interaction_id), values
+    )
+    created = set(result.scalars())
+    inserted = [v for v in values if v["interaction_id"] in created]
+    await _insert_list_items(session, [item for v in inserted for item in list_item_rows(v["interaction_id"], v)])
+    await apply_rollups(session, inserted)
+    transcripts = {v["interaction_id"]: row.raw_transcript for row, v in zip(rows, values)}
+    await index_for_search(session, [
+        {"interaction_id": v["interaction_id"], "outcomes": v["outcomes"], "transcript": transcripts[v["interaction_id"]]}
+        for v in inserted
+    ])
+
+    skipped = [v for v in values if v["interaction_id"] not in created]
+    existing = {}
+    if skipped:
+        # One indexed lookup for all skipped rows of the chunk
+        hashes = [v["content_hash"] for v in skipped]
+        skipped_keys = [v["idempotency_key"] for v in skipped if v["idempotency_key"]]
+        condition = HCPInteraction.content_hash.in_(hashes)
+        if skipped_keys:
+            condition = or_(condition, HCPInteraction.idempotency_key.in_(skipped_keys))
+        found = await session.execute(
+            select(HCPInteraction.interaction_id, HCPInteraction.content_hash, HCPInteraction.idempotency_key).where(condition)
+        )
+        for interaction_id, digest, key in found.all():
+            existing[f"hash:{digest}"] = (interaction_id, digest)
+            if key:
+                existing[f"key:{key}"] = (interaction_id, digest)
+    await session.commit()
+
+    results = []
+    for v in values:
+        if v["interaction_id"] in created:
+            results.append((v["interaction_id"], True))
+            continue
+        # A key match wins over a content match, and must be for the same content
+        interaction_id, digest = existing.get(f"key:{v['idempotency_key']}") or existing[f"hash:{v['content_hash']}"]
+        if digest != v["content_hash"]:
+            results.append(IdempotencyKeyConflict(_KEY_CONFLICT))
+        else:
+            results.append((interaction_id, False))
+    return results
+
+
+# ------------------ KEYSET PAGINATION ------------------
+# Pages are ordered by (interaction_date, interaction_id) DESC. The cursor is the
+# key of the last row of the previous page, so every page is an index range scan
+# that starts where the last one stopped, regardless of how deep the page is.
+
+def encode_cursor(interaction_date: date, interaction_id: UUID) -> str:
+    raw = f"{interaction_date.isoformat()}|{interaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, UUID]:
+    """Raises ValueError for malformed cursors."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    raw_date, raw_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+    return date.fromisoformat(raw_date), UUID(raw_id)
+
+
+async def list_interactions(
+    session: AsyncSession,
+    *,
+    hcp_name: Optional[str] = None,
+    hcp_id: Optional[UUID] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    interaction_type: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    attendee: Optional[str] = None,
+    topic: Optional[str] = None,
+    material: Optional[str] = None,
+    sample: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_transcript: bool = False,
+) -> Tuple[List[HCPInteraction], Optional[str]]:
+    """
+    Returns one page of interactions (newest first) and the cursor of the next page.
+    attendee/topic/material/sample match one element of the corresponding list exactly.
+    Transcripts are only loaded (one extra query for the page) with include_transcript.
+    """
+    query = select(HCPInteraction)
+    if include_transcript:
+        query = query.options(selectinload(HCPInteraction.transcript))
+
+    if hcp_name is not None:
+        query = query.where(HCPInteraction.hcp_name == hcp_name)
+    if hcp_id is not None:
+        query = query.where(HCPInteraction.hcp_id == hcp_id)
+    if interaction_type is not None:
+        query = query.where(HCPInteraction.interaction_type == interaction_type)
+    if sentiment is not None:
+        query = query.where(HCPInteraction.sentiment == sentiment)
+    for field, value in (
+        ("attendees", attendee), ("topics_discussed", topic),
+        ("materials_shared", material), ("samples_distributed", sample),
+    ):
+        if value is not None:
+            query = query.where(has_list_item(field, value))
+    if date_from is not None:
+        query = query.where(HCPInteraction.interaction_date >= date_from)
+    if date_to is not None:
+        query = query.where(HCPInteraction.interaction_date <= date_to)
+    if cursor is not None:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(HCPInteraction.interaction_date, HCPInteraction.interaction_id) < (after_date, after_id)
+        )
+
+    # Fetch one extra row to learn whether another page exists
+    query = query.order_by(
+        HCPInteraction.interaction_date.desc(), HCPInteraction.interaction_id.desc()
+    ).limit(limit + 1)
+
+    rows = list((await session.exec(query)).all())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].interaction_date, rows[-1].interaction_id)
+    return rows, next_cursor
+
+
+async def get_interaction(
+    session: AsyncSession, interaction_id: UUID, include_transcript: bool = False
+) -> Optional[HCPInteraction]:
+    options = [selectinload(HCPInteraction.transcript)] if include_transcript else None
+    return await session.get(HCPInteraction, interaction_id, options=options)
@@ -0,0 +1,232 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import case, text
+from sqlalchemy.engine import Connection
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.database import (
+    HCPInteraction, InteractionDailyRollup, InteractionRollupSummary, InteractionRollupItem, RollupCounters
+)
+
+
+# ------------------ DELTAS ------------------
+# Every interaction adds to three rollups for its HCP and for each rep among its
+# attendees: the counters of its day, the all-time summary (with first/last
+# contact) and the per-item totals of materials and samples. Deltas for a set of
+# interactions are summed per primary key first, so a bulk chunk costs one upsert
+# per touched rollup row rather than one per interaction.
+
+ITEM_FIELDS = ("materials_shared", "samples_distributed")
+COUNTER_COLUMNS = tuple(RollupCounters.model_fields)
+
+_TYPE_COUNTERS = {"Meeting": "meetings", "Call": "calls", "Email": "emails"}
+_SENTIMENT_COUNTERS = {"Positive": "positive", "Neutral": "neutral", "Negative": "negative"}
+
+ROLLUP_COLUMNS = ("hcp_name", "interaction_type", "interaction_date", "sentiment", "attendees", *ITEM_FIELDS)
+
+
+class RollupDeltas:
+    def __init__(self):
+        self.daily: Dict[Tuple[str, str, date], Counter] = defaultdict(Counter)
+        self.summary: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self.contacts: Dict[Tuple[str, str], Tuple[date, date]] = {}
+        self.items: Counter = Counter()
+
+    def add(self, row: Mapping[str, Any]):
+        day = row["interaction_date"]
+        counts = {"interactions": 1, _TYPE_COUNTERS[row["interaction_type"]]: 1, _SENTIMENT_COUNTERS[row["sentiment"]]: 1}
+        for field in ITEM_FIELDS:
+            counts[field] = len(row[field] or ())
+
+        keys = [("hcp", row["hcp_name"])] + [("rep", name) for name in sorted(set(row["attendees"] or ()))]
+        for dimension, key in keys:
+            self.daily[(dimension, key, day)].update(counts)
+            self.summary[(dimension, key)].update(counts)
+            first, last = self.contacts.get((dimension, key), (day, day))
+            self.contacts[(dimension, key)] = (min(first, day), max(last, day))
+            for field in ITEM_FIELDS:
+                for value in row[field] or ():
+                    self.items[(dimension, key, field, value)] += 1
+
+    @classmethod
+    def of(cls, rows: Iterable[Mapping[str, Any]]) -> "RollupDeltas":
+        deltas = cls()
+        for row in rows:
+            deltas.add(row)
+        return deltas
+
+
+def _dialect_insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def rollup_statements(dialect: str, deltas: RollupDeltas) -> List[Tuple[Any, List[Dict[str, Any]]]]:
+    """
+    (statement, rows) pairs that add `deltas` with INSERT ... ON CONFLICT DO UPDATE.
+    Rows are sorted by primary key so concurrent writers lock rollup rows in the
+    same order and cannot deadlock each other.
+    """
+    insert = _dialect_insert(dialect)
+    statements = []
+
+    def counters(counter: Counter) -> Dict[str, int]:
+        return {column: counter.get(column, 0) for column in COUNTER_COLUMNS}
+
+    def additive_upsert(model, keys, columns):
+        stmt = insert(model)
+        table = model.__table__
+        return stmt.on_conflict_do_update(
+            index_elements=keys, set_={column: table.c[column] + stmt.excluded[column] for column in columns}
+        )
+
+    if deltas.daily:
+        stmt = additive_upsert(InteractionDailyRollup, ["dimension", "key", "day"], COUNTER_COLUMNS)
+        rows = [
+            {"dimension": dimension, "key": key, "day": day, **counters(counter)}
+            for (dimension, key, day), counter in sorted(deltas.daily.items())
+        ]
+        statements.append((stmt, rows))
+
+    if deltas.summary:
+        table = InteractionRollupSummary.__table__
+        insert_stmt = insert(InteractionRollupSummary)
+        excluded = insert_stmt.excluded
+        set_ = {column: table.c[column] + excluded[column] for column in COUNTER_COLUMNS}
+        set_["first_contact"] = case(
+            (excluded.first_contact < table.c.first_contact, excluded.first_contact), else_=table.c.first_contact
+        )
+        set_["last_contact"] = case(
+            (excluded.last_contact > table.c.last_contact, excluded.last_contact), else_=table.c.last_contact
+        )
+        stmt = insert_stmt.on_conflict_do_update(index_elements=["dimension", "key"], set_=set_)
+        rows = [
+            {"dimension": dimension, "key": key, **counters(counter),
+             "first_contact": deltas.contacts[(dimension, key)][0], "last_contact": deltas.contacts[(dimension, key)][1]}
+            for (dimension, key), counter in sorted(deltas.summary.items())
+        ]
+        statements.append((stmt, rows))
+
+    if deltas.items:
+        stmt = additive_upsert(InteractionRollupItem, ["dimension", "key", "field", "value"], ["total"])
+        rows = [
+            {"dimension": dimension, "key": key, "field": field, "value": value, "total": total}
+            for (dimension, key, field, value), total in sorted(deltas.items.items())
+        ]
+        statements.append((stmt, rows))
+
+    return statements
+
+
+async def apply_rollups(session: AsyncSession, rows: Iterable[Mapping[str, Any]]):
+    """
+    Adds newly written interactions to the rollups inside the caller's transaction,
+    so the rollups commit (or roll back) together with the interactions.
+    """
+    for stmt, params in rollup_statements(session.bind.dialect.name, RollupDeltas.of(rows)):
+        await session.execute(stmt, params)
+
+
+# ------------------ REBUILD ------------------
+
+ROLLUP_TABLES = (InteractionDailyRollup.__table__, InteractionRollupSummary.__table__, InteractionRollupItem.__table__)
+
+
+def rebuild_rollups(conn: Connection, batch_size: int = 5000) -> int:
+    """
+    Recomputes every rollup from hcpinteraction in one transaction and returns the
+    number of interactions scanned. On Postgres the rollup tables are locked first:
+    concurrent writers wait at their rollup upsert until the rebuild commits, so an
+    interaction is counted exactly once whichever side of the rebuild it lands on.
+    Runs on a sync Connection (migrations, or AsyncConnection.run_sync).
+    """
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        conn.execute(text(
+            "LOCK TABLE interactiondailyrollup, interactionrollupsummary, interactionrollupitem IN SHARE ROW EXCLUSIVE MODE"
+        ))
+    for table in ROLLUP_TABLES:
+        conn.execute(table.delete())
+
+    source = HCPInteraction.__table__
+    scanned = 0
+    last_id = None
+    while True:
+        query = select(source.c.interaction_id, *[source.c[column] for column in ROLLUP_COLUMNS])
+        if last_id is not None:
+            query = query.where(source.c.interaction_id > last_id)
+        rows = conn.execute(query.order_by(source.c.interaction_id).limit(batch_size)).all()
+        if not rows:
+            break
+        for stmt, params in rollup_statements(dialect, RollupDeltas.of(row._mapping for row in rows)):
+            conn.execute(stmt, params)
+        scanned += len(rows)
+        last_id = rows[-1].interaction_id
+    return scanned
+
+
+# ------------------ READS ------------------
+# Dashboards read one summary row, at most `days` daily rows (a primary-key range
+# scan) and the item totals of one key, so their cost does not grow with history.
+
+def _counters(row) -> Dict[str, int]:
+    return {column: getattr(row, column) for column in COUNTER_COLUMNS}
+
+
+def _summary(row: InteractionRollupSummary, today: date) -> Dict[str, Any]:
+    return {
+        "dimension": row.dimension, "key": row.key, **_counters(row),
+        "first_contact": row.first_contact, "last_contact": row.last_contact,
+        "days_since_last_contact": (today - row.last_contact).days,
+    }
+
+
+async def get_dashboard(session: AsyncSession, dimension: str, key: str, days: int, top: int = 10) -> Optional[Dict[str, Any]]:
+    summary = await session.get(InteractionRollupSummary, (dimension, key))
+    if summary is None:
+        return None
+    today = datetime.utcnow().date()
+
+    daily = (await session.exec(
+        select(InteractionDailyRollup)
+        .where(
+            InteractionDailyRollup.dimension == dimension,
+            InteractionDailyRollup.key == key,
+            InteractionDailyRollup.day > today - timedelta(days=days),
+        )
+        .order_by(InteractionDailyRollup.day)
+    )).all()
+
+    items = (await session.exec(
+        select(InteractionRollupItem).where(InteractionRollupItem.dimension == dimension, InteractionRollupItem.key == key)
+    )).all()
+    top_items = {field: [] for field in ITEM_FIELDS}
+    for item in sorted(items, key=lambda i: (-i.total, i.value)):
+        if len(top_items[item.field]) < top:
+            top_items[item.field].append({"value": item.value, "total": item.total})
+
+    return {
+        "summary": _summary(summary, today),
+        "daily": [{"day": row.day, **_counters(row)} for row in daily],
+        "materials": top_items["materials_shared"],
+        "samples": top_items["samples_distributed"],
+    }
+
+
+async def list_summaries(
+    session: AsyncSession, dimension: str, *, inactive_days: Optional[int] = None, limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Summaries ordered by last contact, longest without contact first (ix_interactionrollupsummary_dimension_last_contact)."""
+    today = datetime.utcnow().date()
+    query = select(InteractionRollupSummary).where(InteractionRollupSummary.dimension == dimension)
+    if inactive_days is not None:
+        query = query.where(InteractionRollupSummary.last_contact <= today - timedelta(days=inactive_days))
+    query = query.order_by(InteractionRollupSummary.last_contact, InteractionRollupSummary.key).limit(limit)
+    rows = (await session.exec(query)).all()
+    return [_summary(row, today) for row in rows]
@@ -0,0 +1,110 @@
+import re
+from typing import Any, Dict, List, Sequence
+from uuid import UUID
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.schemas import SearchHit, SearchResult
+from database.search import FTS_DOC_TABLE, FTS_TABLE, SQLITE_INDEXED, sqlite_index_statements
+
+
+# Ranking and snippets are computed inside the database against the full-text
+# index; rows are never loaded into Python to be substring-matched. The one
+# exception is the SQLite snippet: the FTS5 table is contentless (transcripts are
+# stored compressed), so the matched terms are marked in the hit's outcomes here.
+
+_POSTGRES_SEARCH = text("""
+    SELECT ranked.*,
+           ts_headline('english', h.outcomes, ranked.tsq, 'StartSel="[", StopSel="]", MaxFragments=1, MinWords=5, MaxWords=20') AS snippet
+    FROM (
+        SELECT h.interaction_id, h.hcp_name, h.interaction_date, h.interaction_type,
+               ts_rank_cd(h.search_vector, tsq) AS rank, tsq
+        FROM hcpinteraction h, websearch_to_tsquery('english', :query) AS tsq
+        WHERE h.search_vector @@ tsq
+        ORDER BY rank DESC, h.interaction_id
+        LIMIT :limit OFFSET :offset
+    ) ranked
+    JOIN hcpinteraction h ON h.interaction_id = ranked.interaction_id
+    ORDER BY ranked.rank DESC, ranked.interaction_id
+""")
+
+# bm25() is "lower is better"; outcomes are weighted above the transcript
+_SQLITE_SEARCH = text(f"""
+    SELECT h.interaction_id, h.hcp_name, h.interaction_date, h.interaction_type,
+           -bm25({FTS_TABLE}, 1.0, 0.5) AS rank,
+           h.outcomes AS snippet
+    FROM {FTS_TABLE}
+    JOIN {FTS_DOC_TABLE} d ON d.docid = {FTS_TABLE}.rowid
+    JOIN hcpinteraction h ON h.interaction_id = d.interaction_id
+    WHERE {FTS_TABLE} MATCH :query
+    ORDER BY bm25({FTS_TABLE}, 1.0, 0.5)
+    LIMIT :limit OFFSET :offset
+""")
+
+_TERM = re.compile(r"\w+")
+
+
+def _fts5_query(query: str) -> str:
+    """Quotes every term so user input can never be parsed as FTS5 syntax."""
+    return " ".join(f'"{term}"' for term in _TERM.findall(query))
+
+
+def _snippet(outcomes: str, query: str, words: int = 16) -> str:
+    """Up to `words` words of `outcomes` around the first query term, terms marked [like this]."""
+    terms = {term.casefold() for term in _TERM.findall(query)}
+    tokens = outcomes.split()
+    hits = {i for i, token in enumerate(tokens) if any(t.casefold() in terms for t in _TERM.findall(token))}
+    start = max(0, min(min(hits) - 3, len(tokens) - words)) if hits else 0
+    window = [f"[{token}]" if i in hits else token for i, token in enumerate(tokens[start:start + words], start)]
+    return ("…" if start else "") + " ".join(window) + ("…" if start + words < len(tokens) else "")
+
+
+async def index_for_search(session: AsyncSession, rows: Sequence[Dict[str, Any]]):
+    """
+    Indexes written interactions (interaction_id, outcomes, transcript) in the
+    SQLite full-text table inside the caller's transaction; an interaction that
+    is already indexed has its entry replaced, so call it again after an update.
+    Postgres indexes them with a trigger, so this is a no-op there.
+    """
+    if rows and session.bind.dialect.name == "sqlite":
+        indexed = (await session.execute(
+            SQLITE_INDEXED, {"interaction_ids": [row["interaction_id"] for row in rows]}
+        )).all()
+        for statement, params in sqlite_index_statements(rows, indexed):
+            await session.execute(statement, params)
+
+
+async def search_interactions(session: AsyncSession, query: str, limit: int = 20, offset: int = 0) -> List[SearchHit]:
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        statement, match = _POSTGRES_SEARCH, query
+    elif dialect == "sqlite":
+        statement, match = _SQLITE_SEARCH, _fts5_query(query)
+    else:
+        raise NotImplementedError(f"Full-text search is not available for {dialect}")
+
+    if not match.strip():
+        return []
+
+    rows = await session.execute(statement, {"query": match, "limit": limit, "offset": offset})
+    return [
+        SearchHit(
+            interaction_id=row.interaction_id if isinstance(row.interaction_id, UUID) else UUID(str(row.interaction_id)),
+            hcp_name=row.hcp_name,
+            interaction_date=row.interaction_date,
+            interaction_type=row.interaction_type,
+            rank=float(row.rank),
+            snippet=(_snippet(row.snippet or "", query) if dialect == "sqlite" else row.snippet) or "",
+        )
+        for row in rows
+    ]
+
+
+def summarize_hits(query: str, hits: List[SearchHit]) -> SearchResult:
+    """Compact tool output so the agent reads snippets, not full history."""
+    if not hits:
+        return SearchResult(summary=f"No past interactions match '{query}'.", source_documents=[])
+    lines = [f"{h.interaction_date} | {h.hcp_name} | {h.interaction_type}: {h.snippet}" for h in hits]
+    return SearchResult(
+        summary=f"Found {len(hits)} matching interactions for '{query}':\n" + "\n".join(lines),
+        source_documents=[str(h.interaction_id) for h in hits],
+    )
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID, uuid4
+
+from models.database import FollowUpTask, utcnow
+from database.setup import async_session_factory
+from services.tasks import load_pending_window, claim_due_tasks, mark_reminded
+from config import settings
+from observability.log import get_logger
+from observability.metrics import TASK_REMINDERS, TASK_SCHEDULER_HEAP
+
+logger = get_logger(__name__)
+
+ReminderSink = Callable[[List[FollowUpTask]], Awaitable[None]]
+
+# Window end before the first refresh (remind_at values are aware UTC)
+_NO_WINDOW = datetime.min.replace(tzinfo=timezone.utc)
+
+
+async def log_reminders(tasks: List[FollowUpTask]):
+    """Default delivery: one log line per reminder. Swap in a notifier via TaskScheduler.sink."""
+    for task in tasks:
+        logger.info(
+            "Reminder for %s: %s (due %s, %s priority, task %s)",
+            task.assigned_user_id, task.task_description, task.due_date, task.priority, task.task_id,
+        )
+
+
+# -------------------------------------------------------
+# Scheduler
+# -------------------------------------------------------
+
+class TaskScheduler:
+    """
+    In-process reminder scheduler backed by the followuptask table.
+
+    Only a look-ahead window is held in memory: a min-heap of (remind_at, task_id)
+    for at most `window_size` pending tasks due within `window_seconds`, loaded with
+    one index range scan. The loop sleeps until the head of the heap is due, pops
+    every due entry (up to `batch_size`), claims them under a row lease, hands them
+    to the sink in one call and marks them reminded. The window is reloaded every
+    `refresh_seconds`, which also picks up tasks created by other workers and tasks
+    whose lease expired; tasks created in this process are pushed in via notify().
+
+    Several workers may run the same window: the claim decides which one delivers.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        window_seconds: float,
+        window_size: int,
+        batch_size: int,
+        lease_seconds: float,
+        refresh_seconds: float,
+        sink: ReminderSink = log_reminders,
+    ):
+        self.session_factory = session_factory
+        self.window_seconds = window_seconds
+        self.window_size = window_size
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.refresh_seconds = refresh_seconds
+        self.sink = sink
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+        self._heap: List[Tuple[datetime, UUID]] = []
+        self._queued: Set[UUID] = set()
+        self._window_end = _NO_WINDOW
+        self._window_full = False
+        self._next_refresh = 0.0
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.reminded = 0
+        self.lost_claims = 0
+        self.refreshes = 0
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._next_refresh = 0.0
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self, task: FollowUpTask):
+        """Schedules a task committed by this process without waiting for the next refresh."""
+        if task.status == "pending" and task.remind_at <= self._window_end and task.task_id not in self._queued:
+            self._push(task.remind_at, task.task_id)
+            if self._wake is not None:
+                self._wake.set()
+
+    # ---------------------------
+    # Heap
+    # ---------------------------
+
+    def _push(self, remind_at: datetime, task_id: UUID):
+        heapq.heappush(self._heap, (remind_at, task_id))
+        self._queued.add(task_id)
+
+    def _pop_due(self, now: datetime) -> List[UUID]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            _, task_id = heapq.heappop(self._heap)
+            self._queued.discard(task_id)
+            due.append(task_id)
+        return due
+
+    async def refresh(self):
+        now = utcnow()
+        until = now + timedelta(seconds=self.window_seconds)
+        async with self.session_factory() as session:
+            rows = await load_pending_window(session, until, self.window_size, now)
+        # Rows arrive sorted by remind_at, and a sorted list is already a heap
+        self._heap = rows
+        self._queued = {task_id for _, task_id in rows}
+        # A full window ends at its last row; anything later waits for the next refresh
+        self._window_full = len(rows) >= self.window_size
+        self._window_end = rows[-1][0] if self._window_full else until
+        self._next_refresh = time.monotonic() + self.refresh_seconds
+        self.refreshes += 1
+        TASK_SCHEDULER_HEAP.set(len(self._heap))
+
+    # ---------------------------
+    # Firing
+    # ---------------------------
+
+    async def fire(self, task_ids: Sequence[UUID]) -> int:
+        now = utcnow()
+        async with self.session_factory() as session:
+            claimed = await claim_due_tasks(session, task_ids, self.worker_id, self.lease_seconds, now)
+        self.lost_claims += len(task_ids) - len(claimed)
+        if not claimed:
+            return 0
+
+        await self.sink(claimed)
+
+        async with self.session_factory() as session:
+            marked = await mark_reminded(session, [t.task_id for t in claimed], self.worker_id, utcnow())
+        self.reminded += marked
+        TASK_REMINDERS.inc(marked)
+        return marked
+
+    async def _run(self):
+        while True:
+            try:
+                # A drained full window means more tasks are waiting in the table
+                if time.monotonic() >= self._next_refresh or (self._window_full and not self._heap):
+                    await self.refresh()
+
+                due = self._pop_due(utcnow())
+                if due:
+                    await self.fire(due)
+                    TASK_SCHEDULER_HEAP.set(len(self._heap))
+                    continue
+
+                timeout = self._next_refresh - time.monotonic()
+                if self._heap:
+                    timeout = min(timeout, (self._heap[0][0] - utcnow()).total_seconds())
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), max(0.0, timeout))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # DB hiccup: retry with a fresh window instead of dying
+                logger.warning("Task scheduler iteration failed: %s", e)
+                self._next_refresh = 0.0
+                await asyncio.sleep(min(self.refresh_seconds, 5.0))
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "running": self._task is not None and not self._task.done(),
+            "heap_size": len(self._heap),
+            "window_end": self._window_end if self._window_end != _NO_WINDOW else None,
+            "next_due": self._heap[0][0] if self._heap else None,
+            "reminded": self.reminded,
+            "lost_claims": self.lost_claims,
+            "refreshes": self.refreshes,
+        }
+
+
+task_scheduler = TaskScheduler(
+    async_session_factory,
+    window_seconds=settings.TASK_SCHEDULER_WINDOW_SECONDS,
+    window_size=settings.TASK_SCHEDULER_WINDOW_SIZE,
+    batch_size=settings.TASK_REMINDER_BATCH_SIZE,
+    lease_seconds=settings.TASK_LEASE_SECONDS,
+    refresh_seconds=settings.TASK_SCHEDULER_REFRESH_SECONDS,
+)
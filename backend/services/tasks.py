@@ -0,0 +1,137 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import or_, tuple_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.schemas import FollowUpTaskCreate
+from models.database import FollowUpTask
+from services.interactions import encode_cursor, decode_cursor
+from config import settings
+
+
+def default_remind_at(due_date: date) -> datetime:
+    return datetime.combine(due_date, time(hour=settings.TASK_DEFAULT_REMINDER_HOUR), tzinfo=timezone.utc)
+
+
+def to_utc(value: datetime) -> datetime:
+    # Timestamps are aware UTC, like created_at; a naive value is taken as UTC
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+async def create_follow_up_task(session: AsyncSession, task_data: FollowUpTaskCreate) -> FollowUpTask:
+    """
+    Persists a follow-up task. Shared by the /tasks endpoint and the agent's
+    schedule_follow_up_task tool; the caller notifies the scheduler after the commit.
+    """
+    db_record = FollowUpTask.model_validate(
+        task_data,
+        update={"remind_at": to_utc(task_data.remind_at) if task_data.remind_at else default_remind_at(task_data.due_date)},
+    )
+    session.add(db_record)
+    await session.commit()
+    return db_record
+
+
+async def list_follow_up_tasks(
+    session: AsyncSession,
+    *,
+    assigned_user_id: Optional[str] = None,
+    status: Optional[str] = None,
+    due_before: Optional[date] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[FollowUpTask], Optional[str]]:
+    """Returns one page of tasks, earliest due date first, and the cursor of the next page."""
+    query = select(FollowUpTask)
+
+    if assigned_user_id is not None:
+        query = query.where(FollowUpTask.assigned_user_id == assigned_user_id)
+    if status is not None:
+        query = query.where(FollowUpTask.status == status)
+    if due_before is not None:
+        query = query.where(FollowUpTask.due_date <= due_before)
+    if cursor is not None:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.where(tuple_(FollowUpTask.due_date, FollowUpTask.task_id) > (after_date, after_id))
+
+    query = query.order_by(FollowUpTask.due_date, FollowUpTask.task_id).limit(limit + 1)
+
+    rows = list((await session.exec(query)).all())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].due_date, rows[-1].task_id)
+    return rows, next_cursor
+
+
+async def complete_follow_up_task(session: AsyncSession, task_id: UUID) -> Optional[FollowUpTask]:
+    task = await session.get(FollowUpTask, task_id)
+    if task is None:
+        return None
+    task.status = "done"
+    task.lease_owner = None
+    task.lease_expires_at = None
+    session.add(task)
+    await session.commit()
+    return task
+
+
+# ------------------ SCHEDULER QUERIES ------------------
+# Reminders are delivered under a row lease: a worker claims due tasks with a
+# conditional UPDATE (pending and not leased, or lease expired), delivers them,
+# then marks them reminded. Competing workers never claim the same row; a worker
+# that dies mid-delivery leaves an expiring lease, and the task is redelivered.
+
+async def load_pending_window(
+    session: AsyncSession, until: datetime, limit: int, now: datetime
+) -> List[Tuple[datetime, UUID]]:
+    """(remind_at, task_id) of the earliest unleased pending tasks due by `until` (a range
+    scan of ix_followuptask_status_remind_at), in reminder order."""
+    result = await session.execute(
+        select(FollowUpTask.remind_at, FollowUpTask.task_id)
+        .where(
+            FollowUpTask.status == "pending",
+            FollowUpTask.remind_at <= until,
+            or_(FollowUpTask.lease_expires_at.is_(None), FollowUpTask.lease_expires_at < now),
+        )
+        .order_by(FollowUpTask.remind_at)
+        .limit(limit)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def claim_due_tasks(
+    session: AsyncSession, task_ids: Sequence[UUID], owner: str, lease_seconds: float, now: datetime
+) -> List[FollowUpTask]:
+    claimable = (
+        select(FollowUpTask.task_id)
+        .where(
+            FollowUpTask.task_id.in_(task_ids),
+            FollowUpTask.status == "pending",
+            FollowUpTask.remind_at <= now,
+            or_(FollowUpTask.lease_expires_at.is_(None), FollowUpTask.lease_expires_at < now),
+        )
+        # Postgres: rows another worker is claiming right now are skipped, not waited on
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(
+        update(FollowUpTask)
+        .where(FollowUpTask.task_id.in_(claimable))
+        .values(lease_owner=owner, lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .returning(*FollowUpTask.__table__.c)
+    )
+    claimed = [FollowUpTask.model_validate(dict(row._mapping)) for row in result.all()]
+    await session.commit()
+    return claimed
+
+
+async def mark_reminded(session: AsyncSession, task_ids: Sequence[UUID], owner: str, now: datetime) -> int:
+    """Releases the lease and records the reminder; rows whose lease was lost are left alone."""
+    result = await session.execute(
+        update(FollowUpTask)
+        .where(FollowUpTask.task_id.in_(task_ids), FollowUpTask.lease_owner == owner, FollowUpTask.status == "pending")
+        .values(status="reminded", reminded_at=now, lease_owner=None, lease_expires_at=None)
+    )
+    await session.commit()
+    return result.rowcount
@@ -0,0 +1,116 @@
+import hashlib
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.database import Transcript, utcnow
+from config import settings
+
+
+# ------------------ ENCODING ------------------
+# A transcript is keyed by the sha256 of its UTF-8 text and stored compressed
+# with TRANSCRIPT_CODEC. The codec is kept per row, so changing the setting only
+# affects new transcripts; text that does not shrink is stored as is ("none").
+
+def transcript_digest(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _zstandard():
+    import zstandard  # optional dependency (requirements.txt)
+
+    return zstandard
+
+
+def encode_transcript(body: str, codec: Optional[str] = None) -> Dict[str, Any]:
+    """Column values of a transcript row for `body`."""
+    raw = body.encode()
+    codec = codec or settings.TRANSCRIPT_CODEC
+    if codec == "zstd":
+        data = _zstandard().ZstdCompressor(level=3).compress(raw)
+    elif codec == "zlib":
+        data = zlib.compress(raw, 6)
+    else:
+        raise ValueError(f"Unknown transcript codec '{codec}'")
+    if len(data) >= len(raw):
+        codec, data = "none", raw
+    return {"digest": hashlib.sha256(raw).hexdigest(), "codec": codec, "size": len(raw), "data": data}
+
+
+def decode_transcript(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        raw = _zstandard().ZstdDecompressor().decompress(data)
+    elif codec == "zlib":
+        raw = zlib.decompress(data)
+    elif codec == "none":
+        raw = data
+    else:
+        raise ValueError(f"Unknown transcript codec '{codec}'")
+    return bytes(raw).decode()
+
+
+def transcript_text(transcript: Optional[Transcript]) -> Optional[str]:
+    return None if transcript is None else decode_transcript(transcript.codec, transcript.data)
+
+
+# ------------------ STORE ------------------
+# Writes go through INSERT ... ON CONFLICT (digest) DO NOTHING RETURNING digest,
+# so an identical transcript costs no new row. On Postgres each newly inserted
+# transcript also gets its tsvector, which the hcpinteraction search trigger
+# copies into every interaction referencing it (database/search.py).
+# Rows are sorted by digest so concurrent writers cannot deadlock each other.
+
+_POSTGRES_INDEX = text(
+    "UPDATE transcript SET search_vector = setweight(to_tsvector('english', :body), 'B') WHERE digest = :digest"
+)
+
+def plan_transcripts(bodies: Iterable[Optional[str]]) -> Tuple[List[Optional[str]], Dict[str, str]]:
+    """Digest of each body in input order (None when empty) and the distinct bodies by digest."""
+    digests, distinct = [], {}
+    for body in bodies:
+        if not body:
+            digests.append(None)
+            continue
+        digest = transcript_digest(body)
+        digests.append(digest)
+        distinct.setdefault(digest, body)
+    return digests, distinct
+
+
+def _store_statements(dialect: str, distinct: Dict[str, str]):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    now = utcnow()
+    rows = [{**encode_transcript(distinct[digest]), "created_at": now} for digest in sorted(distinct)]
+    stmt = insert(Transcript).on_conflict_do_nothing(index_elements=["digest"]).returning(Transcript.digest)
+    return stmt, rows, _POSTGRES_INDEX if dialect == "postgresql" else None
+
+
+async def store_transcripts(session: AsyncSession, bodies: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """
+    Stores the non-empty transcripts inside the caller's transaction and returns
+    their digests in input order (None for an empty transcript).
+    """
+    digests, distinct = plan_transcripts(bodies)
+    if distinct:
+        stmt, rows, index_stmt = _store_statements(session.bind.dialect.name, distinct)
+        inserted = sorted((await session.execute(stmt, rows)).scalars())
+        if inserted and index_stmt is not None:
+            await session.execute(index_stmt, [{"digest": digest, "body": distinct[digest]} for digest in inserted])
+    return digests
+
+
+def store_transcripts_sync(conn: Connection, bodies: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """store_transcripts() for a sync Connection (migrations)."""
+    digests, distinct = plan_transcripts(bodies)
+    if distinct:
+        stmt, rows, index_stmt = _store_statements(conn.dialect.name, distinct)
+        inserted = sorted(conn.execute(stmt, rows).scalars())
+        if inserted and index_stmt is not None:
+            conn.execute(index_stmt, [{"digest": digest, "body": distinct[digest]} for digest in inserted])
+    return digests
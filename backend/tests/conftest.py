@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Settings are read at import time: point them at throwaway values before any app module loads
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("LANGGRAPH_CHECKPOINTER_URL", "sqlite:///:memory:")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from config import settings
+from models.schemas import ComplianceCheckSchema
+from services.compliance import ComplianceChecker, ComplianceEngine, load_material_aliases, load_rules
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return ComplianceEngine(
+        load_rules(settings.COMPLIANCE_RULES_PATH), load_material_aliases(settings.EXTRACTION_GAZETTEER_PATH)
+    )
+
+
+@pytest.mark.parametrize("material", ["Brochure", "brochures", "  Efficacy  brochure", "dosing card", "Dosing guide"])
+def test_gazetteer_aliases_of_approved_materials_pass(engine, material):
+    report = engine.check(ComplianceCheckSchema(raw_text_segment="Met Dr Smith.", material_references=[material]))
+    assert report.status == "Pass", report.details
+
+
+def test_unknown_material_is_flagged(engine):
+    report = engine.check(ComplianceCheckSchema(
+        raw_text_segment="Met Dr Smith.", material_references=["Brochure", "Competitor comparison chart"],
+    ))
+    assert report.risk_score == 40
+    assert "UNAPPROVED_MATERIAL_REF" in report.details and "Competitor comparison chart" in report.details
+
+
+def test_checker_resolves_aliases_from_the_gazetteer(tmp_path):
+    # The default materials of the log form ("Brochure") must not be scored as unapproved
+    checker = ComplianceChecker(settings.COMPLIANCE_RULES_PATH, 16, settings.EXTRACTION_GAZETTEER_PATH)
+    item = ComplianceCheckSchema(raw_text_segment="Met Dr Smith.", material_references=["Brochure"])
+    assert checker.check(item).status == "Pass"
+
+    without_gazetteer = ComplianceChecker(settings.COMPLIANCE_RULES_PATH, 16, os.path.join(tmp_path, "missing.json"))
+    assert without_gazetteer.check(item).status == "Warning"
@@ -0,0 +1,67 @@
+import os
+from datetime import date
+
+import pytest
+
+from services.extraction import ExtractionEngine, load_gazetteers, parse_interaction_date
+
+GAZETTEERS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteers.json")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return ExtractionEngine(load_gazetteers(GAZETTEERS))
+
+
+@pytest.mark.parametrize("text, sentiment", [
+    ("Met Dr Smith, he was not interested in the new product.", "Negative"),
+    ("Dr Chen was not happy with the results.", "Negative"),
+    ("Dr Brown wasn't very receptive to the data.", "Negative"),
+    ("Dr Brown had no concerns and was happy.", "Positive"),
+    ("Dr Sharma raised concerns about the dosing.", "Negative"),
+    ("Very positive meeting with Dr Sharma, she was impressed.", "Positive"),
+    ("Met Dr Smith to go over the schedule.", "Neutral"),
+])
+def test_sentiment_handles_negation(engine, text, sentiment):
+    assert engine.extract(text, today=date(2024, 5, 1)).sentiment == sentiment
+
+
+@pytest.mark.parametrize("text, interaction_type", [
+    ("Called Dr Smith about OncoBoost, then emailed the brochure.", "Call"),
+    ("Emailed Dr Smith the trial summary after we spoke on the phone.", "Email"),
+    ("Quick call to set up lunch; met Dr Chen at the lunch meeting.", "Meeting"),
+    ("Discussed OncoBoost with Dr Chen.", "Meeting"),
+])
+def test_interaction_type_prefers_dominant_then_first_cue(engine, text, interaction_type):
+    assert engine.extract(text, today=date(2024, 5, 1)).interaction_type == interaction_type
+
+
+def test_batch_matches_single_extraction(engine):
+    texts = ["Called Dr Smith, not happy with the results.", "Dr Brown had no concerns and was happy."]
+    assert engine.extract_batch(texts, today=date(2024, 5, 1)) == [engine.extract(t, today=date(2024, 5, 1)) for t in texts]
+
+
+TODAY = date(2026, 10, 18)
+
+
+@pytest.mark.parametrize("text", [
+    "Dr Smith: she decided 2 samples were enough.",
+    "Talked about the market 3 times.",
+    "The junior 4 residents joined.",
+    "Discussed augmented 5 dose regimen.",
+])
+def test_words_starting_with_a_month_are_not_dates(engine, text):
+    # No date found: the interaction is dated today
+    assert parse_interaction_date(text.lower(), TODAY) == TODAY
+    assert engine.extract(text, today=TODAY).interaction_date == TODAY
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("met on march 3", date(2026, 3, 3)),
+    ("met on Sept. 14, 2025", date(2025, 9, 14)),
+    ("met on 4th June", date(2026, 6, 4)),
+    ("met on 2 dec 2024", date(2024, 12, 2)),
+    ("met on december 2", date(2025, 12, 2)),
+])
+def test_month_names_are_parsed(text, expected):
+    assert parse_interaction_date(text.lower(), TODAY) == expected
@@ -0,0 +1,45 @@
+import asyncio
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database.migrations import run_migrations
+from services.hcp_directory import HCPDirectory
+
+
+class CountingDirectory(HCPDirectory):
+    refreshes = 0
+
+    async def refresh(self, force: bool = False):
+        if force:
+            self.refreshes += 1
+        await super().refresh(force)
+
+
+async def _resolve_and_get(url: str):
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(run_migrations)
+        factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        directory = CountingDirectory(factory, threshold=0.8, margin=0.05, refresh_seconds=60)
+
+        # New master rows are written (with aware created_at timestamps)
+        resolved = await directory.resolve_many(["Dr. John Smith", "Smith, John", "Dr. Jane Doe"])
+        assert resolved["Dr. John Smith"].hcp_id == resolved["Smith, John"].hcp_id
+        assert directory.created == 2
+
+        # A fresh directory finds them by id; unknown ids cost one refresh for the whole lookup
+        other = CountingDirectory(factory, threshold=0.8, margin=0.05, refresh_seconds=60)
+        ids = {match.hcp_id for match in resolved.values()}
+        found = await other.get_many([*ids, uuid4(), uuid4()])
+        assert found.keys() == ids
+        assert other.refreshes == 1
+    finally:
+        await engine.dispose()
+
+
+def test_resolve_creates_hcps_and_get_many_refreshes_once(tmp_path):
+    asyncio.run(_resolve_and_get(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}"))
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import date
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database.migrations import run_migrations
+from models.schemas import HCPInteractionCreate
+from services.interactions import IdempotencyKeyConflict, bulk_create_interactions
+
+
+def _row(outcomes: str) -> HCPInteractionCreate:
+    return HCPInteractionCreate(
+        hcp_name="Dr. John Smith", interaction_type="Meeting", interaction_date=date(2024, 5, 1),
+        sentiment="Positive", outcomes=outcomes, raw_transcript=f"Transcript: {outcomes}",
+    )
+
+
+async def _bulk_replays(url: str):
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(run_migrations)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            first = await bulk_create_interactions(session, [_row("a"), _row("b")], ["req:0", "req:1"])
+            assert [created for _, created in first] == [True, True]
+
+            # Retry of the same request: row 0 unchanged, row 1 edited under the same key,
+            # row 2 new; a keyless copy of row 0's content is a duplicate of it
+            again = await bulk_create_interactions(
+                session, [_row("a"), _row("b, edited"), _row("c"), _row("a")], ["req:0", "req:1", "req:2", None]
+            )
+            assert again[0] == (first[0][0], False)
+            assert isinstance(again[1], IdempotencyKeyConflict)
+            assert again[2][1] is True
+            assert again[3] == (first[0][0], False)
+    finally:
+        await engine.dispose()
+
+
+def test_bulk_reports_key_reused_for_different_content(tmp_path):
+    asyncio.run(_bulk_replays(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}"))
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, List, TypedDict
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph import END, START, StateGraph
+
+from agent.llm_gateway import LLMGateway
+
+
+class FakeChatModel(BaseChatModel):
+    """Streams "Hel", "lo"; with fail_after_first_token, the first call drops after "Hel"."""
+
+    fail_after_first_token: bool = False
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Hello"))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        self.calls += 1
+        for i, token in enumerate(["Hel", "lo"]):
+            if i == 1 and self.fail_after_first_token and self.calls == 1:
+                raise ConnectionError("connection reset")
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(0.01)
+
+
+class State(TypedDict):
+    reply: str
+
+
+def _gateway() -> LLMGateway:
+    return LLMGateway(
+        tokens_per_minute=0, requests_per_second=0, max_concurrency=10, max_queue=10,
+        queue_timeout=5, max_retries=2, retry_base=0.01, retry_max=0.01,
+    )
+
+
+def _graph(gateway: LLMGateway, model: FakeChatModel):
+    async def llm_node(state: State):
+        result = await gateway.ainvoke(model, [HumanMessage(content="hi")])
+        return {"reply": result.content}
+
+    builder = StateGraph(State)
+    builder.add_node("llm_node", llm_node)
+    builder.add_edge(START, "llm_node")
+    builder.add_edge("llm_node", END)
+    return builder.compile()
+
+
+async def _stream_tokens(app) -> List[str]:
+    tokens = []
+    async for chunk, _ in app.astream({"reply": ""}, stream_mode="messages"):
+        if chunk.content:  # skip the empty closing chunk
+            tokens.append(chunk.content)
+    return tokens
+
+
+def test_streaming_callers_each_get_their_tokens():
+    async def run():
+        gateway, model = _gateway(), FakeChatModel()
+        app = _graph(gateway, model)
+        first, second = await asyncio.gather(_stream_tokens(app), _stream_tokens(app))
+        assert first == second == ["Hel", "lo"]
+        assert model.calls == 2 and gateway.coalesced == 0
+
+    asyncio.run(run())
+
+
+def test_non_streaming_callers_share_one_call():
+    async def run():
+        gateway, model = _gateway(), FakeChatModel()
+        app = _graph(gateway, model)
+        results = await asyncio.gather(app.ainvoke({"reply": ""}), app.ainvoke({"reply": ""}))
+        assert [r["reply"] for r in results] == ["Hello", "Hello"]
+        assert model.calls == 1 and gateway.coalesced == 1
+
+    asyncio.run(run())
+
+
+def test_no_retry_after_tokens_were_streamed():
+    async def run():
+        gateway, model = _gateway(), FakeChatModel(fail_after_first_token=True)
+        # "Hel" already reached the client, so the dropped call is not retried
+        with pytest.raises(ConnectionError):
+            await _stream_tokens(_graph(gateway, model))
+        assert model.calls == 1 and gateway.retries == 0
+
+    asyncio.run(run())
+
+
+def test_retries_before_the_first_token():
+    async def run():
+        gateway = _gateway()
+
+        class FailingOnce(FakeChatModel):
+            async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+                if self.calls == 0:
+                    self.calls += 1
+                    raise ConnectionError("connection refused")
+                return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+        model = FailingOnce()
+        result = await gateway.ainvoke(model, [HumanMessage(content="hi")])
+        assert result.content == "Hello"
+        assert model.calls == 2 and gateway.retries == 1
+
+    asyncio.run(run())
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from observability.metrics import HTTP_REQUEST_SECONDS, MetricsMiddleware
+
+
+def _routes_seen() -> set:
+    return {
+        sample.labels["route"]
+        for family in HTTP_REQUEST_SECONDS.collect()
+        for sample in family.samples
+        if sample.name.endswith("_count")
+    }
+
+
+def test_route_label_is_the_path_template():
+    notes, tasks = APIRouter(), APIRouter()
+
+    @notes.get("/reps/{rep_id}/notes/{note_id}")
+    async def get_note(rep_id: str, note_id: str):
+        return {}
+
+    @notes.get("")
+    async def list_notes():
+        return []
+
+    @tasks.get("")
+    async def list_tasks():
+        return []
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(notes, prefix="/metrics-test/v1/notes")
+    app.include_router(tasks, prefix="/metrics-test/v1/tasks")
+
+    client = TestClient(app)
+    # Parameter values that also occur elsewhere in the path
+    assert client.get("/metrics-test/v1/notes/reps/v1/notes/v1").status_code == 200
+    assert client.get("/metrics-test/v1/notes/reps/notes/notes/notes").status_code == 200
+    assert client.get("/metrics-test/v1/notes").status_code == 200
+    assert client.get("/metrics-test/v1/tasks").status_code == 200
+    assert client.get("/metrics-test/v1/missing").status_code == 404
+
+    routes = {route for route in _routes_seen() if route.startswith("/metrics-test")}
+    assert routes == {
+        "/metrics-test/v1/notes/reps/{rep_id}/notes/{note_id}",
+        "/metrics-test/v1/notes",
+        "/metrics-test/v1/tasks",
+    }
+    assert "unmatched" in _routes_seen()
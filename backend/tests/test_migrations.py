@@ -0,0 +1,117 @@
+"""
+Upgrades a populated database in the layout of the old create_all() bootstrap
+(inline raw_transcript, triggers-synced FTS5 / generated tsvector) to the latest
+schema. Runs on SQLite; set TEST_POSTGRES_URL (an empty postgresql+asyncpg
+database) to run it on Postgres as well.
+"""
+import asyncio
+import json
+import os
+from datetime import date, datetime
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.migrations import LATEST_VERSION, run_migrations
+from services.search import search_interactions
+from services.transcripts import decode_transcript
+
+# (day, hcp_name, outcomes, raw_transcript); the last row repeats the first under another spelling
+ROWS = [
+    (1, "Dr. John Smith", "Discussed dosing of OncoBoost", None),
+    (2, "Smith, John", "Follow-up on trial enrollment", "Long talk about renal safety and titration"),
+    (3, "Dr. Jane Doe", "Left the dosing guide", "Asked for the renal safety data"),
+    (1, "Smith, John", "Discussed dosing of OncoBoost", None),
+]
+
+
+def _baseline_ddl(dialect: str):
+    uuid_type, timestamp_type = ("UUID", "TIMESTAMP WITHOUT TIME ZONE") if dialect == "postgresql" else ("CHAR(32)", "DATETIME")
+    yield (
+        f"CREATE TABLE hcpinteraction (interaction_id {uuid_type} NOT NULL PRIMARY KEY, hcp_name VARCHAR NOT NULL, "
+        "interaction_type VARCHAR NOT NULL, interaction_date DATE NOT NULL, attendees JSON, topics_discussed JSON, "
+        "materials_shared JSON, samples_distributed JSON, sentiment VARCHAR NOT NULL, outcomes VARCHAR NOT NULL, "
+        f"follow_up_actions JSON, raw_transcript VARCHAR, created_at {timestamp_type} NOT NULL)"
+    )
+    yield "CREATE INDEX ix_hcpinteraction_hcp_date_id ON hcpinteraction (hcp_name, interaction_date, interaction_id)"
+    if dialect == "postgresql":
+        yield (
+            "ALTER TABLE hcpinteraction ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(outcomes, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(raw_transcript, '')), 'B')) STORED"
+        )
+    else:
+        yield ("CREATE VIRTUAL TABLE hcpinteraction_fts USING fts5("
+               "outcomes, raw_transcript, content='hcpinteraction', content_rowid='rowid')")
+        yield ("CREATE TRIGGER hcpinteraction_fts_ai AFTER INSERT ON hcpinteraction BEGIN "
+               "INSERT INTO hcpinteraction_fts(rowid, outcomes, raw_transcript) "
+               "VALUES (new.rowid, new.outcomes, new.raw_transcript); END")
+
+
+async def _upgrade_populated_baseline(url: str):
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            dialect = conn.dialect.name
+            for ddl in _baseline_ddl(dialect):
+                await conn.execute(text(ddl))
+            for created, (day, hcp_name, outcomes, transcript) in enumerate(ROWS, start=1):
+                interaction_id = uuid4()
+                await conn.execute(text(
+                    "INSERT INTO hcpinteraction VALUES (:id, :hcp_name, 'Meeting', :day, :attendees, '[]', "
+                    "'[\"Brochures\"]', '[]', 'Positive', :outcomes, '[]', :transcript, :created_at)"
+                ), {
+                    "id": interaction_id if dialect == "postgresql" else interaction_id.hex,
+                    "hcp_name": hcp_name, "day": date(2024, 1, day), "attendees": json.dumps(["Rep A"]),
+                    "outcomes": outcomes, "transcript": transcript, "created_at": datetime(2024, 1, created, 12),
+                })
+
+        async with engine.begin() as conn:
+            assert await conn.run_sync(run_migrations) == LATEST_VERSION
+        async with engine.begin() as conn:
+            assert await conn.run_sync(run_migrations) == 0
+            assert (await conn.execute(text("SELECT version FROM schema_version"))).scalar() == LATEST_VERSION
+
+            stored = (await conn.execute(text(
+                "SELECT t.codec, t.data FROM hcpinteraction h JOIN transcript t ON t.digest = h.transcript_digest"
+            ))).all()
+            assert sorted(decode_transcript(row.codec, row.data) for row in stored) == sorted(t for _, _, _, t in ROWS if t)
+
+            unlinked = (await conn.execute(text("SELECT count(*) FROM hcpinteraction WHERE hcp_id IS NULL"))).scalar()
+            assert unlinked == 0
+            assert (await conn.execute(text("SELECT count(*) FROM hcp"))).scalar() == 2
+            assert (await conn.execute(text(
+                "SELECT count(*) FROM interactionlistitem WHERE field = 'attendees'"
+            ))).scalar() == len(ROWS)
+            assert (await conn.execute(text(
+                "SELECT count(*) FROM interactionrollupsummary WHERE dimension = 'rep'"
+            ))).scalar() == 1
+
+            # Every spelling of an HCP is stored, hashed and rolled up under its display name
+            # (the most used spelling)
+            names = (await conn.execute(text(
+                "SELECT hcp_name, count(*) AS n, count(content_hash) AS hashed FROM hcpinteraction GROUP BY hcp_name ORDER BY hcp_name"
+            ))).all()
+            assert [tuple(row) for row in names] == [("Dr. Jane Doe", 1, 1), ("Smith, John", 3, 2)]
+            summaries = (await conn.execute(text(
+                "SELECT key, interactions FROM interactionrollupsummary WHERE dimension = 'hcp' ORDER BY key"
+            ))).all()
+            assert [tuple(row) for row in summaries] == [("Dr. Jane Doe", 1), ("Smith, John", 3)]
+
+        async with AsyncSession(engine) as session:
+            hits = await search_interactions(session, "renal safety")
+            assert sorted(hit.hcp_name for hit in hits) == ["Dr. Jane Doe", "Smith, John"]
+            assert len(await search_interactions(session, "enrollment")) == 1
+    finally:
+        await engine.dispose()
+
+
+def test_upgrades_populated_sqlite_baseline(tmp_path):
+    asyncio.run(_upgrade_populated_baseline(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}"))
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+def test_upgrades_populated_postgres_baseline():
+    asyncio.run(_upgrade_populated_baseline(os.environ["TEST_POSTGRES_URL"]))
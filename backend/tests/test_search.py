@@ -0,0 +1,94 @@
+import asyncio
+from datetime import date
+
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database.migrations import run_migrations
+from models.database import HCPInteraction
+from models.schemas import HCPInteractionCreate
+from services.interactions import bulk_create_interactions
+from services.search import index_for_search, search_interactions
+
+
+def _row(hcp_name: str, outcomes: str, transcript: str) -> HCPInteractionCreate:
+    return HCPInteractionCreate(
+        hcp_name=hcp_name, interaction_type="Meeting", interaction_date=date(2024, 5, 1),
+        sentiment="Neutral", outcomes=outcomes, raw_transcript=transcript,
+    )
+
+
+async def _hcp_names(session: AsyncSession, query: str):
+    return sorted(hit.hcp_name for hit in await search_interactions(session, query))
+
+
+async def _index_survives_rowid_changes_and_updates(url: str):
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(run_migrations)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            written = await bulk_create_interactions(session, [
+                _row("Dr. Jane Doe", "Dropped off samples", "Short visit"),
+                _row("Dr. John Smith", "Discussed dosing", "Renal safety questions"),
+                _row("Dr. Emily Chen", "Trial enrollment", "Asked about renal function"),
+            ])
+            first_id = written[0][0]
+
+        # hcpinteraction has no INTEGER PRIMARY KEY, so VACUUM may renumber its
+        # implicit rowids; renumber them the way it could after the first row is gone
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM interactionlistitem WHERE interaction_id = :id"), {"id": first_id.hex})
+            await conn.execute(text("DELETE FROM hcpinteraction WHERE interaction_id = :id"), {"id": first_id.hex})
+            await conn.execute(text("UPDATE hcpinteraction SET rowid = rowid + 100"))
+            await conn.execute(text("UPDATE hcpinteraction SET rowid = rowid - 101"))
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            assert await _hcp_names(session, "samples") == []
+            assert await _hcp_names(session, "renal") == ["Dr. Emily Chen", "Dr. John Smith"]
+            assert await _hcp_names(session, "dosing") == ["Dr. John Smith"]
+
+            # Indexing an interaction again replaces its entry
+            smith = written[1][0]
+            await session.execute(
+                update(HCPInteraction).where(HCPInteraction.interaction_id == smith).values(outcomes="Discussed titration")
+            )
+            await index_for_search(session, [{"interaction_id": smith, "outcomes": "Discussed titration", "transcript": None}])
+            await session.commit()
+            assert await _hcp_names(session, "dosing") == []
+            assert await _hcp_names(session, "titration") == ["Dr. John Smith"]
+            assert await _hcp_names(session, "renal") == ["Dr. Emily Chen"]
+    finally:
+        await engine.dispose()
+
+
+async def _rowid_keyed_index_is_rebuilt(url: str):
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(run_migrations)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await bulk_create_interactions(session, [_row("Dr. John Smith", "Discussed dosing", "Renal safety")])
+
+        # The layout written by migration 7 before documents existed
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP TABLE hcpinteraction_fts"))
+            await conn.execute(text("DROP TABLE hcpinteraction_fts_doc"))
+            await conn.execute(text("CREATE VIRTUAL TABLE hcpinteraction_fts USING fts5(outcomes, transcript, content='')"))
+            await conn.execute(text("UPDATE schema_version SET version = 7"))
+        async with engine.begin() as conn:
+            assert await conn.run_sync(run_migrations) >= 1
+
+        async with AsyncSession(engine) as session:
+            assert await _hcp_names(session, "renal") == ["Dr. John Smith"]
+    finally:
+        await engine.dispose()
+
+
+def test_sqlite_index_survives_rowid_changes_and_updates(tmp_path):
+    asyncio.run(_index_survives_rowid_changes_and_updates(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}"))
+
+
+def test_sqlite_rowid_keyed_index_is_rebuilt(tmp_path):
+    asyncio.run(_rowid_keyed_index_is_rebuilt(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}"))
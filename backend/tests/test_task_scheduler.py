@@ -0,0 +1,56 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database.migrations import run_migrations
+from models.database import FollowUpTask
+from models.schemas import FollowUpTaskCreate
+from services.task_scheduler import TaskScheduler
+from services.tasks import create_follow_up_task
+
+
+def _task(description: str, **kwargs) -> FollowUpTaskCreate:
+    return FollowUpTaskCreate(
+        task_description=description, due_date=date.today() + timedelta(days=30),
+        priority="High", assigned_user_id="rep-a", **kwargs,
+    )
+
+
+async def _deliver_due_reminders(url: str):
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(run_migrations)
+        factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        delivered = []
+
+        async def sink(tasks):
+            delivered.extend(task.task_description for task in tasks)
+
+        scheduler = TaskScheduler(factory, window_seconds=3600, window_size=100, batch_size=10,
+                                  lease_seconds=60, refresh_seconds=60, sink=sink)
+        past = datetime.now(timezone.utc) - timedelta(minutes=5)
+        async with factory() as session:
+            # An aware and a naive (taken as UTC) reminder time, both due; one default in a month
+            for task in (_task("aware", remind_at=past), _task("naive", remind_at=past.replace(tzinfo=None)), _task("later")):
+                scheduler.notify(await create_follow_up_task(session, task))
+
+        await scheduler.refresh()
+        assert scheduler.stats()["heap_size"] == 2
+        assert await scheduler.fire(scheduler._pop_due(datetime.now(timezone.utc))) == 2
+        assert sorted(delivered) == ["aware", "naive"]
+
+        async with factory() as session:
+            tasks = {t.task_description: t for t in (await session.exec(select(FollowUpTask))).all()}
+        assert tasks["aware"].status == tasks["naive"].status == "reminded"
+        assert tasks["later"].status == "pending"
+    finally:
+        await engine.dispose()
+
+
+def test_scheduler_delivers_due_reminders(tmp_path):
+    asyncio.run(_deliver_due_reminders(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}"))
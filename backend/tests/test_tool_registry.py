@@ -0,0 +1,50 @@
+import asyncio
+
+from langchain_core.tools import tool
+
+from agent.tool_registry import ToolRegistry, bucket_quantile
+
+
+@tool
+async def registry_echo(text: str) -> str:
+    """Echoes the text back."""
+    return text
+
+
+@tool
+async def registry_fail(text: str) -> str:
+    """Always fails."""
+    raise ValueError("boom")
+
+
+@tool
+async def registry_slow(text: str) -> str:
+    """Outlasts the registry timeout."""
+    await asyncio.sleep(1)
+    return text
+
+
+def test_stats_come_from_the_prometheus_metrics():
+    registry = ToolRegistry([registry_echo, registry_fail, registry_slow], max_concurrency=4, timeout=0.05)
+    calls = [
+        {"name": name, "args": {"text": "hi"}, "id": f"call-{i}"}
+        for i, name in enumerate(["registry_echo", "registry_echo", "registry_fail", "registry_slow"])
+    ]
+    messages = asyncio.run(registry.run_calls(calls, {}))
+    assert [m.tool_call_id for m in messages] == ["call-0", "call-1", "call-2", "call-3"]
+
+    stats = registry.stats()
+    assert stats["registry_echo"]["latency"]["count"] == 2
+    assert stats["registry_echo"]["latency"]["buckets"]["+Inf"] == 2
+    assert stats["registry_echo"]["errors"] == stats["registry_echo"]["timeouts"] == 0
+    assert stats["registry_fail"]["errors"] == 1
+    assert stats["registry_slow"]["timeouts"] == 1
+    assert stats["registry_slow"]["latency"]["p50"] >= 0.05  # cut off at the timeout
+
+
+def test_bucket_quantile():
+    buckets = {"0.1": 2, "1.0": 9, "+Inf": 10}
+    assert bucket_quantile(buckets, 10, 0.5) == 1.0
+    assert bucket_quantile(buckets, 10, 0.2) == 0.1
+    assert bucket_quantile(buckets, 10, 0.95) is None
+    assert bucket_quantile({}, 0, 0.5) is None
@@ -2,7 +2,15 @@
 import React, { useEffect, useRef } from "react";
 import { useDispatch, useSelector } from "react-redux";
 import AIChatInput from "./AIChatInput";
-import { appendMessage, setStreamingStatus, setThreadId } from "../../redux/chatSlice";
+import {
+  appendMessage,
+  appendDelta,
+  completeMessage,
+  discardStreamedMessage,
+  settleStreamedMessage,
+  setStreamingStatus,
+  setThreadId,
+} from "../../redux/chatSlice";
 import { setDraftFromAI } from "../../redux/interactionsSlice";
 import { streamAgentChat } from "../../services/api";
 
@@ -31,7 +39,7 @@ export default function AIChatContainer({ threadId, onSend, onLogInteraction })
       chat.threadId,
       text,
       (aiText)=>{
-        dispatch(appendMessage({ role: "ai", content: aiText }));
+        dispatch(completeMessage(aiText));
       },
       (toolCall) => {
         console.log("AIChatContainer received toolCall:", toolCall);
@@ -58,9 +66,21 @@ export default function AIChatContainer({ threadId, onSend, onLogInteraction })
 
 
       (err)=>{
+        dispatch(settleStreamedMessage());
         dispatch(appendMessage({ role: "ai", content: `Agent error: ${err}` }));
+      },
+      // Form JSON is not shown as a chat reply
+      ()=>{
+        dispatch(discardStreamedMessage());
+      },
+      // Tokens of the reply as they arrive
+      (delta)=>{
+        dispatch(appendDelta(delta));
       }
-    );
+    ).finally(()=>{
+      dispatch(settleStreamedMessage());
+      dispatch(setStreamingStatus("idle"));
+    });
   };
 
   return (
@@ -21,6 +21,35 @@ const chatSlice = createSlice({
 
       state.messages.push(msg);
     },
+    // Token-by-token text of the AI reply being streamed (TEXT_DELTA)
+    appendDelta(state, action) {
+      const last = state.messages[state.messages.length - 1];
+      if (last && last.streaming) {
+        last.content += action.payload;
+      } else {
+        state.messages.push({ role: "ai", content: action.payload, streaming: true });
+      }
+    },
+    // The completed AI reply (TEXT): replaces the streamed text, or is appended
+    completeMessage(state, action) {
+      const last = state.messages[state.messages.length - 1];
+      if (last && last.streaming) {
+        last.content = action.payload;
+        last.streaming = false;
+      } else {
+        state.messages.push({ role: "ai", content: action.payload });
+      }
+    },
+    // The streamed text was not a chat reply (form JSON): remove it
+    discardStreamedMessage(state) {
+      const last = state.messages[state.messages.length - 1];
+      if (last && last.streaming) state.messages.pop();
+    },
+    // Stream ended (done, error or dropped): keep any partial text as is
+    settleStreamedMessage(state) {
+      const last = state.messages[state.messages.length - 1];
+      if (last && last.streaming) last.streaming = false;
+    },
     setStreamingStatus(state, action) {
       state.streamingStatus = action.payload;
     },
@@ -35,5 +64,14 @@ const chatSlice = createSlice({
   },
 });
 
-export const { appendMessage, setStreamingStatus, setThreadId, resetChat } = chatSlice.actions;
+export const {
+  appendMessage,
+  appendDelta,
+  completeMessage,
+  discardStreamedMessage,
+  settleStreamedMessage,
+  setStreamingStatus,
+  setThreadId,
+  resetChat,
+} = chatSlice.actions;
 export default chatSlice.reducer;
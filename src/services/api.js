@@ -57,6 +57,7 @@ function isStructuredData(str) {
  * @param {function(any):void} onToolCall
  * @param {function(string):void} onError
  * @param {function(object):void} onFormData   <-- NEW
+ * @param {function(string):void} [onDelta]  token-by-token text (optional)
  */
 export async function streamAgentChat(
   threadId,
@@ -64,7 +65,8 @@ export async function streamAgentChat(
   onMessage,
   onToolCall,
   onError,
-  onFormData // IMPORTANT
+  onFormData, // IMPORTANT
+  onDelta
 ) {
   const url = `http://localhost:8000/api/v1/agent/chat/stream`;
 
@@ -92,6 +94,9 @@ export async function streamAgentChat(
       buffer = parts.pop(); // keep incomplete segment
 
       for (let raw of parts) {
+        // SSE comments (": ping") are heartbeats that keep the connection alive
+        if (raw.startsWith(":")) continue;
+
         const clean = raw.replace(/^data:\s*/, "").trim();
         if (!clean || clean === "[DONE]") continue;
 
@@ -108,6 +113,10 @@ export async function streamAgentChat(
         // -------------------------
         switch (chunk.type) {
 
+          case "TEXT_DELTA":
+            onDelta && onDelta(chunk.content);
+            break;
+
           case "TEXT": {
             const text = chunk.content;
 
@@ -144,6 +153,9 @@ export async function streamAgentChat(
             console.log("Tool call started...");
             break;
 
+          case "DONE":
+            return;
+
           case "ERROR":
             onError && onError(chunk.content);
             reader.cancel();